@@ -3,6 +3,7 @@ from tkinter import ttk
 import customtkinter as ctk
 from PIL import Image
 from pathlib import Path
+from Modules.money import format_pesos, parse_centavos
 
 # ====================== PATH CONFIGURATION ======================
 # Set up paths for assets and data files
@@ -101,23 +102,11 @@ class BookingTableView(ctk.CTkFrame):
             # Format Price with currency symbol - FIXED VERSION
             if 'Price' in df.columns:
                 def format_price(x):
-                    if pd.isnull(x) or x == "":
+                    if pd.isnull(x) or str(x).replace('₱', '').strip() == "":
                         return ""
                     try:
-                        # If x is already a string, try to extract numeric value
-                        if isinstance(x, str):
-                            # Remove currency symbols and commas
-                            clean_value = x.replace('₱', '').replace(',', '').strip()
-                            if clean_value == "":
-                                return ""
-                            # Convert to float
-                            numeric_value = float(clean_value)
-                        else:
-                            # If x is already numeric
-                            numeric_value = float(x)
-                        
-                        # Format with currency symbol
-                        return f"₱{numeric_value:,.2f}"
+                        # Parsed once to whole centavos, the unit fares are computed in
+                        return format_pesos(parse_centavos(x), thousands=True).replace("₱ ", "₱")
                     except (ValueError, TypeError):
                         # If conversion fails, return original value or empty string
                         return str(x) if x is not None else ""
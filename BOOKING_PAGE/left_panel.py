@@ -1,5 +1,6 @@
 import customtkinter as ctk
 from Modules.distance_calculator import DistanceCalculator
+from Modules.eta_calculator import ETACalculator
 
 class LeftPanel:
     """Manages the left panel components - map and location inputs"""
@@ -69,9 +70,9 @@ class LeftPanel:
                 pickup_lat, pickup_lng = self.pickup_coordinates
                 dropoff_lat, dropoff_lng = self.dropoff_coordinates
                 
-                distance_text = DistanceCalculator.format_distance(
+                distance_text = DistanceCalculator.format_distance_km(ETACalculator.get_trip_distance_km(
                     pickup_lat, pickup_lng, dropoff_lat, dropoff_lng
-                )
+                ))
                 self.distance_label.configure(
                     text=f"📏 Distance: {distance_text}", 
                     text_color="green"
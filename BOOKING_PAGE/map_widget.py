@@ -1,7 +1,9 @@
 import tkintermapview
 import requests
 import threading
+from tkinter import messagebox
 from Modules.distance_calculator import DistanceCalculator
+from Modules.geofence import GeofenceIndex
 
 class MapWidget:
     def __init__(self, parent, width=400, height=300, parent_app=None):
@@ -16,6 +18,9 @@ class MapWidget:
             "SM City Sta. Mesa": (14.604704, 121.018379)
         }
         
+        # Service area and restricted zones (None if no geofence file is available)
+        self.geofences = GeofenceIndex.load_if_exists()
+        
         # Create map widget
         self.map_widget = tkintermapview.TkinterMapView(parent, width=width, height=height, corner_radius=5)
         self.map_widget.set_position(14.5991435, 121.00536490272962)
@@ -37,6 +42,9 @@ class MapWidget:
         """Handle map click events"""
         try:
             lat, lng = coordinates_tuple
+            if self.geofences is not None and not self.geofences.in_service_area(lat, lng):
+                messagebox.showwarning("Outside Service Area ⚠️", "This location is outside our service area.")
+                return
             threading.Thread(target=self.get_address_and_show_dialog, args=(lat, lng), daemon=True).start()
         except Exception as e:
             print(f"Error handling map click: {e}")
@@ -2,6 +2,8 @@ import customtkinter as ctk
 from tkinter import StringVar, messagebox
 from PIL import Image
 from Modules.fare_calculation import FareCalculator
+from Modules.promotions import PromotionTable
+from Modules.zone_table import ZoneTable
 import os
 
 class RightPanel:
@@ -20,7 +22,12 @@ class RightPanel:
         self.selected_vehicle_price = "0 Pesos"
 
         # Fare calculator instance
-        self.fare_calculator = FareCalculator()
+        self.fare_calculator = FareCalculator(zone_table=ZoneTable.load_if_exists(),
+                                              surge_engine=driver_manager.surge_engine,
+                                              promotions=PromotionTable.load_if_exists())
+        
+        # Precomputed fares between predefined places (set by the booking page once the map exists)
+        self.fare_table = None
         
         # Location coordinates (will be set from left panel)
         self.pickup_coordinates = None  # (lat, lng)
@@ -252,9 +259,15 @@ class RightPanel:
             pickup_lat, pickup_lng = self.pickup_coordinates
             dropoff_lat, dropoff_lng = self.dropoff_coordinates
             
-            fare_info = self.fare_calculator.calculate_fare(
-                pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, vehicle_name
-            )
+            fare_info = None
+            if self.fare_table is not None:
+                fare_info = self.fare_table.calculate_fare(
+                    pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, vehicle_name
+                )
+            if fare_info is None:
+                fare_info = self.fare_calculator.calculate_fare(
+                    pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, vehicle_name
+                )
             
             formatted_fare = self.fare_calculator.format_fare_display(fare_info)
             self.selected_vehicle_price = formatted_fare
@@ -625,10 +638,16 @@ class RightPanel:
         pickup_lat, pickup_lng = self.pickup_coordinates
         dropoff_lat, dropoff_lng = self.dropoff_coordinates
         
-        # Get fares for all vehicles
-        all_fares = self.fare_calculator.get_fare_for_all_vehicles(
-            pickup_lat, pickup_lng, dropoff_lat, dropoff_lng
-        )
+        # Trips between predefined places are a table lookup
+        all_fares = None
+        if self.fare_table is not None:
+            all_fares = self.fare_table.quote_all(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng)
+        
+        # Otherwise get fares for all vehicles from a single distance computation
+        if all_fares is None:
+            all_fares = self.fare_calculator.quote_all(
+                pickup_lat, pickup_lng, dropoff_lat, dropoff_lng
+            )
         
         # Update vehicle button prices
         vehicle_names = ["Car(4 Seater)", "Car(6 Seater)", "Mini Van", "Van", "Motorcycle"]
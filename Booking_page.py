@@ -3,6 +3,7 @@ from tkinter import messagebox
 from pathlib import Path
 import threading
 import time
+from datetime import datetime
 
 import sys
 import os
@@ -16,12 +17,23 @@ from BOOKING_PAGE.ui_manager import UIManager
 from Modules.driver_management import DriverManager
 from Modules.Book_history import BookingHistory
 from Modules.eta_calculator import ETACalculator
+from Modules.zone_table import ZoneTable
+from Modules.isochrone import IsochroneIndex
+from Modules.speed_profile import SpeedProfile
+from Modules.eta_learner import ETALearner
+from Modules.eta_cache import ETACache
+from Modules.surge import SurgeEngine
+from Modules.tariff import shared_tariff_store
+from Modules.fare_table import DEFAULT_HOTSPOTS_FILE, FareTable, load_hotspots
 
 
 # Set CustomTkinter appearance
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
+# How often the tariff file is checked for new prices
+TARIFF_POLL_MS = 5000
+
 # Get the directory where this script is located
 OUTPUT_PATH = Path(__file__).parent
 ASSETS_PATH = OUTPUT_PATH / "assets" / "frame0"
@@ -44,6 +56,33 @@ class MapWithDistanceRideBookingApp:
         self.current_user = None  
         self.logout_callback = None  
         self.eta_calculator = ETACalculator()
+        ETACalculator.set_zone_table(ZoneTable.load_if_exists())
+        ETACalculator.set_speed_profile(SpeedProfile.load_if_exists())
+        
+        # Pin dragging, the trip popup and the comparison dialog ask for the same ETAs repeatedly
+        ETACalculator.set_eta_cache(ETACache())
+        
+        # Prices come from data/tariff.json and are hot-reloaded while the app runs
+        shared_tariff_store.reload_if_changed()
+        
+        # Learn zone-pair speed factors from completed trips with measured timestamps, warmed from
+        # past bookings. Trips the countdown auto-completes only echo the estimate and are not learned from.
+        self.eta_learner = ETALearner.load_if_exists(speed_profile=ETACalculator.speed_profile)
+        if self.eta_learner is not None:
+            try:
+                self.eta_learner.replay(self.booking_history.csv_file)
+            except Exception as e:
+                print(f"Error replaying booking history: {e}")
+            self.booking_history.add_status_listener(self.eta_learner.on_status_change)
+            ETACalculator.set_eta_learner(self.eta_learner)
+        
+        # Reachability sets are built up front (well under a second) so the comparison dialog never waits on them
+        self.isochrones = IsochroneIndex.load_if_exists(speed_profile=ETACalculator.speed_profile)
+        if self.isochrones is not None:
+            try:
+                self.isochrones.precompute()
+            except Exception as e:
+                print(f"Error precomputing isochrones: {e}")
         
         # Setup window and components
         self.setup_window()
@@ -115,6 +154,9 @@ class MapWithDistanceRideBookingApp:
         # Initialize driver manager first
         self.driver_manager = DriverManager("data/driver.csv")
         
+        # Surge pricing follows driver status changes and ride requests per area
+        self.driver_manager.attach_surge_engine(SurgeEngine())
+        
         # Initialize UI manager with driver manager
         self.ui_manager = UIManager(self.window, self, self.driver_manager)
         
@@ -122,8 +164,34 @@ class MapWithDistanceRideBookingApp:
         self.map_widget = MapWidget(self.ui_manager.left_panel.map_frame, parent_app=self)
         self.map_widget.pack(fill="both", expand=True, padx=5, pady=5)
         
+        # Precompute fares between the predefined locations and admin hotspots;
+        # the table reprices itself whenever the tariff changes
+        places = self.map_widget.get_all_locations()
+        if os.path.exists(DEFAULT_HOTSPOTS_FILE):
+            try:
+                places.update(load_hotspots(DEFAULT_HOTSPOTS_FILE))
+            except Exception as e:
+                print(f"Error loading hotspots: {e}")
+        right_panel = self.ui_manager.right_panel
+        right_panel.fare_table = FareTable.load_or_build(right_panel.fare_calculator, places)
+        
         # Initial setup
         self.window.after(100, self.ui_manager.initial_resize)
+        self.window.after(TARIFF_POLL_MS, self.poll_tariff)
+    
+    def poll_tariff(self):
+        """Hot-reload the tariff file and reprice the shown route when it changed"""
+        try:
+            if shared_tariff_store.reload_if_changed():
+                print(f"Tariff version {shared_tariff_store.version} loaded")
+                self.ui_manager.right_panel.update_all_vehicle_prices()
+        except Exception as e:
+            print(f"Error updating prices: {e}")
+        
+        try:
+            self.window.after(TARIFF_POLL_MS, self.poll_tariff)
+        except Exception:
+            pass  # Window already destroyed
         
     def button_click(self, button_name):
         """Handle button clicks"""
@@ -160,11 +228,27 @@ class MapWithDistanceRideBookingApp:
                                f"Available: 0")
             return
 
-        # Attempt to book the ride
+        # Attempt to book the ride (nearest driver to the pickup marker when known)
+        pickup_pos = self.map_widget.get_pickup_position() if self.map_widget else None
+        
+        # Reject pickups/dropoffs outside the service area or in no-pickup zones
+        geofences = self.map_widget.geofences if self.map_widget else None
+        if geofences is not None:
+            dropoff_pos = self.map_widget.get_dropoff_position()
+            problem = None
+            if pickup_pos:
+                problem = geofences.check_pickup(*pickup_pos)
+            if not problem and dropoff_pos:
+                problem = geofences.check_dropoff(*dropoff_pos)
+            if problem:
+                messagebox.showwarning("Location Not Allowed 🚫", problem)
+                return
+        
         booking_details = self.driver_manager.book_ride(
             vehicle_type=selected_vehicle,
             pickup_location=pickup,
-            dropoff_location=dropoff
+            dropoff_location=dropoff,
+            pickup_coords=pickup_pos
         )
 
         if booking_details:
@@ -204,7 +288,7 @@ class MapWithDistanceRideBookingApp:
             # Get distance if available
             distance_str = ""
             if pickup_pos and dropoff_pos:
-                distance_km = DistanceCalculator.calculate_distance_km(
+                distance_km = ETACalculator.get_trip_distance_km(
                     pickup_pos[0], pickup_pos[1],
                     dropoff_pos[0], dropoff_pos[1]
                 )
@@ -215,7 +299,9 @@ class MapWithDistanceRideBookingApp:
                 booking_details,
                 status="Confirmed",
                 price=selected_price,
-                distance=distance_str
+                distance=distance_str,
+                pickup_coords=pickup_pos,
+                dropoff_coords=dropoff_pos
             )
         except Exception as e:
             print(f"Error adding booking to history: {e}")
@@ -420,8 +506,11 @@ class MapWithDistanceRideBookingApp:
                 self._last_booking_info = self.current_booking.copy()  # Store booking info
                 booking_id = self.current_booking['booking_id']
                 
+                # The trip's real start, so its duration can be measured at completion
+                self._last_booking_info['started_at'] = datetime.now()
                 try:
-                    self.booking_history.update_booking_status(booking_id, "In Progress")
+                    self.booking_history.update_booking_status(booking_id, "In Progress",
+                                                               started_at=self._last_booking_info['started_at'])
                     print(f"✅ Updated booking {booking_id} status to In Progress in history")
                 except Exception as e:
                     print(f"❌ Error updating booking status in history: {e}")
@@ -495,9 +584,11 @@ class MapWithDistanceRideBookingApp:
                 booking_id = self.current_booking['booking_id']
                 
 
-                # *** UPDATE BOOKING STATUS TO IN_PROGRESS IN HISTORY ***
+                # *** UPDATE BOOKING STATUS TO IN_PROGRESS IN HISTORY, WITH THE TRIP'S REAL START ***
+                self._last_booking_info['started_at'] = datetime.now()
                 try:
-                    self.booking_history.update_booking_status(booking_id, "In Progress")
+                    self.booking_history.update_booking_status(booking_id, "In Progress",
+                                                               started_at=self._last_booking_info['started_at'])
                     print(f"✅ Updated booking {booking_id} status to In Progress in history")
                 except Exception as e:
                     print(f"❌ Error updating booking status in history: {e}")
@@ -845,13 +936,20 @@ class MapWithDistanceRideBookingApp:
                     "Thank you for using Go-Do!"
                 )
             
-                self.complete_trip()
+                # The countdown ran for exactly the estimated ETA, so this is not a measurement
+                self.complete_trip(measured=False)
             
         except Exception as e:
             print(f"Error auto-completing trip: {e}")
 
-    def complete_trip(self):
-        """Complete the current trip"""
+    def complete_trip(self, measured: bool = True):
+        """
+        Complete the current trip
+        
+        Args:
+            measured: Whether someone confirmed the arrival; only then is the time
+                since the trip started stored as its duration for the ETA learner
+        """
         try:
             # Close trip dialog
             if hasattr(self, 'trip_dialog') and self.trip_dialog:
@@ -868,9 +966,13 @@ class MapWithDistanceRideBookingApp:
                 if released_driver:
                     print(f"✅ Released driver {released_driver.driver_name} back to available status")
             
-                # Update booking history to completed
+                # Update booking history to completed, with the duration between the real timestamps
+                duration_minutes = None
+                started_at = self._last_booking_info.get('started_at')
+                if measured and started_at is not None:
+                    duration_minutes = (datetime.now() - started_at).total_seconds() / 60
                 try:
-                    self.booking_history.update_booking_status(booking_id, "Completed")
+                    self.booking_history.update_booking_status(booking_id, "Completed", duration_minutes)
                     print(f"✅ Updated booking {booking_id} status to Completed in history")
                 except Exception as e:
                     print(f"❌ Error updating booking status in history: {e}")
@@ -919,20 +1021,35 @@ class MapWithDistanceRideBookingApp:
         vehicle_types = ["Car4Seater", "Car6Seater", "Minivan", "Van", "Motorcycle"]
         comparison_text = "🚗 ETA Comparison:\n\n"
         
+        # Precomputed isochrones answer trips starting in a known zone, at the same
+        # time-of-day speeds as the speed lines below
+        now = datetime.now()
+        buckets = None
+        if self.isochrones is not None:
+            buckets = self.isochrones.reach_buckets(pickup_pos[0], pickup_pos[1],
+                                                    dropoff_pos[0], dropoff_pos[1], now)
+        
+        # Otherwise every vehicle's ETA comes from one batch computation
+        all_etas = None
+        if not buckets or None in buckets.values():
+            all_etas = ETACalculator.calculate_eta_for_all_vehicles(
+                pickup_pos[0], pickup_pos[1],
+                dropoff_pos[0], dropoff_pos[1], now
+            )
+        
         for vehicle_type in vehicle_types:
-            vehicle = self.get_vehicle_by_type(vehicle_type)
-            if vehicle:
-                eta_info = ETACalculator.calculate_eta_for_vehicle(
-                    pickup_pos[0], pickup_pos[1],
-                    dropoff_pos[0], dropoff_pos[1],
-                    vehicle
-                )
-                
-                comparison_text += f"🚙 {vehicle_type}:\n"
-                comparison_text += f"   ⏱️ {eta_info['eta_formatted']}\n"
-                comparison_text += f"   🏃 Speed: {vehicle.average_speed} km/h\n"
-                
-                comparison_text += "\n"
+            bucket = buckets.get(vehicle_type) if buckets else None
+            if bucket is not None:
+                eta_text = f"Within {bucket} min"
+            else:
+                eta_text = all_etas[vehicle_type]['eta_formatted']
+            
+            comparison_text += f"🚙 {vehicle_type}:\n"
+            comparison_text += f"   ⏱️ {eta_text}\n"
+            speed = ETACalculator.get_vehicle_speed(vehicle_type, pickup_pos[0], pickup_pos[1], now)
+            comparison_text += f"   🏃 Speed: {speed:.0f} km/h\n"
+            
+            comparison_text += "\n"
         
         messagebox.showinfo("ETA Comparison 📊", comparison_text)
     
@@ -1126,10 +1243,10 @@ class MapWithDistanceRideBookingApp:
             dropoff_pos = self.map_widget.get_dropoff_position()
             
             if pickup_pos and dropoff_pos:
-                # Calculate distance
-                distance_text = DistanceCalculator.format_distance(
+                # Calculate distance (cached per route)
+                distance_text = DistanceCalculator.format_distance_km(ETACalculator.get_trip_distance_km(
                     pickup_pos[0], pickup_pos[1], dropoff_pos[0], dropoff_pos[1]
-                )
+                ))
                 
                 # Calculate ETA for selected vehicle if available
                 selected_vehicle = self.ui_manager.get_selected_vehicle()
@@ -1,6 +1,7 @@
 import csv
 import os
-from typing import Dict, List, Optional
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
 
 class BookingHistory:
     """Manages booking history storage and retrieval"""
@@ -15,11 +16,23 @@ class BookingHistory:
             'Distance', 
             'Booking_ID',
             'Price',
-            'Status'
+            'Status',
+            # Trip details used by the ETA learner; empty for older records
+            'Vehicle_Type',
+            'Pickup_lat',
+            'Pickup_lng',
+            'Dropoff_lat',
+            'Dropoff_lng',
+            'Duration_min',
+            'Started_at'
         ]
         
+        # Callbacks notified as callback(record, new_status) after a status update
+        self.status_listeners: List[Callable[[Dict, str], None]] = []
+        
         # Ensure CSV file exists with headers
         self.ensure_csv_exists()
+        self.migrate_headers()
     
     def ensure_csv_exists(self):
         """Create CSV file with headers if it doesn't exist"""
@@ -32,8 +45,30 @@ class BookingHistory:
             except Exception as e:
                 print(f"❌ Error creating {self.csv_file}: {e}")
     
+    def migrate_headers(self):
+        """Add any missing columns to an existing file written by an older version"""
+        try:
+            with open(self.csv_file, 'r', newline='', encoding='utf-8') as file:
+                reader = csv.DictReader(file)
+                if reader.fieldnames is None or all(f in reader.fieldnames for f in self.fieldnames):
+                    return
+                records = list(reader)
+            
+            with open(self.csv_file, 'w', newline='', encoding='utf-8') as file:
+                writer = csv.DictWriter(file, fieldnames=self.fieldnames, extrasaction='ignore')
+                writer.writeheader()
+                writer.writerows(records)
+            print(f"✅ Added trip detail columns to {self.csv_file}")
+        except Exception as e:
+            print(f"❌ Error migrating {self.csv_file}: {e}")
+    
+    def add_status_listener(self, callback: Callable[[Dict, str], None]):
+        """Register a callback run as callback(record, new_status) after each status update"""
+        self.status_listeners.append(callback)
+    
     def add_booking_record(self, booking_details: Dict, status: str = "Confirmed", 
-                          price: str = "", distance: str = "") -> bool:
+                          price: str = "", distance: str = "",
+                          pickup_coords=None, dropoff_coords=None) -> bool:
         """
         Add a booking record to the CSV file
         
@@ -42,6 +77,8 @@ class BookingHistory:
             status: Booking status (default: "Confirmed")
             price: Booking price
             distance: Pre-calculated distance string
+            pickup_coords: Optional (lat, lng) of the pickup
+            dropoff_coords: Optional (lat, lng) of the dropoff
             
         Returns:
             True if successfully added, False otherwise
@@ -69,7 +106,14 @@ class BookingHistory:
                 'Distance': final_distance,
                 'Booking_ID': booking_details.get('booking_id', ''),
                 'Price': price or booking_details.get('price', ''),
-                'Status': status
+                'Status': status,
+                'Vehicle_Type': booking_details.get('vehicle_type', ''),
+                'Pickup_lat': pickup_coords[0] if pickup_coords else '',
+                'Pickup_lng': pickup_coords[1] if pickup_coords else '',
+                'Dropoff_lat': dropoff_coords[0] if dropoff_coords else '',
+                'Dropoff_lng': dropoff_coords[1] if dropoff_coords else '',
+                'Duration_min': '',
+                'Started_at': ''
             }
             
             # Write to CSV
@@ -84,36 +128,50 @@ class BookingHistory:
             print(f"❌ Error adding booking record: {e}")
             return False
     
-    def update_booking_status(self, booking_id: str, new_status: str) -> bool:
+    def update_booking_status(self, booking_id: str, new_status: str,
+                              duration_minutes: Optional[float] = None,
+                              started_at: Optional[datetime] = None) -> bool:
         """
         Update the status of an existing booking
         
         Args:
             booking_id: Booking ID to update
-            new_status: New status ("Confirmed", "Cancelled", "Finished")
+            new_status: New status ("Confirmed", "Cancelled", "Completed")
+            duration_minutes: Optional measured trip duration to store with the record
+            started_at: Optional time the trip actually started, stored with the duration
             
         Returns:
             True if successfully updated, False otherwise
         """
         try:
             records = []
-            updated = False
+            updated_record = None
             
             with open(self.csv_file, 'r', newline='', encoding='utf-8') as file:
                 reader = csv.DictReader(file)
                 for row in reader:
                     if row['Booking_ID'] == booking_id:
                         row['Status'] = new_status
-                        updated = True
+                        if duration_minutes is not None:
+                            row['Duration_min'] = f"{duration_minutes:.2f}"
+                        if started_at is not None:
+                            row['Started_at'] = started_at.isoformat(timespec='seconds')
+                        updated_record = row
                     records.append(row)
             
-            if updated:
+            if updated_record is not None:
                 with open(self.csv_file, 'w', newline='', encoding='utf-8') as file:
                     writer = csv.DictWriter(file, fieldnames=self.fieldnames)
                     writer.writeheader()
                     writer.writerows(records)
                 
                 print(f"✅ Updated booking {booking_id} status to {new_status}")
+                
+                for listener in self.status_listeners:
+                    try:
+                        listener(updated_record, new_status)
+                    except Exception as e:
+                        print(f"❌ Error in booking status listener: {e}")
                 return True
             else:
                 print(f"⚠️ Booking {booking_id} not found")
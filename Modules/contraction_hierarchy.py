@@ -0,0 +1,374 @@
+import argparse
+import heapq
+import os
+import random
+import struct
+import time
+import numpy as np
+from typing import Dict, List, Tuple
+from .routing import DEFAULT_GRAPH_FILE, RoadGraph, RoadRouter
+
+DEFAULT_CH_FILE = os.path.join("data", "road_graph.ch")
+
+CH_MAGIC = b"GODOCH02"
+# magic, graph fingerprint, nodes, graph edges, up edges, down edges, metric code
+CH_HEADER = struct.Struct("<8s16sqqqqq")
+METRIC_CODES = {RoadRouter.METRIC_DISTANCE: 0, RoadRouter.METRIC_TIME: 1}
+
+
+def _contract_graph(graph: RoadGraph, metric: str, witness_settle_limit: int = 60):
+    """
+    Contract every node of the graph in edge-difference order
+
+    Returns:
+        Tuple of (rank array, dict of all edges (u, v) -> weight incl. shortcuts)
+    """
+    weight_key = "length_m" if metric == RoadRouter.METRIC_DISTANCE else "time_s"
+    csr = graph.forward
+    offsets, targets, weights = csr["offsets"], csr["targets"], csr[weight_key]
+    n = graph.node_count
+
+    out_edges: List[Dict[int, float]] = [dict() for _ in range(n)]
+    in_edges: List[Dict[int, float]] = [dict() for _ in range(n)]
+    edges: Dict[Tuple[int, int], float] = {}
+
+    for u in range(n):
+        for e in range(offsets[u], offsets[u + 1]):
+            v, w = int(targets[e]), float(weights[e])
+            if u == v:
+                continue
+            if w < out_edges[u].get(v, float("inf")):
+                out_edges[u][v] = w
+                in_edges[v][u] = w
+                edges[(u, v)] = w
+
+    contracted = [False] * n
+    contracted_neighbors = [0] * n
+
+    def witness_distances(source, skip, limit):
+        """Bounded Dijkstra from source in the remaining graph without node skip"""
+        dist = {source: 0.0}
+        heap = [(0.0, source)]
+        settled = 0
+        while heap and settled < witness_settle_limit:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            if d > limit:
+                break
+            settled += 1
+            for v, w in out_edges[u].items():
+                if v == skip or contracted[v]:
+                    continue
+                nd = d + w
+                if nd < dist.get(v, float("inf")):
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+        return dist
+
+    def shortcuts_for(v):
+        """Shortcuts needed if v were contracted now"""
+        needed = []
+        incoming = [(u, w) for u, w in in_edges[v].items() if not contracted[u]]
+        outgoing = [(x, w) for x, w in out_edges[v].items() if not contracted[x]]
+        if not incoming or not outgoing:
+            return needed
+        max_out = max(w for _, w in outgoing)
+        for u, w_in in incoming:
+            dist = witness_distances(u, v, w_in + max_out)
+            for x, w_out in outgoing:
+                if x == u:
+                    continue
+                via = w_in + w_out
+                if dist.get(x, float("inf")) > via:
+                    needed.append((u, x, via))
+        return needed
+
+    def priority(v):
+        degree = (sum(1 for u in in_edges[v] if not contracted[u]) +
+                  sum(1 for x in out_edges[v] if not contracted[x]))
+        return len(shortcuts_for(v)) - degree + contracted_neighbors[v]
+
+    heap = [(priority(v), v) for v in range(n)]
+    heapq.heapify(heap)
+    rank = np.empty(n, dtype=np.int32)
+    next_rank = 0
+
+    while heap:
+        _, v = heapq.heappop(heap)
+        if contracted[v]:
+            continue
+
+        # Lazy update: re-evaluate and defer if no longer the cheapest
+        current = priority(v)
+        if heap and current > heap[0][0]:
+            heapq.heappush(heap, (current, v))
+            continue
+
+        for u, x, via in shortcuts_for(v):
+            if via < out_edges[u].get(x, float("inf")):
+                out_edges[u][x] = via
+                in_edges[x][u] = via
+                edges[(u, x)] = via
+
+        contracted[v] = True
+        rank[v] = next_rank
+        next_rank += 1
+
+        for neighbor in set(in_edges[v]) | set(out_edges[v]):
+            if not contracted[neighbor]:
+                contracted_neighbors[neighbor] += 1
+
+    return rank, edges
+
+
+def _upward_csr(n, pairs):
+    """Build offsets/targets/weights arrays from (source, target, weight) tuples"""
+    pairs.sort()
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    for source, _, _ in pairs:
+        offsets[source + 1] += 1
+    np.cumsum(offsets, out=offsets)
+    targets = np.array([p[1] for p in pairs], dtype=np.int32)
+    weights = np.array([p[2] for p in pairs], dtype=np.float64)
+    return offsets, targets, weights
+
+
+def build_contraction_hierarchy(graph: RoadGraph, output_file: str = DEFAULT_CH_FILE,
+                                metric: str = RoadRouter.METRIC_DISTANCE) -> str:
+    """
+    Preprocess a road graph into a contraction hierarchy file
+
+    The file holds a fixed header followed by the rank array and the
+    upward/downward search graphs, laid out so ContractionHierarchy.load
+    can memory-map it without parsing.
+
+    Args:
+        graph: Loaded RoadGraph
+        output_file: Destination path
+        metric: "distance" (meters) or "time" (seconds)
+
+    Returns:
+        Path of the written file
+    """
+    if metric not in METRIC_CODES:
+        raise ValueError(f"Unknown metric: {metric}")
+
+    n = graph.node_count
+    rank, edges = _contract_graph(graph, metric)
+
+    # Forward search climbs u -> v with rank[v] > rank[u]; the backward search
+    # from the target climbs the reversed edges of u -> v with rank[u] > rank[v]
+    up = [(u, v, w) for (u, v), w in edges.items() if rank[v] > rank[u]]
+    down = [(v, u, w) for (u, v), w in edges.items() if rank[u] > rank[v]]
+
+    up_off, up_tgt, up_w = _upward_csr(n, up)
+    down_off, down_tgt, down_w = _upward_csr(n, down)
+
+    directory = os.path.dirname(output_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(output_file, 'wb') as file:
+        file.write(CH_HEADER.pack(CH_MAGIC, graph.fingerprint.encode('ascii'), n, graph.edge_count,
+                                  len(up_tgt), len(down_tgt), METRIC_CODES[metric]))
+        for array in (rank, up_off, up_tgt, up_w, down_off, down_tgt, down_w):
+            file.write(array.tobytes())
+            padding = (-array.nbytes) % 8  # Keep every array 8-byte aligned
+            file.write(b"\0" * padding)
+
+    return output_file
+
+
+class ContractionHierarchy:
+    """
+    Memory-mapped contraction hierarchy for point-to-point road distances
+
+    Queries run a bidirectional upward Dijkstra that only relaxes edges
+    towards higher-ranked nodes, so each side settles a small fraction of
+    the graph. Several processes can map the same file and share its pages.
+    """
+
+    def __init__(self, ch_file: str, mmap_mode: str = "r"):
+        with open(ch_file, 'rb') as file:
+            header = file.read(CH_HEADER.size)
+        if header[:len(CH_MAGIC)] != CH_MAGIC:
+            raise ValueError(f"{ch_file} is not a contraction hierarchy file in the current format; rebuild it")
+        magic, fingerprint, n, graph_edges, n_up, n_down, metric_code = CH_HEADER.unpack(header)
+
+        self.ch_file = ch_file
+        self.graph_fingerprint = fingerprint.decode('ascii')
+        self.node_count = n
+        self.graph_edge_count = graph_edges
+        self.metric = {code: name for name, code in METRIC_CODES.items()}[metric_code]
+
+        offset = CH_HEADER.size
+        layout = [
+            ("rank", np.int32, n),
+            ("up_offsets", np.int64, n + 1),
+            ("up_targets", np.int32, n_up),
+            ("up_weights", np.float64, n_up),
+            ("down_offsets", np.int64, n + 1),
+            ("down_targets", np.int32, n_down),
+            ("down_weights", np.float64, n_down),
+        ]
+        for name, dtype, count in layout:
+            nbytes = np.dtype(dtype).itemsize * count
+            if count:
+                # Plain ndarray view over the mapping avoids np.memmap's per-slice overhead
+                array = np.memmap(ch_file, dtype=dtype, mode=mmap_mode, offset=offset,
+                                  shape=(count,)).view(np.ndarray)
+            else:
+                array = np.empty(0, dtype=dtype)
+            setattr(self, name, array)
+            offset += nbytes + (-nbytes) % 8
+        
+        # Adjacency lists decoded on first touch; the hot part of the hierarchy stays small
+        self._up_cache: Dict[int, list] = {}
+        self._down_cache: Dict[int, list] = {}
+
+    @classmethod
+    def load(cls, ch_file: str = DEFAULT_CH_FILE):
+        """Memory-map a hierarchy built by build_contraction_hierarchy"""
+        return cls(ch_file)
+
+    def matches(self, graph: RoadGraph) -> bool:
+        """
+        Check the hierarchy was built from this graph
+
+        Node and edge counts alone would accept an edited graph of the same
+        shape, so the graph's content fingerprint must match as well.
+        """
+        return (self.node_count == graph.node_count and self.graph_edge_count == graph.edge_count
+                and self.graph_fingerprint == graph.fingerprint)
+
+    def _neighbors(self, cache, offsets, targets, weights, u):
+        adjacency = cache.get(u)
+        if adjacency is None:
+            lo, hi = int(offsets[u]), int(offsets[u + 1])
+            adjacency = list(zip(targets[lo:hi].tolist(), weights[lo:hi].tolist()))
+            cache[u] = adjacency
+        return adjacency
+
+    def query(self, source: int, target: int) -> float:
+        """
+        Shortest path cost between two node indices
+
+        Returns:
+            Cost in meters or seconds (see metric), inf if unreachable
+        """
+        if source == target:
+            return 0.0
+
+        inf = float("inf")
+        dist_f = {source: 0.0}
+        dist_b = {target: 0.0}
+        heap_f = [(0.0, source)]
+        heap_b = [(0.0, target)]
+        best = inf
+
+        while heap_f or heap_b:
+            top_f = heap_f[0][0] if heap_f else inf
+            top_b = heap_b[0][0] if heap_b else inf
+            if min(top_f, top_b) >= best:
+                break
+
+            if top_f <= top_b:
+                heap, dist, other, cache = heap_f, dist_f, dist_b, self._up_cache
+                offsets, targets, weights = self.up_offsets, self.up_targets, self.up_weights
+            else:
+                heap, dist, other, cache = heap_b, dist_b, dist_f, self._down_cache
+                offsets, targets, weights = self.down_offsets, self.down_targets, self.down_weights
+
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            if u in other and d + other[u] < best:
+                best = d + other[u]
+
+            for v, w in self._neighbors(cache, offsets, targets, weights, u):
+                nd = d + w
+                if nd < dist.get(v, inf):
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+
+        return best
+
+
+def benchmark_routing(graph_file: str = DEFAULT_GRAPH_FILE, ch_file: str = DEFAULT_CH_FILE,
+                      n_queries: int = 500, seed: int = 0) -> Dict:
+    """
+    Compare plain Dijkstra, bidirectional A* and CH query latency on one graph
+
+    Builds the hierarchy first if ch_file does not exist.
+
+    Returns:
+        Dictionary with mean latency in microseconds per method and the
+        number of queries where the methods disagreed
+    """
+    router = RoadRouter.from_file(graph_file)
+    graph = router.graph
+
+    if not os.path.exists(ch_file):
+        build_contraction_hierarchy(graph, ch_file)
+    hierarchy = ContractionHierarchy.load(ch_file)
+    if not hierarchy.matches(graph):
+        raise ValueError(f"{ch_file} was built from a different graph")
+
+    rng = random.Random(seed)
+    pairs = [(rng.randrange(graph.node_count), rng.randrange(graph.node_count)) for _ in range(n_queries)]
+
+    results = {}
+    timings = {}
+    methods = {
+        "dijkstra": lambda s, t: router.dijkstra(s, t, hierarchy.metric),
+        "astar": lambda s, t: router.shortest_path(s, t, hierarchy.metric)[0],
+        "ch": hierarchy.query,
+    }
+    for name, method in methods.items():
+        start = time.perf_counter()
+        results[name] = [method(s, t) for s, t in pairs]
+        timings[name] = (time.perf_counter() - start) / n_queries * 1e6
+
+    mismatches = sum(
+        1 for i in range(n_queries)
+        if max(abs(results[m][i] - results["dijkstra"][i]) for m in ("astar", "ch")) > 1e-3
+    )
+
+    return {
+        "nodes": graph.node_count,
+        "edges": graph.edge_count,
+        "queries": n_queries,
+        "dijkstra_us": timings["dijkstra"],
+        "astar_us": timings["astar"],
+        "ch_us": timings["ch"],
+        "mismatches": mismatches,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Contraction hierarchy preprocessing for the road graph")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Build a .ch file from a road graph")
+    build_parser.add_argument("--graph", default=DEFAULT_GRAPH_FILE)
+    build_parser.add_argument("--output", default=DEFAULT_CH_FILE)
+    build_parser.add_argument("--metric", choices=list(METRIC_CODES), default=RoadRouter.METRIC_DISTANCE)
+
+    bench_parser = subparsers.add_parser("bench", help="Compare Dijkstra, A* and CH query latency")
+    bench_parser.add_argument("--graph", default=DEFAULT_GRAPH_FILE)
+    bench_parser.add_argument("--ch", default=DEFAULT_CH_FILE)
+    bench_parser.add_argument("--queries", type=int, default=500)
+
+    args = parser.parse_args()
+    if args.command == "build":
+        start = time.perf_counter()
+        path = build_contraction_hierarchy(RoadGraph.load(args.graph), args.output, args.metric)
+        print(f"Wrote {path} in {time.perf_counter() - start:.2f}s")
+    else:
+        stats = benchmark_routing(args.graph, args.ch, args.queries)
+        print(f"{stats['nodes']} nodes, {stats['edges']} edges, {stats['queries']} queries")
+        print(f"Dijkstra: {stats['dijkstra_us']:.0f} us/query")
+        print(f"A*:       {stats['astar_us']:.0f} us/query")
+        print(f"CH:       {stats['ch_us']:.0f} us/query")
+        print(f"Mismatches: {stats['mismatches']}")
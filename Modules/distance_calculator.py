@@ -1,4 +1,5 @@
 import math
+import numpy as np
 
 class DistanceCalculator:
     """Utility class for calculating distances between geographic coordinates"""
@@ -6,11 +7,54 @@ class DistanceCalculator:
     EARTH_RADIUS_KM = 6371  # Earth radius in kilometers
     KM_TO_MILES = 0.621371  # Conversion factor from kilometers to miles
     
+    # Urban area where the planar (equirectangular) approximation is used
+    URBAN_CENTER = (14.5995, 120.9842)  # Metro Manila
+    URBAN_RADIUS_KM = 30
+    PLANAR_ERROR_BUDGET = 0.001  # Maximum relative error vs Haversine (0.1%)
+    
+    MODE_PLANAR = "planar"
+    MODE_HAVERSINE = "haversine"
+    
+    _planar_enabled = None  # None until the urban area has been checked against Haversine
+    _planar_max_error = None
+    
+    @staticmethod
+    def calculate_distance_km_batch(lat1, lng1, lat2, lng2, dtype=np.float64):
+        """
+        Vectorized Haversine distance for arrays of coordinate pairs
+        
+        Args:
+            lat1, lng1: Latitudes and longitudes of the first points (scalars or arrays)
+            lat2, lng2: Latitudes and longitudes of the second points (scalars or arrays)
+            dtype: Floating point type used for the computation
+            
+        Returns:
+            NumPy array of distances in kilometers, broadcast to the input shapes
+        """
+        # Convert to radians
+        lat1_rad = np.radians(np.asarray(lat1, dtype=dtype))
+        lng1_rad = np.radians(np.asarray(lng1, dtype=dtype))
+        lat2_rad = np.radians(np.asarray(lat2, dtype=dtype))
+        lng2_rad = np.radians(np.asarray(lng2, dtype=dtype))
+        
+        # Haversine formula
+        dlat = lat2_rad - lat1_rad
+        dlng = lng2_rad - lng1_rad
+        
+        a = (np.sin(dlat / 2) ** 2 +
+             np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(dlng / 2) ** 2)
+        
+        # Clip guards against a > 1 from rounding on near-antipodal points
+        return 2 * np.arcsin(np.sqrt(np.clip(a, 0, 1))) * dtype(DistanceCalculator.EARTH_RADIUS_KM)
+    
     @staticmethod
     def calculate_distance_km(lat1, lng1, lat2, lng2):
         """
         Calculate distance between two points using Haversine formula
         
+        Thin scalar wrapper around calculate_distance_km_batch so single and
+        batch calls always give identical results.
+        
         Args:
             lat1, lng1: Latitude and longitude of first point
             lat2, lng2: Latitude and longitude of second point
@@ -19,22 +63,175 @@ class DistanceCalculator:
             Distance in kilometers
         """
         try:
-            # Convert to radians
-            lat1_rad, lng1_rad, lat2_rad, lng2_rad = map(math.radians, [lat1, lng1, lat2, lng2])
+            return float(DistanceCalculator.calculate_distance_km_batch(lat1, lng1, lat2, lng2))
             
-            # Haversine formula
-            dlat = lat2_rad - lat1_rad
-            dlng = lng2_rad - lng1_rad
+        except Exception as e:
+            print(f"Error calculating distance: {e}")
+            return 0
+    
+    @staticmethod
+    def calculate_distance_km_planar(lat1, lng1, lat2, lng2):
+        """
+        Equirectangular approximation of the distance between two points
+        
+        Treats the short hop as flat, scaling longitude by the cosine of the
+        mean latitude. Accurate for points a few tens of kilometers apart.
+        
+        Returns:
+            Distance in kilometers
+        """
+        mean_lat = math.radians((lat1 + lat2) / 2)
+        x = math.radians(lng2 - lng1) * math.cos(mean_lat)
+        y = math.radians(lat2 - lat1)
+        return math.sqrt(x * x + y * y) * DistanceCalculator.EARTH_RADIUS_KM
+    
+    @staticmethod
+    def calculate_distance_km_planar_batch(lat1, lng1, lat2, lng2):
+        """Vectorized equirectangular approximation, see calculate_distance_km_planar"""
+        lat1 = np.asarray(lat1, dtype=np.float64)
+        lat2 = np.asarray(lat2, dtype=np.float64)
+        mean_lat = np.radians((lat1 + lat2) / 2)
+        x = np.radians(np.asarray(lng2, dtype=np.float64) - lng1) * np.cos(mean_lat)
+        y = np.radians(lat2 - lat1)
+        return np.sqrt(x * x + y * y) * DistanceCalculator.EARTH_RADIUS_KM
+    
+    @staticmethod
+    def is_in_urban_area(lat, lng):
+        """Check whether a point lies within URBAN_RADIUS_KM of URBAN_CENTER"""
+        center_lat, center_lng = DistanceCalculator.URBAN_CENTER
+        return (DistanceCalculator.calculate_distance_km_planar(center_lat, center_lng, lat, lng)
+                <= DistanceCalculator.URBAN_RADIUS_KM)
+    
+    @staticmethod
+    def measure_planar_error(n_samples=20000, seed=0):
+        """
+        Measure the worst relative error of the planar approximation vs Haversine
+        
+        Samples random point pairs inside the configured urban area.
+        
+        Returns:
+            Maximum relative error (e.g. 0.0002 for 0.02%)
+        """
+        rng = np.random.default_rng(seed)
+        center_lat, center_lng = DistanceCalculator.URBAN_CENTER
+        radius_deg = DistanceCalculator.URBAN_RADIUS_KM / (math.pi * DistanceCalculator.EARTH_RADIUS_KM / 180)
+        
+        def sample():
+            # Uniform points in the disk, widened in longitude for the latitude
+            r = radius_deg * np.sqrt(rng.uniform(0, 1, n_samples))
+            theta = rng.uniform(0, 2 * math.pi, n_samples)
+            lats = center_lat + r * np.sin(theta)
+            lngs = center_lng + r * np.cos(theta) / math.cos(math.radians(center_lat))
+            return lats, lngs
+        
+        lat1, lng1 = sample()
+        lat2, lng2 = sample()
+        
+        exact = DistanceCalculator.calculate_distance_km_batch(lat1, lng1, lat2, lng2)
+        approx = DistanceCalculator.calculate_distance_km_planar_batch(lat1, lng1, lat2, lng2)
+        
+        valid = exact > 0.001  # Ignore near-zero hops where relative error is meaningless
+        if not valid.any():
+            return 0.0
+        return float(np.max(np.abs(approx[valid] - exact[valid]) / exact[valid]))
+    
+    @staticmethod
+    def configure_urban_area(center_lat, center_lng, radius_km, error_budget=None):
+        """
+        Set the urban area for the planar fast path and check it against Haversine
+        
+        Args:
+            center_lat, center_lng: Center of the urban area
+            radius_km: Radius of the urban area
+            error_budget: Optional new maximum relative error
             
-            a = (math.sin(dlat/2)**2 + 
-                 math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlng/2)**2)
+        Returns:
+            Measured maximum relative error
             
-            distance_km = 2 * math.asin(math.sqrt(a)) * DistanceCalculator.EARTH_RADIUS_KM
-            return distance_km
+        Raises:
+            ValueError: If the planar approximation exceeds the error budget
+        """
+        previous = (DistanceCalculator.URBAN_CENTER, DistanceCalculator.URBAN_RADIUS_KM,
+                    DistanceCalculator.PLANAR_ERROR_BUDGET)
+        
+        DistanceCalculator.URBAN_CENTER = (center_lat, center_lng)
+        DistanceCalculator.URBAN_RADIUS_KM = radius_km
+        if error_budget is not None:
+            DistanceCalculator.PLANAR_ERROR_BUDGET = error_budget
+        
+        max_error = DistanceCalculator.measure_planar_error()
+        if max_error > DistanceCalculator.PLANAR_ERROR_BUDGET:
+            (DistanceCalculator.URBAN_CENTER, DistanceCalculator.URBAN_RADIUS_KM,
+             DistanceCalculator.PLANAR_ERROR_BUDGET) = previous
+            raise ValueError(f"Planar error {max_error:.4%} exceeds budget "
+                             f"{DistanceCalculator.PLANAR_ERROR_BUDGET:.4%} for a {radius_km} km urban area")
+        
+        DistanceCalculator._planar_enabled = True
+        DistanceCalculator._planar_max_error = max_error
+        return max_error
+    
+    @staticmethod
+    def urban_area_fingerprint() -> str:
+        """Identifies the planar region, so distances computed under another configuration can be told apart"""
+        center_lat, center_lng = DistanceCalculator.URBAN_CENTER
+        return (f"{center_lat!r},{center_lng!r},{DistanceCalculator.URBAN_RADIUS_KM!r},"
+                f"{DistanceCalculator._check_planar_mode()}")
+    
+    @staticmethod
+    def _check_planar_mode():
+        """Verify the default urban area once before the planar path is first used"""
+        if DistanceCalculator._planar_enabled is None:
+            max_error = DistanceCalculator.measure_planar_error()
+            DistanceCalculator._planar_max_error = max_error
+            DistanceCalculator._planar_enabled = max_error <= DistanceCalculator.PLANAR_ERROR_BUDGET
+            if not DistanceCalculator._planar_enabled:
+                print(f"Planar distance disabled: error {max_error:.4%} exceeds budget")
+        return DistanceCalculator._planar_enabled
+    
+    @staticmethod
+    def calculate_distance_km_auto(lat1, lng1, lat2, lng2):
+        """
+        Calculate distance, using the planar fast path inside the urban area
+        
+        Args:
+            lat1, lng1: Latitude and longitude of first point
+            lat2, lng2: Latitude and longitude of second point
             
+        Returns:
+            Tuple of (distance_km, mode) where mode is MODE_PLANAR or MODE_HAVERSINE
+        """
+        try:
+            if (DistanceCalculator._check_planar_mode()
+                    and DistanceCalculator.is_in_urban_area(lat1, lng1)
+                    and DistanceCalculator.is_in_urban_area(lat2, lng2)):
+                return (DistanceCalculator.calculate_distance_km_planar(lat1, lng1, lat2, lng2),
+                        DistanceCalculator.MODE_PLANAR)
         except Exception as e:
-            print(f"Error calculating distance: {e}")
-            return 0
+            print(f"Error calculating planar distance: {e}")
+        
+        return (DistanceCalculator.calculate_distance_km(lat1, lng1, lat2, lng2),
+                DistanceCalculator.MODE_HAVERSINE)
+    
+    @staticmethod
+    def calculate_distance_km_auto_batch(lat1, lng1, lat2, lng2):
+        """
+        Vectorized calculate_distance_km_auto for arrays of coordinate pairs
+        
+        Returns:
+            NumPy array of distances in kilometers, planar where both points
+            lie in the urban area and Haversine elsewhere
+        """
+        haversine = DistanceCalculator.calculate_distance_km_batch(lat1, lng1, lat2, lng2)
+        if not DistanceCalculator._check_planar_mode():
+            return haversine
+        
+        center_lat, center_lng = DistanceCalculator.URBAN_CENTER
+        urban = ((DistanceCalculator.calculate_distance_km_planar_batch(center_lat, center_lng, lat1, lng1)
+                  <= DistanceCalculator.URBAN_RADIUS_KM)
+                 & (DistanceCalculator.calculate_distance_km_planar_batch(center_lat, center_lng, lat2, lng2)
+                    <= DistanceCalculator.URBAN_RADIUS_KM))
+        return np.where(urban, DistanceCalculator.calculate_distance_km_planar_batch(lat1, lng1, lat2, lng2),
+                        haversine)
     
     @staticmethod
     def calculate_distance_miles(lat1, lng1, lat2, lng2):
@@ -64,6 +261,19 @@ class DistanceCalculator:
             Formatted distance string (e.g., "5.23 km (3.25 miles)")
         """
         distance_km = DistanceCalculator.calculate_distance_km(lat1, lng1, lat2, lng2)
+        return DistanceCalculator.format_distance_km(distance_km)
+    
+    @staticmethod
+    def format_distance_km(distance_km):
+        """
+        Format an already computed distance as a readable string
+        
+        Args:
+            distance_km: Distance in kilometers
+            
+        Returns:
+            Formatted distance string (e.g., "5.23 km (3.25 miles)")
+        """
         distance_miles = distance_km * DistanceCalculator.KM_TO_MILES
         return f"{distance_km:.2f} km ({distance_miles:.2f} miles)"
     
@@ -1,13 +1,18 @@
 import csv
 import random
 import os
+from datetime import datetime
 from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .eta_calculator import ETACalculator
+from .spatial_index import GridSpatialIndex
 
 class Driver:
     """Represents a driver with their vehicle information"""
     
     def __init__(self, vehicle_type: str, driver_name: str, vehicle_name: str, 
-                 contact_no: str, plate_no: str, status: str = "available"):
+                 contact_no: str, plate_no: str, status: str = "available",
+                 lat: Optional[float] = None, lng: Optional[float] = None):
         self.vehicle_type = vehicle_type
         self.driver_name = driver_name
         self.vehicle_name = vehicle_name
@@ -15,6 +20,8 @@ class Driver:
         self.plate_no = plate_no
         self.status = status.lower().strip()  # Store status from CSV
         self.is_available = self.status == "available"  # Set availability based on status
+        self.lat = lat  # Last known position, None if the driver has not reported one
+        self.lng = lng
     
     def __str__(self):
         return f"{self.driver_name} - {self.vehicle_name} ({self.plate_no}) - {self.status}"
@@ -28,7 +35,9 @@ class Driver:
             'contact_no': self.contact_no,
             'plate_no': self.plate_no,
             'status': self.status,
-            'is_available': self.is_available
+            'is_available': self.is_available,
+            'lat': self.lat,
+            'lng': self.lng
         }
     
     def set_status(self, status: str):
@@ -51,7 +60,12 @@ class Driver:
 class DriverManager:
     """Manages driver data and assignments"""
     
-    def __init__(self, csv_file: str = None):
+    # Straight-line nearest drivers ranked by ETA first for each driver requested; the
+    # search widens past them only when a faster driver further out could still be sooner
+    ETA_CANDIDATES_PER_DRIVER = 8
+    MIN_ETA_CANDIDATES = 16
+    
+    def __init__(self, csv_file: str = None, spatial_index=None):
         # Default to data/driver.csv if no file specified
         if csv_file is None:
             self.csv_file = os.path.join("data", "driver.csv")
@@ -61,6 +75,13 @@ class DriverManager:
         self.drivers_by_type: Dict[str, List[Driver]] = {}
         self.all_drivers: List[Driver] = []
         self.assigned_drivers: Dict[str, Driver] = {}  # Track assigned drivers by booking ID
+        self.drivers_by_plate: Dict[str, Driver] = {}
+        
+        # Live driver positions keyed by plate number
+        self.spatial_index = spatial_index if spatial_index is not None else GridSpatialIndex()
+        
+        # Optional SurgeEngine kept up to date with driver and booking events
+        self.surge_engine = None
         
         # Load drivers from CSV
         self.load_drivers()
@@ -81,17 +102,26 @@ class DriverManager:
                     # Get status from CSV, default to "available" if not present
                     status = row.get('status', 'available').strip()
                     
+                    # Optional last known position columns
+                    lat, lng = self._parse_position(row.get('lat'), row.get('lng'))
+                    
                     driver = Driver(
                         vehicle_type=row['Vehicle_Type'].strip(),
                         driver_name=row['driver_name'].strip(),
                         vehicle_name=row['vehicle_name'].strip(),
                         contact_no=row['contact_no'].strip(),
                         plate_no=row['plate_no'].strip(),
-                        status=status
+                        status=status,
+                        lat=lat,
+                        lng=lng
                     )
                     
                     # Add to all drivers list
                     self.all_drivers.append(driver)
+                    self.drivers_by_plate[driver.plate_no] = driver
+                    
+                    if driver.lat is not None:
+                        self.spatial_index.update(driver.plate_no, driver.lat, driver.lng)
                     
                     # Organize by vehicle type
                     if driver.vehicle_type not in self.drivers_by_type:
@@ -110,6 +140,28 @@ class DriverManager:
         except Exception as e:
             print(f"Error loading drivers: {e}")
     
+    def attach_surge_engine(self, surge_engine):
+        """Feed driver status/position changes and ride requests to a SurgeEngine"""
+        self.surge_engine = surge_engine
+        if surge_engine is not None:
+            for driver in self.all_drivers:
+                surge_engine.on_driver_change(driver)
+    
+    def _driver_changed(self, driver: Driver):
+        """Propagate a driver status or position change"""
+        if self.surge_engine is not None:
+            self.surge_engine.on_driver_change(driver)
+    
+    @staticmethod
+    def _parse_position(lat_value, lng_value) -> Tuple[Optional[float], Optional[float]]:
+        """Parse optional lat/lng CSV values, returning (None, None) if missing or invalid"""
+        try:
+            if lat_value and lng_value:
+                return float(lat_value), float(lng_value)
+        except ValueError:
+            pass
+        return None, None
+    
     def print_driver_summary(self):
         """Print summary of drivers by vehicle type and status"""
         print("\n--- Driver Summary ---")
@@ -156,9 +208,13 @@ class DriverManager:
     
         # Randomly select a driver
         selected_driver = random.choice(available_drivers)
+        return self._assign_driver(selected_driver, booking_id, auto_save)
     
+    def _assign_driver(self, selected_driver: Driver, booking_id: str = None, auto_save: bool = True) -> Driver:
+        """Mark a selected driver as assigned, track the booking and optionally save"""
         # Mark driver as assigned (not busy yet)
         selected_driver.assign()
+        self._driver_changed(selected_driver)
     
         # Track assignment if booking ID provided
         if booking_id:
@@ -175,14 +231,174 @@ class DriverManager:
         print(f"Assigned driver: {selected_driver}")
         return selected_driver
     
+    def update_driver_location(self, plate_no: str, lat: float, lng: float) -> bool:
+        """
+        Update a driver's live position in O(1)
+        
+        Args:
+            plate_no: Driver's plate number
+            lat, lng: New position
+            
+        Returns:
+            True if driver found and updated, False otherwise
+        """
+        driver = self.drivers_by_plate.get(plate_no)
+        if driver is None:
+            return False
+        
+        driver.lat, driver.lng = lat, lng
+        self.spatial_index.update(plate_no, lat, lng)
+        self._driver_changed(driver)
+        return True
+    
+    def get_nearest_available_drivers(self, vehicle_type: str, lat: float, lng: float, k: int = 1,
+                                      max_radius_km: Optional[float] = None) -> List[Tuple[Driver, float]]:
+        """
+        Get the k closest available drivers of a vehicle type
+        
+        Args:
+            vehicle_type: Vehicle type to match
+            lat, lng: Pickup coordinates
+            k: Number of drivers to return
+            max_radius_km: Optional search radius
+            
+        Returns:
+            List of (driver, distance_km) tuples sorted by distance
+        """
+        matches = self.spatial_index.nearest(lat, lng, k=k, predicate=self._is_available_driver(vehicle_type),
+                                             max_radius_km=max_radius_km)
+        return [(self.drivers_by_plate[plate_no], distance) for plate_no, distance in matches]
+    
+    def _is_available_driver(self, vehicle_type: Optional[str]):
+        """Spatial index predicate: plate of an available driver of a vehicle type (None for any type)"""
+        drivers_by_plate = self.drivers_by_plate
+        
+        def is_candidate(plate_no):
+            driver = drivers_by_plate.get(plate_no)
+            return (driver is not None and driver.is_available
+                    and (vehicle_type is None or driver.vehicle_type == vehicle_type))
+        return is_candidate
+    
+    def assign_nearest_driver(self, vehicle_type: str, lat: float, lng: float, booking_id: str = None,
+                              auto_save: bool = True) -> Optional[Driver]:
+        """
+        Assign the closest available driver to a pickup point
+        
+        Falls back to a random available driver when no driver of this type
+        has reported a position.
+        """
+        nearest = self.get_nearest_available_drivers(vehicle_type, lat, lng, k=1)
+        
+        if not nearest:
+            return self.assign_random_driver(vehicle_type, booking_id, auto_save)
+        
+        selected_driver, distance_km = nearest[0]
+        print(f"Nearest {vehicle_type} driver is {distance_km:.2f} km away")
+        return self._assign_driver(selected_driver, booking_id, auto_save)
+    
+    def rank_drivers_by_eta(self, vehicle_type: Optional[str], lat: float, lng: float, k: Optional[int] = None,
+                            current_time=None, max_radius_km: Optional[float] = None) -> List[Tuple[Driver, float, float]]:
+        """
+        Rank available drivers with a known position by arrival ETA to a pickup
+        
+        When k is given, the straight-line nearest candidates from the spatial
+        index (ETA_CANDIDATES_PER_DRIVER per requested driver, at least
+        MIN_ETA_CANDIDATES) are ranked first. ETAs are straight-line distance
+        over speed, so a driver further out than all of them can only beat the
+        k-th ETA if it is within that ETA at the fastest possible speed; the
+        search widens to that radius when it exceeds the candidates' own, and
+        otherwise the cost does not grow with the fleet.
+        
+        Args:
+            vehicle_type: Vehicle type to match, or None for every type
+            lat, lng: Pickup coordinates
+            k: Optional number of drivers to return
+            current_time: datetime object, defaults to current time
+            max_radius_km: Optional search radius
+            
+        Returns:
+            List of (driver, eta_minutes, distance_km) sorted by ETA
+        """
+        if k is not None and k <= 0:
+            return []
+        if current_time is None:
+            current_time = datetime.now()  # One departure time for the candidates and the speed bound
+        if k is None:
+            limit = len(self.spatial_index)
+        else:
+            limit = max(k * self.ETA_CANDIDATES_PER_DRIVER, self.MIN_ETA_CANDIDATES)
+        
+        is_candidate = self._is_available_driver(vehicle_type)
+        matches = self.spatial_index.nearest(lat, lng, k=limit, predicate=is_candidate, max_radius_km=max_radius_km)
+        candidates, etas = self._driver_etas(matches, vehicle_type, lat, lng, current_time)
+        if not candidates:
+            return []
+        
+        if k is not None and len(matches) == limit:
+            # Any driver past the farthest candidate needs at least its distance / top speed
+            kth_eta = float(np.partition(etas["eta_minutes"], k - 1)[k - 1])
+            top_speed = ETACalculator.max_vehicle_speed(
+                [vehicle_type] if vehicle_type is not None else None, current_time, lat, lng
+            )
+            reach_km = kth_eta / 60 * top_speed
+            if max_radius_km is not None:
+                reach_km = min(reach_km, max_radius_km)
+            if reach_km > matches[-1][1]:
+                matches = self.spatial_index.nearest(lat, lng, k=len(self.spatial_index), predicate=is_candidate,
+                                                     max_radius_km=reach_km)
+                candidates, etas = self._driver_etas(matches, vehicle_type, lat, lng, current_time)
+        eta_minutes = etas["eta_minutes"]
+        
+        if k is not None and k < len(candidates):
+            order = np.argpartition(eta_minutes, k - 1)[:k]
+            order = order[np.argsort(eta_minutes[order], kind="stable")]
+        else:
+            order = np.argsort(eta_minutes, kind="stable")
+        
+        distance_km = etas["distance_km"]
+        return [(candidates[i], float(eta_minutes[i]), float(distance_km[i])) for i in order.tolist()]
+    
+    def _driver_etas(self, matches, vehicle_type: Optional[str], lat: float, lng: float, current_time):
+        """Drivers of spatial index matches and their calculate_driver_etas arrays"""
+        candidates = [self.drivers_by_plate[plate_no] for plate_no, _ in matches]
+        if not candidates:
+            return candidates, None
+        etas = ETACalculator.calculate_driver_etas(
+            lat, lng,
+            np.fromiter((d.lat for d in candidates), dtype=np.float64, count=len(candidates)),
+            np.fromiter((d.lng for d in candidates), dtype=np.float64, count=len(candidates)),
+            vehicle_type if vehicle_type is not None else [d.vehicle_type for d in candidates],
+            current_time
+        )
+        return candidates, etas
+    
+    def assign_fastest_driver(self, vehicle_type: str, lat: float, lng: float, booking_id: str = None,
+                              auto_save: bool = True, current_time=None) -> Optional[Driver]:
+        """
+        Assign the available driver with the shortest arrival ETA to a pickup
+        
+        Falls back to a random available driver when no driver of this type
+        has reported a position.
+        """
+        ranked = self.rank_drivers_by_eta(vehicle_type, lat, lng, k=1, current_time=current_time)
+        
+        if not ranked:
+            return self.assign_random_driver(vehicle_type, booking_id, auto_save)
+        
+        selected_driver, eta_minutes, distance_km = ranked[0]
+        print(f"Fastest {vehicle_type} driver arrives in {eta_minutes:.1f} min ({distance_km:.2f} km away)")
+        return self._assign_driver(selected_driver, booking_id, auto_save)
+    
     def release_driver(self, booking_id: str = None, driver: Driver = None):
         
         if booking_id and booking_id in self.assigned_drivers:
             driver = self.assigned_drivers.pop(booking_id)
             driver.make_available()
+            self._driver_changed(driver)
             print(f"Released driver: {driver}")
         elif driver:
             driver.make_available()
+            self._driver_changed(driver)
             print(f"Released driver: {driver}")
 
     def release_driver_to_available(self, booking_id: str):
@@ -190,6 +406,7 @@ class DriverManager:
         if booking_id in self.assigned_drivers:
             driver = self.assigned_drivers.pop(booking_id)
             driver.make_available()
+            self._driver_changed(driver)
         
             # Save to CSV immediately
             try:
@@ -206,6 +423,7 @@ class DriverManager:
         if booking_id in self.assigned_drivers:
             driver = self.assigned_drivers[booking_id]
             driver.set_status("busy")
+            self._driver_changed(driver)
         
             # Save to CSV immediately
             try:
@@ -239,6 +457,7 @@ class DriverManager:
         """Reset all drivers to available status"""
         for driver in self.all_drivers:
             driver.make_available()
+            self._driver_changed(driver)
         self.assigned_drivers.clear()
         print("All drivers reset to available status")
     
@@ -270,14 +489,23 @@ class DriverManager:
         
         return info
 
-    def book_ride(self, vehicle_type: str, pickup_location: str, dropoff_location: str) -> Optional[Dict]:
+    def book_ride(self, vehicle_type: str, pickup_location: str, dropoff_location: str,
+                  pickup_coords: Optional[Tuple[float, float]] = None) -> Optional[Dict]:
         import uuid
     
         # Generate unique booking ID
         booking_id = str(uuid.uuid4())[:8]
-    
-        # Assign a driver (without auto-save)
-        assigned_driver = self.assign_random_driver(vehicle_type, booking_id, auto_save=False)
+        
+        # Every request counts as demand, whether or not a driver is found
+        if pickup_coords and self.surge_engine is not None:
+            self.surge_engine.record_request(pickup_coords[0], pickup_coords[1])
+    
+        # Assign a driver (without auto-save), shortest arrival ETA first when the pickup position is known
+        if pickup_coords:
+            assigned_driver = self.assign_fastest_driver(vehicle_type, pickup_coords[0], pickup_coords[1],
+                                                         booking_id, auto_save=False)
+        else:
+            assigned_driver = self.assign_random_driver(vehicle_type, booking_id, auto_save=False)
     
         if not assigned_driver:
             return None
@@ -309,6 +537,7 @@ class DriverManager:
             if driver.plate_no == plate_no:
                 old_status = driver.status
                 driver.set_status(new_status)
+                self._driver_changed(driver)
                 print(f"Updated driver {driver.driver_name} ({plate_no}) from '{old_status}' to '{new_status}'")
                 return True
         
@@ -331,18 +560,28 @@ class DriverManager:
             
             with open(output_file, 'w', newline='', encoding='utf-8') as file:
                 fieldnames = ['Vehicle_Type', 'driver_name', 'vehicle_name', 'contact_no', 'plate_no', 'status']
+                
+                # Only write position columns once some driver has reported a location
+                has_positions = any(driver.lat is not None for driver in self.all_drivers)
+                if has_positions:
+                    fieldnames += ['lat', 'lng']
+                
                 writer = csv.DictWriter(file, fieldnames=fieldnames)
                 
                 writer.writeheader()
                 for driver in self.all_drivers:
-                    writer.writerow({
+                    row = {
                         'Vehicle_Type': driver.vehicle_type,
                         'driver_name': driver.driver_name,
                         'vehicle_name': driver.vehicle_name,
                         'contact_no': driver.contact_no,
                         'plate_no': driver.plate_no,
                         'status': driver.status
-                    })
+                    }
+                    if has_positions:
+                        row['lat'] = '' if driver.lat is None else driver.lat
+                        row['lng'] = '' if driver.lng is None else driver.lng
+                    writer.writerow(row)
             
             print(f"Driver data saved to {output_file}")
             
@@ -0,0 +1,140 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Hashable, Optional, Tuple
+from .route_cache import METERS_PER_DEGREE
+
+_MISSING = object()
+
+
+class ETACache:
+    """
+    Short-lived cache of ETA computations
+
+    Entries are keyed by the grid cells of origin and destination, the
+    vehicle type and a time-of-day bucket, so a rider nudging a pin around
+    the same block gets the ETA computed a moment ago. Entries expire after
+    ttl_seconds; callers add the speed model version to the key and call
+    invalidate() when speeds change, so stale speeds are never served.
+    Safe to share between the UI and worker threads.
+    """
+
+    def __init__(self, ttl_seconds: float = 300, bucket_minutes: int = 5, cell_size_m: float = 150,
+                 max_entries: int = 5000, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            ttl_seconds: Lifetime of an entry
+            bucket_minutes: Width of the time-of-day buckets departures are grouped into
+            cell_size_m: Approximate size of the grid cells origins and destinations are snapped to
+            max_entries: Maximum number of entries before LRU eviction
+            clock: Monotonic time source in seconds
+        """
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be positive")
+        if not 0 < bucket_minutes <= 24 * 60:
+            raise ValueError("bucket_minutes must be between 1 and 1440")
+        if cell_size_m <= 0:
+            raise ValueError("cell_size_m must be positive")
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+
+        self.ttl_seconds = ttl_seconds
+        self.bucket_minutes = bucket_minutes
+        self.cell_size_m = cell_size_m
+        self._cell_deg = cell_size_m / METERS_PER_DEGREE
+        self.max_entries = max_entries
+        self.clock = clock
+
+        self._entries: "OrderedDict[Hashable, Tuple[float, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def time_bucket(self, when: Optional[datetime] = None) -> int:
+        """Time-of-day bucket of a departure time, defaults to now"""
+        if when is None:
+            when = datetime.now()
+        return (when.hour * 60 + when.minute) // self.bucket_minutes
+
+    def make_key(self, lat1, lng1, lat2, lng2, vehicle_type: str, when: Optional[datetime] = None, *extra) -> Tuple:
+        """Cache key for a trip, vehicle type and departure time plus any extra discriminators"""
+        cell_deg = self._cell_deg
+        return (math.floor(lat1 / cell_deg), math.floor(lng1 / cell_deg),
+                math.floor(lat2 / cell_deg), math.floor(lng2 / cell_deg),
+                vehicle_type, self.time_bucket(when)) + extra
+
+    def get(self, key, default=None):
+        """Look up a key, dropping it if it has expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if self.clock() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store a value for ttl_seconds, evicting the least recently used entries if full"""
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, lat1, lng1, lat2, lng2, vehicle_type: str, when: Optional[datetime],
+                       compute: Callable[[], object], *extra):
+        """
+        Return the cached ETA computation for a trip or compute and store it
+
+        Args:
+            lat1, lng1, lat2, lng2: Origin and destination
+            vehicle_type: Vehicle type the value is for
+            when: Departure time, defaults to now
+            compute: Zero-argument callable producing the value on a miss;
+                returning None stores nothing (e.g. for failed computations)
+            extra: Additional hashable key parts (e.g. speed model version)
+
+        Returns:
+            The cached or freshly computed value
+        """
+        key = self.make_key(lat1, lng1, lat2, lng2, vehicle_type, when, *extra)
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            if value is not None:
+                self.put(key, value)
+        return value
+
+    def invalidate(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'expirations': self.expirations,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
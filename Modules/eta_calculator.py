@@ -1,7 +1,75 @@
 import math
+import numpy as np
 from datetime import datetime, timedelta
+from typing import Optional
 from .distance_calculator import DistanceCalculator
 from .vehicle import Vehicle, VanBase, Car4Seater, Car6Seater, Minivan, Van, Motorcycle
+from .route_cache import shared_route_cache
+from .fare_calculation import FareCalculator
+from .result_view import ResultView
+from .speed_profile import time_slot
+
+
+class ETAResult(ResultView):
+    """
+    ETA of one vehicle for one trip
+
+    Only the raw numbers are stored; distance_formatted, eta_formatted,
+    arrival_time and distance_miles are derived when they are read.
+    """
+
+    __slots__ = ("distance_km", "eta_minutes", "departure_time", "vehicle_type",
+                 "vehicle_name", "vehicle_speed", "vehicle_capacity", "message")
+
+    _FIELDS = ("distance_km", "distance_miles", "distance_formatted", "eta_minutes", "eta_formatted",
+               "arrival_time", "departure_time", "vehicle_type", "vehicle_name", "vehicle_speed",
+               "vehicle_capacity")
+    _OPTIONAL_FIELDS = ("distance_formatted", "departure_time", "vehicle_capacity")
+
+    def __init__(self, distance_km: float, eta_minutes: float, departure_time: Optional[datetime],
+                 vehicle_type: str, vehicle_name: str, vehicle_speed: float,
+                 vehicle_capacity: Optional[int] = None, message: Optional[str] = None):
+        """
+        Args:
+            message: Set for invalid routes and errors; replaces eta_formatted
+                and leaves the result without a distance or arrival time
+        """
+        self.distance_km = distance_km
+        self.eta_minutes = eta_minutes
+        self.departure_time = departure_time
+        self.vehicle_type = vehicle_type
+        self.vehicle_name = vehicle_name
+        self.vehicle_speed = vehicle_speed
+        self.vehicle_capacity = vehicle_capacity
+        self.message = message
+
+    @classmethod
+    def failed(cls, message: str, vehicle_type: str, vehicle_name: str, vehicle_speed: float):
+        """Result for a trip that could not be estimated"""
+        return cls(0, 0, None, vehicle_type, vehicle_name, vehicle_speed, message=message)
+
+    @property
+    def distance_miles(self) -> float:
+        return self.distance_km * DistanceCalculator.KM_TO_MILES
+
+    @property
+    def distance_formatted(self) -> Optional[str]:
+        if self.message is not None:
+            return None
+        return DistanceCalculator.format_distance_km(self.distance_km)
+
+    @property
+    def eta_formatted(self) -> str:
+        if self.message is not None:
+            return self.message
+        return ETACalculator.format_eta_time(self.eta_minutes)
+
+    @property
+    def arrival_time(self) -> Optional[datetime]:
+        if self.message is not None or self.departure_time is None:
+            return None
+        return self.departure_time + timedelta(minutes=self.eta_minutes)
+
 
 class ETACalculator:
     """
@@ -9,6 +77,237 @@ class ETACalculator:
     Integrates with Vehicle class for vehicle-specific speed calculations
     """
     
+    # Optional RoadRouter; when set, ETAs use road distance instead of straight-line distance
+    router = None
+    
+    # Cache for node-to-node road searches, shared with FareCalculator by default
+    route_cache = shared_route_cache
+    
+    # Optional ZoneTable consulted before any live distance computation
+    zone_table = None
+    
+    # Optional SpeedProfile; when set, speeds depend on zone and time of day
+    speed_profile = None
+    
+    # Optional ETALearner; once trusted, its zone-pair factors scale the profile speeds
+    eta_learner = None
+    
+    # Optional ETACache reusing recent trip ETAs; cleared whenever the speed model changes
+    eta_cache = None
+    
+    @staticmethod
+    def set_router(router):
+        """Use a RoadRouter for trip distances (pass None to go back to straight-line)"""
+        ETACalculator.router = router
+        ETACalculator.invalidate_eta_cache()
+    
+    @staticmethod
+    def set_zone_table(zone_table):
+        """Use a precomputed ZoneTable for trips between zones (pass None to disable)"""
+        ETACalculator.zone_table = zone_table
+        ETACalculator.invalidate_eta_cache()
+    
+    @staticmethod
+    def set_speed_profile(speed_profile):
+        """Use a SpeedProfile for vehicle speeds (pass None to go back to Vehicle.AVERAGE_SPEED)"""
+        ETACalculator.speed_profile = speed_profile
+        ETACalculator.invalidate_eta_cache()
+    
+    @staticmethod
+    def set_eta_learner(eta_learner):
+        """Scale speeds by an ETALearner's zone-pair factors when it has enough data (pass None to disable)"""
+        ETACalculator.eta_learner = eta_learner
+        ETACalculator.invalidate_eta_cache()
+    
+    @staticmethod
+    def set_eta_cache(eta_cache):
+        """Reuse recent ETAs from an ETACache (pass None to always compute)"""
+        ETACalculator.eta_cache = eta_cache
+    
+    @staticmethod
+    def invalidate_eta_cache():
+        """Drop every cached ETA, e.g. after speeds were edited in place"""
+        if ETACalculator.eta_cache is not None:
+            ETACalculator.eta_cache.invalidate()
+    
+    @staticmethod
+    def _speed_model_version():
+        """Identifies the current speeds, so cached ETAs from older speeds are never reused"""
+        profile, learner = ETACalculator.speed_profile, ETACalculator.eta_learner
+        return (id(profile), getattr(profile, 'version', 0), id(learner), getattr(learner, 'version', 0))
+    
+    @staticmethod
+    def _cached(lat1, lng1, lat2, lng2, vehicle_type, current_time, compute):
+        """Run compute through the ETA cache when one is set"""
+        cache = ETACalculator.eta_cache
+        if cache is None:
+            return compute()
+        return cache.get_or_compute(lat1, lng1, lat2, lng2, vehicle_type, current_time, compute,
+                                    ETACalculator._speed_model_version())
+    
+    @staticmethod
+    def get_vehicle_speed(vehicle_type, lat, lng, current_time=None, dest_lat=None, dest_lng=None):
+        """
+        Speed in km/h for a vehicle type departing from a point
+        
+        Uses the speed profile for the point's zone and the departure's
+        15-minute slot, otherwise Vehicle.AVERAGE_SPEED, scaled by the
+        learned factor for the zone pair when a destination is given and the
+        learner has enough data.
+        """
+        profile = ETACalculator.speed_profile
+        if profile is not None:
+            speed = profile.speed(vehicle_type, lat, lng, current_time)
+        else:
+            speed = Vehicle.AVERAGE_SPEED.get(vehicle_type, 60)
+        
+        learner = ETACalculator.eta_learner
+        if learner is not None and dest_lat is not None:
+            speed *= learner.speed_factor(vehicle_type, lat, lng, dest_lat, dest_lng)
+        return speed
+    
+    @staticmethod
+    def get_trip_distance_km(lat1, lng1, lat2, lng2):
+        """
+        Get the trip distance used for ETAs
+        
+        Returns:
+            Zone table distance when the table answers for both points,
+            road distance when a router is set and finds a path, otherwise
+            the straight-line distance
+        """
+        return ETACalculator.get_trip_distance_and_speed_cap(lat1, lng1, lat2, lng2)[0]
+    
+    @staticmethod
+    def get_trip_distance_and_speed_cap(lat1, lng1, lat2, lng2):
+        """
+        Trip distance plus the fastest average speed the route allows
+        
+        Returns:
+            Tuple of (distance_km, speed_cap_kph). The cap comes from the
+            travel time of a zone table built on the road graph, and is
+            None when the trip was not answered by such a table.
+        """
+        zone_table = ETACalculator.zone_table
+        if zone_table is not None:
+            zone_trip = zone_table.lookup(lat1, lng1, lat2, lng2)
+            if zone_trip is not None:
+                distance_km, minutes = zone_trip
+                road_timed = zone_table.source == "road" and minutes > 0
+                return distance_km, distance_km / minutes * 60 if road_timed else None
+        
+        router = ETACalculator.router
+        if router is not None:
+            try:
+                road_km = router.route_distance_km(lat1, lng1, lat2, lng2, ETACalculator.route_cache)
+                if road_km is not None:
+                    return road_km, None
+            except Exception as e:
+                print(f"Error getting road distance: {e}")
+        
+        return DistanceCalculator.calculate_distance_km(lat1, lng1, lat2, lng2), None
+    
+    @staticmethod
+    def get_vehicle_speeds_batch(vehicle_types, lats, lngs, current_time=None, dest_lat=None, dest_lng=None):
+        """
+        Vectorized get_vehicle_speed for many departure points
+        
+        Args:
+            vehicle_types: One vehicle type (class or UI name) or an array with one per point
+            lats, lngs: Arrays of departure points
+            current_time: Departure time, defaults to now
+            dest_lat, dest_lng: Optional common destination for learned zone-pair factors
+            
+        Returns:
+            Array of speeds in km/h
+        """
+        lats = np.ravel(np.asarray(lats, dtype=np.float64))
+        lngs = np.ravel(np.asarray(lngs, dtype=np.float64))
+        types = np.broadcast_to(np.asarray(vehicle_types), lats.shape)
+        
+        # Resolve each distinct type once, then expand to every point
+        unique, inverse = np.unique(types, return_inverse=True)
+        class_names = [FareCalculator.VEHICLE_TYPE_MAPPING.get(t, t) for t in unique.tolist()]
+        speeds = np.array([Vehicle.AVERAGE_SPEED.get(c, 60) for c in class_names], dtype=np.float64)[inverse]
+        
+        profile = ETACalculator.speed_profile
+        if profile is not None and len(lats):
+            rows = np.array([profile.vehicle_index.get(c, -1) for c in class_names])[inverse]
+            known = rows >= 0
+            zones = profile.zone_rows.zones_batch(lats[known], lngs[known])
+            speeds[known] = profile.speeds[rows[known], zones, time_slot(current_time)]
+        
+        learner = ETACalculator.eta_learner
+        if learner is not None and dest_lat is not None and len(lats):
+            rows = np.array([learner.vehicle_index.get(c, -1) for c in class_names])[inverse]
+            known = np.flatnonzero(rows >= 0)
+            speeds[known] *= learner.factors_batch(rows[known], learner.zone_rows.zones_batch(lats[known], lngs[known]),
+                                                   learner.zone_rows.zone_of(dest_lat, dest_lng))
+        
+        return speeds
+    
+    @staticmethod
+    def max_vehicle_speed(vehicle_types=None, current_time=None, dest_lat=None, dest_lng=None) -> float:
+        """
+        Upper bound of get_vehicle_speeds_batch over every departure point
+        
+        Args:
+            vehicle_types: Vehicle types (class or UI names) to bound, or None for every type
+            current_time: Departure time, defaults to now
+            dest_lat, dest_lng: Optional common destination for learned zone-pair factors
+            
+        Returns:
+            Speed in km/h no driver of these types departing at current_time exceeds
+        """
+        if vehicle_types is None:
+            class_names = list(Vehicle.AVERAGE_SPEED)
+        else:
+            class_names = list({FareCalculator.VEHICLE_TYPE_MAPPING.get(t, t) for t in vehicle_types})
+        speeds = np.array([Vehicle.AVERAGE_SPEED.get(c, 60) for c in class_names], dtype=np.float64)
+        
+        profile = ETACalculator.speed_profile
+        if profile is not None:
+            rows = np.array([profile.vehicle_index.get(c, -1) for c in class_names])
+            known = rows >= 0
+            speeds[known] = profile.speeds[rows[known], :, time_slot(current_time)].max(axis=1)
+        
+        learner = ETACalculator.eta_learner
+        if learner is not None and dest_lat is not None:
+            rows = np.array([learner.vehicle_index.get(c, -1) for c in class_names])
+            known = rows >= 0
+            speeds[known] *= learner.max_factors_into(dest_lat, dest_lng)[rows[known]]
+        
+        return float(speeds.max())
+    
+    @staticmethod
+    def calculate_driver_etas(pickup_lat, pickup_lng, driver_lats, driver_lngs, vehicle_types, current_time=None):
+        """
+        Arrival ETA of every candidate driver to a pickup point
+        
+        Vectorized over driver positions and each driver's vehicle speed, so
+        a whole fleet is evaluated in a handful of array operations.
+        
+        Args:
+            pickup_lat, pickup_lng: Pickup coordinates
+            driver_lats, driver_lngs: Arrays of driver positions
+            vehicle_types: One vehicle type for all drivers or an array with one per driver
+            current_time: datetime object, defaults to current time
+            
+        Returns:
+            Dictionary of arrays: distance_km, speed_kph and eta_minutes per driver
+        """
+        distance_km = DistanceCalculator.calculate_distance_km_batch(
+            driver_lats, driver_lngs, pickup_lat, pickup_lng
+        )
+        speeds = ETACalculator.get_vehicle_speeds_batch(
+            vehicle_types, driver_lats, driver_lngs, current_time, pickup_lat, pickup_lng
+        )
+        return {
+            "distance_km": distance_km,
+            "speed_kph": speeds,
+            "eta_minutes": ETACalculator.calculate_eta_batch(distance_km, speeds),
+        }
+    
     @staticmethod
     def calculate_eta_for_vehicle(lat1, lng1, lat2, lng2, vehicle, current_time=None):
         """
@@ -21,71 +320,140 @@ class ETACalculator:
             current_time: datetime object, defaults to current time
             
         Returns:
-            Dictionary with comprehensive ETA information
+            ETAResult, readable like the former result dictionary
         """
         try:
-            # Calculate distance using DistanceCalculator
-            distance_km = DistanceCalculator.calculate_distance_km(lat1, lng1, lat2, lng2)
-            distance_miles = DistanceCalculator.calculate_distance_miles(lat1, lng1, lat2, lng2)
-            
-            if distance_km <= 0 or vehicle.average_speed <= 0:
-                return {
-                    "distance_km": 0,
-                    "distance_miles": 0,
-                    "eta_minutes": 0,
-                    "eta_formatted": "Invalid route",
-                    "arrival_time": None,
-                    "vehicle_type": vehicle.vehicle_type,
-                    "vehicle_name": vehicle.vehicle_name,
-                    "vehicle_speed": vehicle.average_speed
-                }
-            
-            # Calculate ETA using vehicle's average speed
-            time_hours = distance_km / vehicle.average_speed
-            eta_minutes = time_hours * 60
-            
             # Set current time
             if current_time is None:
                 current_time = datetime.now()
             
-            # Calculate arrival time
-            arrival_time = current_time + timedelta(minutes=eta_minutes)
+            def compute():
+                # Distance from the road network if available
+                distance_km, speed_cap = ETACalculator.get_trip_distance_and_speed_cap(lat1, lng1, lat2, lng2)
+                
+                # Time-of-day speed, scaled by the learned zone-pair factor, when available
+                if ETACalculator.speed_profile is not None or ETACalculator.eta_learner is not None:
+                    speed = ETACalculator.get_vehicle_speed(vehicle.vehicle_type, lat1, lng1, current_time, lat2, lng2)
+                else:
+                    speed = vehicle.average_speed
+                
+                # No vehicle beats the zone table's road travel time
+                if speed_cap is not None:
+                    speed = min(speed, speed_cap)
+                return distance_km, speed
             
-            # Prepare comprehensive result
-            result = {
-                "distance_km": distance_km,
-                "distance_miles": distance_miles,
-                "distance_formatted": DistanceCalculator.format_distance(lat1, lng1, lat2, lng2),
-                "eta_minutes": eta_minutes,
-                "eta_formatted": ETACalculator.format_eta_time(eta_minutes),
-                "arrival_time": arrival_time,
-                "departure_time": current_time,
-                "vehicle_type": vehicle.vehicle_type,
-                "vehicle_name": vehicle.vehicle_name,
-                "vehicle_speed": vehicle.average_speed,
-                "vehicle_capacity": vehicle.capacity
-            }
+            distance_km, speed = ETACalculator._cached(lat1, lng1, lat2, lng2, vehicle.vehicle_type,
+                                                       current_time, compute)
             
-            return result
+            if distance_km <= 0 or speed <= 0:
+                return ETAResult.failed("Invalid route", vehicle.vehicle_type, vehicle.vehicle_name, speed)
+            
+            # Calculate ETA using the vehicle's speed; formatting happens on access
+            eta_minutes = distance_km / speed * 60
+            
+            return ETAResult(distance_km, eta_minutes, current_time, vehicle.vehicle_type,
+                             vehicle.vehicle_name, speed, vehicle.capacity)
             
         except Exception as e:
             print(f"Error calculating ETA for vehicle: {e}")
-            return {
-                "distance_km": 0,
-                "distance_miles": 0,
-                "eta_minutes": 0,
-                "eta_formatted": "Error calculating ETA",
-                "arrival_time": None,
-                "vehicle_type": getattr(vehicle, 'vehicle_type', 'Unknown'),
-                "vehicle_name": getattr(vehicle, 'vehicle_name', 'Unknown'),
-                "vehicle_speed": getattr(vehicle, 'average_speed', 0)
+            return ETAResult.failed("Error calculating ETA", getattr(vehicle, 'vehicle_type', 'Unknown'),
+                                    getattr(vehicle, 'vehicle_name', 'Unknown'),
+                                    getattr(vehicle, 'average_speed', 0))
+    
+    @staticmethod
+    def calculate_eta_batch(distance_km, speeds_kph):
+        """
+        Vectorized travel time for one or more distances and speeds
+        
+        Args:
+            distance_km: Distance or array of distances in kilometers
+            speeds_kph: Speed or array of speeds in km/h (broadcast against distance_km)
+            
+        Returns:
+            NumPy array of ETAs in minutes, 0 where the distance or speed is not positive
+        """
+        distance_km = np.asarray(distance_km, dtype=np.float64)
+        speeds_kph = np.asarray(speeds_kph, dtype=np.float64)
+        valid = (distance_km > 0) & (speeds_kph > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(valid, distance_km / speeds_kph * 60, 0.0)
+    
+    @staticmethod
+    def _all_vehicle_speeds(lat1, lng1, lat2, lng2, current_time):
+        """Vehicle types and their speeds for a trip, from the profile and learner when set"""
+        profile = ETACalculator.speed_profile
+        if profile is not None:
+            vehicle_types = list(profile.vehicle_types)
+            speeds = profile.speeds_for_all(lat1, lng1, current_time).astype(np.float64)
+        else:
+            vehicle_types = list(Vehicle.AVERAGE_SPEED)
+            speeds = np.array([Vehicle.AVERAGE_SPEED[t] for t in vehicle_types], dtype=np.float64)
+        
+        learner = ETACalculator.eta_learner
+        if learner is not None:
+            factors = learner.factors_for_all(lat1, lng1, lat2, lng2)
+            columns = [learner.vehicle_index.get(t, -1) for t in vehicle_types]
+            for i, column in enumerate(columns):
+                if column >= 0:
+                    speeds[i] *= factors[column]
+        
+        return vehicle_types, speeds
+    
+    @staticmethod
+    def _all_vehicle_trip(lat1, lng1, lat2, lng2, current_time):
+        """Vehicle types, their speeds (read-only, as it may be cached) and the trip distance"""
+        vehicle_types, speeds = ETACalculator._all_vehicle_speeds(lat1, lng1, lat2, lng2, current_time)
+        distance_km, speed_cap = ETACalculator.get_trip_distance_and_speed_cap(lat1, lng1, lat2, lng2)
+        if speed_cap is not None:
+            speeds = np.minimum(speeds, speed_cap)
+        speeds.setflags(write=False)
+        return vehicle_types, speeds, distance_km
+    
+    @staticmethod
+    def _eta_all_vehicles(lat1, lng1, lat2, lng2, current_time=None):
+        """
+        Shared batch path: one distance lookup, one array of speeds
+        
+        Returns:
+            Tuple of (vehicle types, ETA minutes array, results dictionary)
+        """
+        if current_time is None:
+            current_time = datetime.now()
+        
+        try:
+            vehicle_types, speeds, distance_km = ETACalculator._cached(
+                lat1, lng1, lat2, lng2, "*", current_time,
+                lambda: ETACalculator._all_vehicle_trip(lat1, lng1, lat2, lng2, current_time)
+            )
+        except Exception as e:
+            print(f"Error calculating ETA for all vehicles: {e}")
+            vehicle_types, speeds = ETACalculator._all_vehicle_speeds(lat1, lng1, lat2, lng2, current_time)
+            results = {
+                vehicle_type: ETAResult.failed("Error calculating ETA", vehicle_type, vehicle_type, speed)
+                for vehicle_type, speed in zip(vehicle_types, speeds.tolist())
             }
+            return vehicle_types, np.zeros(len(vehicle_types)), results
+        
+        eta_minutes = ETACalculator.calculate_eta_batch(distance_km, speeds)
+        
+        results = {}
+        for vehicle_type, speed, minutes in zip(vehicle_types, speeds.tolist(), eta_minutes.tolist()):
+            if distance_km <= 0 or speed <= 0:
+                results[vehicle_type] = ETAResult.failed("Invalid route", vehicle_type, vehicle_type, speed)
+            else:
+                results[vehicle_type] = ETAResult(distance_km, minutes, current_time, vehicle_type, vehicle_type,
+                                                  speed, Vehicle.CAPACITY.get(vehicle_type))
+        
+        return vehicle_types, eta_minutes, results
     
     @staticmethod
     def calculate_eta_for_all_vehicles(lat1, lng1, lat2, lng2, current_time=None):
         """
         Calculate ETA for all available vehicle types
         
+        The trip distance is looked up once and every vehicle's ETA is derived
+        from an array of speeds (from the speed profile when one is set).
+        
         Args:
             lat1, lng1: Latitude and longitude of starting point
             lat2, lng2: Latitude and longitude of destination
@@ -94,24 +462,7 @@ class ETACalculator:
         Returns:
             Dictionary with ETA information for each vehicle type
         """
-        # Create instances of all vehicle types
-        vehicles = [
-            Car4Seater("Car4Seater"),
-            Car6Seater("Car6Seater"), 
-            Minivan("Minivan"),
-            Van("Van"),
-            Motorcycle("Motorcycle")
-        ]
-        
-        results = {}
-        
-        for vehicle in vehicles:
-            eta_info = ETACalculator.calculate_eta_for_vehicle(
-                lat1, lng1, lat2, lng2, vehicle, current_time
-            )
-            results[vehicle.vehicle_type] = eta_info
-        
-        return results
+        return ETACalculator._eta_all_vehicles(lat1, lng1, lat2, lng2, current_time)[2]
     
     @staticmethod
     def get_fastest_vehicle_option(lat1, lng1, lat2, lng2, current_time=None):
@@ -126,19 +477,18 @@ class ETACalculator:
         Returns:
             Dictionary with information about the fastest vehicle option
         """
-        all_etas = ETACalculator.calculate_eta_for_all_vehicles(
+        vehicle_types, eta_minutes, all_etas = ETACalculator._eta_all_vehicles(
             lat1, lng1, lat2, lng2, current_time
         )
         
         if not all_etas:
             return None
         
-        # Find the vehicle with minimum ETA
-        fastest_vehicle = min(all_etas.items(), key=lambda x: x[1]["eta_minutes"])
+        fastest_type = vehicle_types[int(np.argmin(eta_minutes))]
         
         return {
-            "fastest_vehicle_type": fastest_vehicle[0],
-            "fastest_eta_info": fastest_vehicle[1],
+            "fastest_vehicle_type": fastest_type,
+            "fastest_eta_info": all_etas[fastest_type],
             "all_options": all_etas
         }
     
@@ -193,6 +543,9 @@ class ETACalculator:
         if eta_info["eta_minutes"] == 0:
             return eta_info
         
+        # The display text is added on top of the fields, so work on a plain dictionary
+        eta_info = eta_info.to_dict()
+        
         # Create formatted display text
         display_parts = []
         
@@ -277,10 +630,11 @@ def compare_vehicle_etas(lat1, lng1, lat2, lng2):
     Returns:
         Dictionary with comparison data and sorted list of vehicles by ETA
     """
-    all_etas = ETACalculator.calculate_eta_for_all_vehicles(lat1, lng1, lat2, lng2)
+    vehicle_types, eta_minutes, all_etas = ETACalculator._eta_all_vehicles(lat1, lng1, lat2, lng2)
     
     # Sort by ETA time
-    sorted_vehicles = sorted(all_etas.items(), key=lambda x: x[1]["eta_minutes"])
+    sorted_vehicles = [(vehicle_types[i], all_etas[vehicle_types[i]])
+                       for i in np.argsort(eta_minutes, kind="stable")]
     
     return {
         "all_etas": all_etas,
@@ -0,0 +1,184 @@
+import csv
+import os
+import numpy as np
+from datetime import datetime
+from typing import Dict, Optional
+from .fare_calculation import FareCalculator
+from .vehicle import Vehicle
+from .zone_table import DEFAULT_ZONES_FILE, ZoneIndex, shared_zone_index
+
+# Observed speeds outside this range (km/h) are treated as bad data
+MIN_SPEED_KPH = 1.0
+MAX_SPEED_KPH = 120.0
+
+
+class ETALearner:
+    """
+    Online per-zone-pair speed corrections learned from completed trips
+
+    Keeps an exponentially weighted moving average, for every (vehicle type,
+    pickup zone, dropoff zone) cell of a small array, of how much faster or
+    slower trips ran than the baseline speed (the speed profile for the
+    pickup zone and departure slot, or Vehicle.AVERAGE_SPEED). The learned
+    factor scales the baseline, so the time-of-day shape of the profile is
+    kept. The extra zone row/column covers points outside every zone. Each
+    completed trip updates one cell in O(1), so estimates track reality
+    without retraining over the whole booking history.
+
+    Only trips with a real departure timestamp and measured duration
+    (Started_at and Duration_min in the booking history) are learned from.
+    """
+
+    def __init__(self, zones, alpha: float = 0.2, min_samples: int = 3, speed_profile=None):
+        """
+        Args:
+            zones: ZoneIndex, e.g. from shared_zone_index, or zone definitions from load_zones
+            alpha: EWMA weight of the newest observation (0-1]
+            min_samples: Observations needed before an estimate is used
+            speed_profile: Optional SpeedProfile giving the baseline speeds;
+                must be the one ETACalculator uses
+        """
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self.speed_profile = speed_profile
+        self.vehicle_types = list(Vehicle.AVERAGE_SPEED)
+        self.vehicle_index: Dict[str, int] = {v: i for i, v in enumerate(self.vehicle_types)}
+        self.zone_rows = ZoneIndex.of(zones)
+
+        shape = (len(self.vehicle_types), len(self.zone_rows) + 1, len(self.zone_rows) + 1)
+        self.factors = np.ones(shape, dtype=np.float64)
+        self.counts = np.zeros(shape, dtype=np.int64)
+
+        # Bumped on every accepted observation so cached ETAs are not reused
+        self.version = 0
+
+    @classmethod
+    def from_zones_file(cls, zones_file: str = DEFAULT_ZONES_FILE, **kwargs):
+        """Build a learner over the zones of a zone definition file"""
+        return cls(shared_zone_index(zones_file), **kwargs)
+
+    @classmethod
+    def load_if_exists(cls, zones_file: str = DEFAULT_ZONES_FILE, **kwargs):
+        """Build a learner, or return None if the zones file is missing or invalid"""
+        if not os.path.exists(zones_file):
+            return None
+        try:
+            return cls.from_zones_file(zones_file, **kwargs)
+        except Exception as e:
+            print(f"Error creating ETA learner: {e}")
+            return None
+
+    def _vehicle(self, vehicle_type: str) -> Optional[int]:
+        """Vehicle index for a class name or UI name"""
+        return self.vehicle_index.get(FareCalculator.VEHICLE_TYPE_MAPPING.get(vehicle_type, vehicle_type))
+
+    def baseline_speed(self, vehicle_type: str, lat: float, lng: float, when: Optional[datetime]) -> float:
+        """Speed in km/h the learned factors are relative to"""
+        class_name = FareCalculator.VEHICLE_TYPE_MAPPING.get(vehicle_type, vehicle_type)
+        if self.speed_profile is not None:
+            return self.speed_profile.speed(class_name, lat, lng, when)
+        return Vehicle.AVERAGE_SPEED.get(class_name, 60)
+
+    def observe(self, vehicle_type: str, lat1, lng1, lat2, lng2,
+                distance_km: float, duration_minutes: float, started_at: datetime) -> bool:
+        """
+        Fold one completed trip into the estimates
+
+        Args:
+            started_at: When the trip actually started, for the baseline speed
+
+        Returns:
+            True if the trip was used, False if it was rejected as invalid
+        """
+        vehicle = self._vehicle(vehicle_type)
+        if vehicle is None or duration_minutes <= 0 or distance_km <= 0:
+            return False
+        speed = distance_km / duration_minutes * 60
+        baseline = self.baseline_speed(vehicle_type, lat1, lng1, started_at)
+        if not MIN_SPEED_KPH <= speed <= MAX_SPEED_KPH or baseline <= 0:
+            return False
+
+        factor = speed / baseline
+        cell = (vehicle, self.zone_rows.zone_of(lat1, lng1), self.zone_rows.zone_of(lat2, lng2))
+        if self.counts[cell] == 0:
+            self.factors[cell] = factor
+        else:
+            self.factors[cell] += self.alpha * (factor - self.factors[cell])
+        self.counts[cell] += 1
+        self.version += 1
+        return True
+
+    def observe_record(self, record: Dict) -> bool:
+        """
+        Fold a Book_history.csv record into the estimates
+
+        Records without coordinates, distance, start time or duration are skipped.
+        """
+        try:
+            distance_km = float(str(record.get('Distance', '')).split(' km')[0])
+            return self.observe(
+                record.get('Vehicle_Type', ''),
+                float(record['Pickup_lat']), float(record['Pickup_lng']),
+                float(record['Dropoff_lat']), float(record['Dropoff_lng']),
+                distance_km, float(record['Duration_min']),
+                datetime.fromisoformat(record['Started_at'])
+            )
+        except (KeyError, TypeError, ValueError):
+            return False
+
+    def on_status_change(self, record: Dict, new_status: str):
+        """BookingHistory status listener: learn from trips as they complete"""
+        if new_status.lower() == "completed":
+            self.observe_record(record)
+
+    def replay(self, csv_file: str = "Book_history.csv") -> int:
+        """
+        Warm the estimates from an existing history file
+
+        Rows are streamed one at a time, so the file is never held in memory.
+
+        Returns:
+            Number of completed trips used
+        """
+        used = 0
+        with open(csv_file, 'r', newline='', encoding='utf-8') as file:
+            for record in csv.DictReader(file):
+                if record.get('Status', '').lower() == "completed" and self.observe_record(record):
+                    used += 1
+        return used
+
+    def speed_factor(self, vehicle_type: str, lat1, lng1, lat2, lng2) -> float:
+        """Learned multiplier of the baseline speed for a trip, 1.0 if there is not enough data"""
+        vehicle = self._vehicle(vehicle_type)
+        if vehicle is None:
+            return 1.0
+        cell = (vehicle, self.zone_rows.zone_of(lat1, lng1), self.zone_rows.zone_of(lat2, lng2))
+        if self.counts[cell] < self.min_samples:
+            return 1.0
+        return float(self.factors[cell])
+
+    def factors_for_all(self, lat1, lng1, lat2, lng2) -> np.ndarray:
+        """Learned factors of every vehicle type (self.vehicle_types order), 1.0 where unknown"""
+        origin, destination = self.zone_rows.zone_of(lat1, lng1), self.zone_rows.zone_of(lat2, lng2)
+        factors = self.factors[:, origin, destination]
+        return np.where(self.counts[:, origin, destination] >= self.min_samples, factors, 1.0)
+
+    def max_factors_into(self, lat, lng) -> np.ndarray:
+        """Largest learned factor of every vehicle type over trips from any zone to a point"""
+        destination = self.zone_rows.zone_of(lat, lng)
+        known = self.counts[:, :, destination] >= self.min_samples
+        return np.where(known, self.factors[:, :, destination], 1.0).max(axis=1)
+
+    def factors_batch(self, vehicle_indices, origin_zones, destination_zones) -> np.ndarray:
+        """
+        Vectorized learned factors, 1.0 where there is not enough data
+
+        Args:
+            vehicle_indices: Array of indices into self.vehicle_types
+            origin_zones, destination_zones: Arrays of zone rows (see ZoneIndex)
+        """
+        cells = (np.asarray(vehicle_indices), np.asarray(origin_zones), np.asarray(destination_zones))
+        return np.where(self.counts[cells] >= self.min_samples, self.factors[cells], 1.0)
@@ -1,5 +1,133 @@
+import hashlib
+import numpy as np
+from datetime import datetime
+from typing import Dict, Optional
+from . import money
 from .distance_calculator import DistanceCalculator
 from .vehicle import Vehicle, Car4Seater, Car6Seater, Minivan, Van, Motorcycle
+from .result_view import ResultView
+from .route_cache import shared_route_cache
+from .tariff import shared_tariff_store
+
+
+class FareResult(ResultView):
+    """
+    Fare of one vehicle type for one trip
+
+    Stores the trip distance, the tariff and the surge multiplier it was
+    priced with; the cost breakdown and formatted distance are derived when
+    read. Money is computed in integer centavos (see Modules.money): the
+    distance cost, surged subtotal and tax are each rounded once, half up,
+    and the total is their exact sum less any promotion discount. The
+    surge multiplier scales the subtotal (base fare plus distance cost)
+    before tax; promotions (see Modules.promotions) come off the taxed fare.
+    """
+
+    __slots__ = ("trip_km", "base_fare", "cost_per_km", "tax_rate", "vehicle_type", "distance_mode", "error",
+                 "surge_multiplier", "tariff_version", "discount_centavos", "promo_id")
+
+    _FIELDS = ("distance_km", "distance_miles", "base_fare", "cost_per_km", "distance_cost", "surge_multiplier",
+               "subtotal", "tax_rate", "tax_amount", "discount", "total_fare", "vehicle_type", "formatted_distance",
+               "distance_mode", "tariff_version", "total_fare_centavos", "promo_id", "error")
+    _OPTIONAL_FIELDS = ("promo_id", "error")
+
+    def __init__(self, trip_km: float, base_fare: float, cost_per_km: float, tax_rate: float,
+                 vehicle_type: str, distance_mode: Optional[str], error: Optional[str] = None,
+                 surge_multiplier: float = 1.0, tariff_version: Optional[int] = None,
+                 discount_centavos: int = 0, promo_id: Optional[str] = None):
+        """
+        Args:
+            trip_km: Unrounded trip distance in kilometers
+            base_fare, cost_per_km, tax_rate: Tariff of the vehicle type
+            vehicle_type: Vehicle type name from UI (e.g., "Car(4 Seater)")
+            distance_mode: How the distance was obtained (see FareCalculator.get_trip_distance)
+            error: Error message when the fare could not be calculated
+            surge_multiplier: Demand surge factor applied to the subtotal
+            tariff_version: Version of the Tariff the fare was priced with
+            discount_centavos: Promotion discount taken off the taxed fare
+            promo_id: Promotion the discount comes from
+        """
+        self.trip_km = trip_km
+        self.base_fare = base_fare
+        self.cost_per_km = cost_per_km
+        self.tax_rate = tax_rate
+        self.vehicle_type = vehicle_type
+        self.distance_mode = distance_mode
+        self.error = error
+        self.surge_multiplier = surge_multiplier
+        self.tariff_version = tariff_version
+        self.discount_centavos = discount_centavos
+        self.promo_id = promo_id
+
+    @classmethod
+    def failed(cls, vehicle_type: str, error: str):
+        """Zero fare for a trip that could not be priced"""
+        return cls(0, 0, 0, 0, vehicle_type, None, error)
+
+    def with_promotion(self, discount_centavos: int, promo_id: Optional[str]):
+        """Copy of this fare with a promotion discount (results may be cached, so never modified)"""
+        return FareResult(self.trip_km, self.base_fare, self.cost_per_km, self.tax_rate, self.vehicle_type,
+                          self.distance_mode, self.error, self.surge_multiplier, self.tariff_version,
+                          discount_centavos, promo_id)
+
+    @property
+    def distance_km(self) -> float:
+        return round(self.trip_km, 2)
+
+    @property
+    def distance_miles(self) -> float:
+        return round(self.trip_km * DistanceCalculator.KM_TO_MILES, 2)
+
+    @property
+    def distance_cost_centavos(self) -> int:
+        return money.round_half_up(self.trip_km * money.to_centavos(self.cost_per_km))
+
+    @property
+    def subtotal_centavos(self) -> int:
+        unsurged = money.to_centavos(self.base_fare) + self.distance_cost_centavos
+        return money.div_round_half_up(unsurged * money.to_surge_hundredths(self.surge_multiplier),
+                                       money.SURGE_SCALE)
+
+    @property
+    def tax_amount_centavos(self) -> int:
+        return money.div_round_half_up(self.subtotal_centavos * money.to_basis_points(self.tax_rate),
+                                       money.BASIS_POINTS)
+
+    @property
+    def gross_fare_centavos(self) -> int:
+        """Taxed fare before any promotion discount"""
+        subtotal = self.subtotal_centavos
+        return subtotal + money.div_round_half_up(subtotal * money.to_basis_points(self.tax_rate),
+                                                  money.BASIS_POINTS)
+
+    @property
+    def total_fare_centavos(self) -> int:
+        return self.gross_fare_centavos - self.discount_centavos
+
+    @property
+    def distance_cost(self) -> float:
+        return money.to_pesos(self.distance_cost_centavos)
+
+    @property
+    def subtotal(self) -> float:
+        return money.to_pesos(self.subtotal_centavos)
+
+    @property
+    def tax_amount(self) -> float:
+        return money.to_pesos(self.tax_amount_centavos)
+
+    @property
+    def discount(self) -> float:
+        return money.to_pesos(self.discount_centavos)
+
+    @property
+    def total_fare(self) -> float:
+        return money.to_pesos(self.total_fare_centavos)
+
+    @property
+    def formatted_distance(self) -> str:
+        return DistanceCalculator.format_distance_km(self.trip_km)
+
 
 class FareCalculator:
     """Handles fare calculation based on distance and vehicle type"""
@@ -13,24 +141,92 @@ class FareCalculator:
         "Motorcycle": "Motorcycle"
     }
     
-    def __init__(self):
+    def __init__(self, router=None, route_cache=None, zone_table=None, surge_engine=None, tariff_store=None,
+                 promotions=None):
+        """
+        Args:
+            router: Optional RoadRouter; when set, fares use road distance instead of straight-line distance
+            route_cache: RouteCache for trip distances, defaults to the shared process-wide cache
+            zone_table: Optional ZoneTable consulted before any live distance computation
+            surge_engine: Optional SurgeEngine whose pickup multiplier is applied to every fare
+            tariff_store: TariffStore with the active prices, defaults to the shared process-wide store
+            promotions: Optional PromotionTable evaluated on every quote after pricing
+        """
         self.distance_calculator = DistanceCalculator()
+        self.router = router
+        self.zone_table = zone_table
+        self.surge_engine = surge_engine
+        self.tariff_store = tariff_store if tariff_store is not None else shared_tariff_store
+        self.promotions = promotions
+        self.route_cache = route_cache if route_cache is not None else shared_route_cache
+    
+    def get_trip_distance(self, pickup_lat, pickup_lng, dropoff_lat, dropoff_lng):
+        """
+        Get the distance a trip is priced on
         
-    def calculate_fare(self, pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, vehicle_type_name):
+        Returns:
+            Tuple of (distance_km, distance_mode), where distance_mode is
+            "zone_table" or "road" when those answered, otherwise the
+            straight-line mode used
         """
-        Calculate total fare including base fare, distance cost, and tax
+        if self.zone_table is not None:
+            zone_trip = self.zone_table.lookup(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng)
+            if zone_trip is not None:
+                return zone_trip[0], "zone_table"
+        
+        if self.router is not None:
+            try:
+                # Only the node-to-node road search is cached; see RoadRouter.route_distance_km
+                road_km = self.router.route_distance_km(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng,
+                                                        self.route_cache)
+                if road_km is not None:
+                    return road_km, "road"
+            except Exception as e:
+                print(f"Error getting road distance: {e}")
+        
+        # Cheap enough to compute exactly every time, so a price never depends on cache history
+        return self.distance_calculator.calculate_distance_km_auto(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng)
+    
+    def distance_fingerprint(self) -> str:
+        """
+        Identifies what get_trip_distance answers with: the zone table, the
+        road graph and the planar urban area
+        """
+        parts = (
+            self.zone_table.fingerprint if self.zone_table is not None else "-",
+            self.router.fingerprint if self.router is not None else "-",
+            DistanceCalculator.urban_area_fingerprint(),
+        )
+        return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+    
+    def get_surge_multiplier(self, pickup_lat, pickup_lng) -> float:
+        """Surge multiplier for a pickup point, 1.0 without a surge engine"""
+        if self.surge_engine is None:
+            return 1.0
+        try:
+            return self.surge_engine.multiplier(pickup_lat, pickup_lng)
+        except Exception as e:
+            print(f"Error getting surge multiplier: {e}")
+            return 1.0
+        
+    def calculate_fare(self, pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, vehicle_type_name,
+                       when: Optional[datetime] = None, first_ride: bool = False):
+        """
+        Calculate total fare including base fare, distance cost, tax and promotions
         
         Args:
             pickup_lat, pickup_lng: Pickup location coordinates
             dropoff_lat, dropoff_lng: Dropoff location coordinates  
             vehicle_type_name: Vehicle type name from UI (e.g., "Car(4 Seater)")
+            when: Time of the quote for time-window promotions, defaults to now
+            first_ride: Whether first-ride promotions apply
             
         Returns:
-            Dictionary containing fare breakdown and total
+            FareResult with the fare breakdown and total, readable like a dictionary
         """
         try:
-            # Calculate distance in kilometers
-            distance_km = self.distance_calculator.calculate_distance_km(
+            # Calculate distance in kilometers (road network if available)
+            distance_km, distance_mode = self.get_trip_distance(
                 pickup_lat, pickup_lng, dropoff_lat, dropoff_lng
             )
             
@@ -39,49 +235,20 @@ class FareCalculator:
             if not vehicle_class_name:
                 raise ValueError(f"Unknown vehicle type: {vehicle_type_name}")
             
-            # Get pricing information from Vehicle class
-            base_fare = Vehicle.BASE_FARES.get(vehicle_class_name, 0)
-            cost_per_km = Vehicle.COST_PER_KM.get(vehicle_class_name, 0)
-            tax_rate = Vehicle.TAX_RATES.get(vehicle_class_name, 0.03)
+            # Get pricing information from one snapshot of the active tariff
+            tariff = self.tariff_store.current
+            base_fare, cost_per_km, tax_rate = tariff.rates(vehicle_class_name)
             
-            # Calculate costs
-            distance_cost = distance_km * cost_per_km
-            subtotal = base_fare + distance_cost
-            tax_amount = subtotal * tax_rate
-            total_fare = subtotal + tax_amount
-            
-            return {
-                'distance_km': round(distance_km, 2),
-                'distance_miles': round(distance_km * DistanceCalculator.KM_TO_MILES, 2),
-                'base_fare': base_fare,
-                'cost_per_km': cost_per_km,
-                'distance_cost': round(distance_cost, 2),
-                'subtotal': round(subtotal, 2),
-                'tax_rate': tax_rate,
-                'tax_amount': round(tax_amount, 2),
-                'total_fare': round(total_fare, 2),
-                'vehicle_type': vehicle_type_name,
-                'formatted_distance': self.distance_calculator.format_distance(
-                    pickup_lat, pickup_lng, dropoff_lat, dropoff_lng
-                )
-            }
+            # The breakdown is derived from the tariff when read
+            fare = FareResult(distance_km, base_fare, cost_per_km, tax_rate, vehicle_type_name, distance_mode,
+                              surge_multiplier=self.get_surge_multiplier(pickup_lat, pickup_lng),
+                              tariff_version=tariff.version)
+            return self.apply_promotions({vehicle_type_name: fare}, pickup_lat, pickup_lng,
+                                         when, first_ride)[vehicle_type_name]
             
         except Exception as e:
             print(f"Error calculating fare: {e}")
-            return {
-                'distance_km': 0,
-                'distance_miles': 0,
-                'base_fare': 0,
-                'cost_per_km': 0,
-                'distance_cost': 0,
-                'subtotal': 0,
-                'tax_rate': 0,
-                'tax_amount': 0,
-                'total_fare': 0,
-                'vehicle_type': vehicle_type_name,
-                'formatted_distance': "0.00 km (0.00 miles)",
-                'error': str(e)
-            }
+            return FareResult.failed(vehicle_type_name, str(e))
     
     def get_fare_for_all_vehicles(self, pickup_lat, pickup_lng, dropoff_lat, dropoff_lng):
         """
@@ -94,15 +261,212 @@ class FareCalculator:
         Returns:
             Dictionary with vehicle types as keys and fare info as values
         """
+        return self.quote_all(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng)
+    
+    def apply_promotions(self, fares: Dict, pickup_lat, pickup_lng, when: Optional[datetime] = None,
+                         first_ride: bool = False) -> Dict:
+        """Discount UI vehicle name -> FareResult quotes with the promotion table, if any"""
+        if self.promotions is None:
+            return fares
+        return self.promotions.apply(fares, pickup_lat, pickup_lng, when, first_ride)
+    
+    def get_trip_distances_batch(self, pickup_lats, pickup_lngs, dropoff_lats, dropoff_lngs) -> np.ndarray:
+        """
+        Priced distance for arrays of trips
+        
+        Uses the zone table where it answers and the straight-line distance
+        (planar inside the urban area) elsewhere. The road router is not
+        consulted, as bulk quotes must not issue one routing query per trip.
+        
+        Returns:
+            NumPy array of distances in kilometers
+        """
+        distance_km = DistanceCalculator.calculate_distance_km_auto_batch(
+            pickup_lats, pickup_lngs, dropoff_lats, dropoff_lngs
+        )
+        if self.zone_table is not None:
+            zone_km, _ = self.zone_table.lookup_batch(pickup_lats, pickup_lngs, dropoff_lats, dropoff_lngs)
+            distance_km = np.where(np.isnan(zone_km), distance_km, zone_km)
+        return distance_km
+    
+    @staticmethod
+    def tariff_arrays(vehicle_type_names, tariff=None):
+        """
+        Tariff of several UI vehicle types as arrays
+        
+        Args:
+            vehicle_type_names: UI vehicle names
+            tariff: Tariff snapshot, defaults to the shared store's active tariff
+            
+        Returns:
+            Tuple of (base_fare, cost_per_km) in centavos and tax_rate in
+            basis points, as int64 arrays
+            
+        Raises:
+            ValueError: If a vehicle type is unknown
+        """
+        class_names = []
+        for name in vehicle_type_names:
+            class_name = FareCalculator.VEHICLE_TYPE_MAPPING.get(name)
+            if not class_name:
+                raise ValueError(f"Unknown vehicle type: {name}")
+            class_names.append(class_name)
+        
+        if tariff is None:
+            tariff = shared_tariff_store.current
+        rates = [tariff.rates(c) for c in class_names]
+        return (np.array([money.to_centavos(base_fare) for base_fare, _, _ in rates], dtype=np.int64),
+                np.array([money.to_centavos(cost_per_km) for _, cost_per_km, _ in rates], dtype=np.int64),
+                np.array([money.to_basis_points(tax_rate) for _, _, tax_rate in rates], dtype=np.int64))
+    
+    def quote_all(self, pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, vehicle_type_names=None,
+                  when: Optional[datetime] = None, first_ride: bool = False):
+        """
+        Price every vehicle type for one trip or for arrays of trips
+        
+        The trip distance is computed once and shared by every vehicle type.
+        Every trip is priced from its own exact distance; only the road
+        search behind it is cached, so repeated quotes are identical and
+        single-trip and batch quotes agree.
+        Promotions are evaluated for all vehicle types at once after pricing
+        and are never cached.
+        
+        Args:
+            pickup_lat, pickup_lng: Pickup coordinates (scalars or arrays)
+            dropoff_lat, dropoff_lng: Dropoff coordinates (scalars or arrays)
+            vehicle_type_names: UI vehicle names, defaults to every type
+            when: Time of the quote for time-window promotions, defaults to now
+            first_ride: Whether first-ride promotions apply
+            
+        Returns:
+            For a single trip, a dictionary of UI vehicle name -> FareResult
+            (as from calculate_fare). For arrays of trips, a dictionary with
+            'vehicle_types', 'tariff_version', 'distance_km' and
+            'surge_multiplier' (n_trips,), and 'subtotal', 'tax_amount',
+            'total_fare' arrays of shape (n_trips, n_types) in pesos, plus
+            the exact 'total_fare_centavos' and 'discount_centavos' int64
+            arrays and the matched 'promo_ids' (None where no promotion
+            applies). Amounts match calculate_fare to the centavo.
+        """
+        if vehicle_type_names is None:
+            vehicle_type_names = list(self.VEHICLE_TYPE_MAPPING.keys())
+        
+        if np.ndim(pickup_lat) > 0:
+            return self._quote_batch(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, vehicle_type_names,
+                                     when, first_ride)
+        
+        tariff = self.tariff_store.current
+        surge_multiplier = self.get_surge_multiplier(pickup_lat, pickup_lng)
+        
+        try:
+            fares = self._quote_trip(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng,
+                                     vehicle_type_names, tariff, surge_multiplier)
+        except Exception as e:
+            print(f"Error calculating fare: {e}")
+            return {name: FareResult.failed(name, str(e)) for name in vehicle_type_names}
+        
+        return self.apply_promotions(fares, pickup_lat, pickup_lng, when, first_ride)
+    
+    def _quote_trip(self, pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, vehicle_type_names, tariff,
+                    surge_multiplier) -> Dict:
+        """Price every vehicle type for one trip with a given tariff snapshot"""
+        distance_km, distance_mode = self.get_trip_distance(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng)
+        return self.price_trip(distance_km, distance_mode, vehicle_type_names, tariff, surge_multiplier)
+    
+    def price_trip(self, distance_km, distance_mode, vehicle_type_names=None, tariff=None,
+                   surge_multiplier: float = 1.0) -> Dict:
+        """
+        Price every vehicle type for a trip whose distance is already known
+        
+        Args:
+            distance_km, distance_mode: As returned by get_trip_distance
+            vehicle_type_names: UI vehicle names, defaults to every type
+            tariff: Tariff snapshot, defaults to the active tariff
+            surge_multiplier: Surge factor to price with
+            
+        Returns:
+            Dictionary of UI vehicle name -> FareResult, without promotions
+        """
+        if vehicle_type_names is None:
+            vehicle_type_names = list(self.VEHICLE_TYPE_MAPPING.keys())
+        if tariff is None:
+            tariff = self.tariff_store.current
+        
         fares = {}
+        for name in vehicle_type_names:
+            class_name = self.VEHICLE_TYPE_MAPPING.get(name)
+            if not class_name:
+                fares[name] = FareResult.failed(name, f"Unknown vehicle type: {name}")
+                continue
+            base_fare, cost_per_km, tax_rate = tariff.rates(class_name)
+            fares[name] = FareResult(distance_km, base_fare, cost_per_km, tax_rate, name, distance_mode,
+                                     surge_multiplier=surge_multiplier, tariff_version=tariff.version)
+        return fares
+    
+    def _quote_batch(self, pickup_lats, pickup_lngs, dropoff_lats, dropoff_lngs, vehicle_type_names,
+                     when=None, first_ride=False) -> Dict:
+        """Vectorized quote_all for arrays of trips"""
+        tariff = self.tariff_store.current
+        base_fare, cost_per_km, tax_rate = self.tariff_arrays(vehicle_type_names, tariff)
+        distance_km = np.ravel(self.get_trip_distances_batch(pickup_lats, pickup_lngs, dropoff_lats, dropoff_lngs))
         
-        for ui_vehicle_name in self.VEHICLE_TYPE_MAPPING.keys():
-            fare_info = self.calculate_fare(
-                pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, ui_vehicle_name
+        if self.surge_engine is not None:
+            surge_multiplier = self.surge_engine.multiplier_batch(pickup_lats, pickup_lngs)
+        else:
+            surge_multiplier = np.ones(len(distance_km))
+        
+        subtotal, tax_amount, total_fare = self.price_batch(
+            distance_km[:, None], base_fare[None, :], cost_per_km[None, :], tax_rate[None, :],
+            money.round_half_up_batch(surge_multiplier * money.SURGE_SCALE)[:, None]
+        )
+        discount = np.zeros_like(total_fare)
+        promo_ids = np.full(total_fare.shape, None, dtype=object)
+        if self.promotions is not None:
+            vehicles = [self.promotions.vehicle_index[self.VEHICLE_TYPE_MAPPING[name]] for name in vehicle_type_names]
+            zones = self.promotions.zone_rows.zones_batch(pickup_lats, pickup_lngs)
+            discount, rules = self.promotions.evaluate(
+                total_fare, np.broadcast_to(np.array(vehicles, dtype=np.int64), total_fare.shape),
+                np.broadcast_to(zones[:, None], total_fare.shape), when, first_ride
             )
-            fares[ui_vehicle_name] = fare_info
+            discount, rules = discount.reshape(total_fare.shape), rules.reshape(total_fare.shape)
+            matched = rules >= 0
+            promo_ids[matched] = [self.promotions.promotions[rule].promo_id for rule in rules[matched].tolist()]
+            total_fare = total_fare - discount
+        
+        return {
+            'vehicle_types': list(vehicle_type_names),
+            'distance_km': distance_km,
+            'surge_multiplier': surge_multiplier,
+            'tariff_version': tariff.version,
+            'subtotal': money.to_pesos(subtotal),
+            'tax_amount': money.to_pesos(tax_amount),
+            'total_fare': money.to_pesos(total_fare),
+            'total_fare_centavos': total_fare,
+            'discount_centavos': discount,
+            'promo_ids': promo_ids,
+        }
+    
+    @staticmethod
+    def price_batch(distance_km, base_fare, cost_per_km, tax_rate, surge_multiplier=money.SURGE_SCALE):
+        """
+        Tariff formula of calculate_fare over arrays, in integer centavos
+        
+        All arguments broadcast against each other.
+        
+        Args:
+            distance_km: Trip distances
+            base_fare, cost_per_km: Tariff in centavos (see tariff_arrays)
+            tax_rate: Tax rates in basis points
+            surge_multiplier: Surge multipliers in hundredths
             
-        return fares
+        Returns:
+            Tuple of (subtotal, tax_amount, total_fare) int64 centavo arrays
+        """
+        distance_cost = money.round_half_up_batch(np.asarray(distance_km, dtype=np.float64) * cost_per_km)
+        subtotal = money.div_round_half_up((base_fare + distance_cost) * np.asarray(surge_multiplier, dtype=np.int64),
+                                           money.SURGE_SCALE)
+        tax_amount = money.div_round_half_up(subtotal * np.asarray(tax_rate, dtype=np.int64), money.BASIS_POINTS)
+        return subtotal, tax_amount, subtotal + tax_amount
     
     def format_fare_display(self, fare_info):
         """
@@ -115,10 +479,12 @@ class FareCalculator:
             Formatted string for display
         """
         if fare_info.get('error'):
-            return "₱ 0.00"
+            return money.format_pesos(0)
         
-        total_fare = fare_info.get('total_fare', 0)
-        return f"₱ {total_fare:.2f}"
+        total_fare_centavos = fare_info.get('total_fare_centavos')
+        if total_fare_centavos is None:
+            total_fare_centavos = money.to_centavos(fare_info.get('total_fare', 0))
+        return money.format_pesos(total_fare_centavos)
     
     def get_fare_breakdown_text(self, fare_info):
         """
@@ -133,24 +499,48 @@ class FareCalculator:
         if fare_info.get('error'):
             return f"Error calculating fare: {fare_info['error']}"
         
+        surge_multiplier = fare_info.get('surge_multiplier', 1.0)
+        surge_line = f"\nSurge: × {surge_multiplier:.1f} (high demand)" if surge_multiplier > 1 else ""
+        discount = fare_info.get('discount', 0)
+        promo_line = f"\nPromo ({fare_info.get('promo_id')}): - ₱ {discount:.2f}" if discount else ""
+        
         breakdown = f"""Distance: {fare_info['formatted_distance']}
 Base Fare: ₱ {fare_info['base_fare']:.2f}
-Distance Cost: ₱ {fare_info['distance_cost']:.2f} ({fare_info['distance_km']:.2f} km × ₱ {fare_info['cost_per_km']:.2f}/km)
+Distance Cost: ₱ {fare_info['distance_cost']:.2f} ({fare_info['distance_km']:.2f} km × ₱ {fare_info['cost_per_km']:.2f}/km){surge_line}
 Subtotal: ₱ {fare_info['subtotal']:.2f}
-Tax ({fare_info['tax_rate']*100:.1f}%): ₱ {fare_info['tax_amount']:.2f}
+Tax ({fare_info['tax_rate']*100:.1f}%): ₱ {fare_info['tax_amount']:.2f}{promo_line}
 Total Fare: ₱ {fare_info['total_fare']:.2f}"""
         
         return breakdown
     
     @staticmethod
-    def update_vehicle_prices():
+    def update_vehicle_prices(base_fares=None, cost_per_km=None, tax_rates=None, tariff_store=None, save=False):
         """
-        Static method to update vehicle pricing if needed
-        This allows dynamic price updates without recreating the calculator
+        Update vehicle pricing without recreating any calculator
+        
+        With no prices given, hot-reloads the tariff file if it changed.
+        Otherwise the given prices (vehicle class name -> value) become a
+        new tariff version, optionally written back to the tariff file.
+        Either way the new tariff is swapped in atomically and cached quotes
+        of older versions are dropped.
+        
+        Args:
+            base_fares, cost_per_km, tax_rates: Optional partial price changes
+            tariff_store: TariffStore to update, defaults to the shared store
+            save: Also write the new tariff to the store's file
+            
+        Returns:
+            The active tariff version afterwards
         """
-        # This method can be used to update Vehicle class pricing
-        # Example: Vehicle.BASE_FARES["Car4Seater"] = 120
-        pass
+        store = tariff_store if tariff_store is not None else shared_tariff_store
+        if base_fares is None and cost_per_km is None and tax_rates is None:
+            store.reload_if_changed()
+            return store.version
+        
+        tariff = store.update(base_fares, cost_per_km, tax_rates)
+        if save:
+            store.save(tariff)
+        return tariff.version
     
     def get_distance_info(self, pickup_lat, pickup_lng, dropoff_lat, dropoff_lng):
         """
@@ -190,4 +580,4 @@ Total Fare: ₱ {fare_info['total_fare']:.2f}"""
                 'center_point': (pickup_lat, pickup_lng),
                 'zoom_level': 15,
                 'error': str(e)
-            }
\ No newline at end of file
+            }
@@ -0,0 +1,263 @@
+import csv
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from .fare_calculation import FareCalculator
+from .tariff import Tariff
+
+DEFAULT_FARE_TABLE_FILE = os.path.join("data", "fare_table.json")
+DEFAULT_HOTSPOTS_FILE = os.path.join("data", "hotspots.csv")
+
+# Coordinates are matched after rounding to this many decimals (about 0.1 m)
+KEY_DECIMALS = 6
+
+
+def load_hotspots(hotspots_file: str = DEFAULT_HOTSPOTS_FILE) -> Dict[str, Tuple[float, float]]:
+    """
+    Read admin-configured hotspots from a CSV file with columns name, lat, lng
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        ValueError: If a row is malformed
+    """
+    hotspots = {}
+    with open(hotspots_file, 'r', encoding='utf-8') as file:
+        for line_no, row in enumerate(csv.DictReader(file), start=2):
+            try:
+                hotspots[row['name'].strip()] = (float(row['lat']), float(row['lng']))
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"{hotspots_file}:{line_no}: invalid hotspot record: {e}")
+    return hotspots
+
+
+class FareTableEntry(NamedTuple):
+    distance_km: float
+    distance_mode: str
+    fares: Dict  # UI vehicle name -> FareResult at the table's tariff, without surge or promotions
+
+
+class FareTable:
+    """
+    Precomputed fares between predefined places
+
+    Every ordered pair of the given places (MapWidget locations plus admin
+    hotspots) is priced for every vehicle type once, so quoting a trip
+    between them is a dictionary lookup by coordinates. Only the trip
+    distances are expensive; they are persisted with a fingerprint of the
+    distance sources (zone table, road graph, planar urban area), so a
+    restart or a tariff change just re-derives the fares from them, while a
+    changed source makes the table recompute them. The table follows the
+    tariff store: a new tariff reprices every pair and rewrites the file.
+    Surge and promotions still apply at lookup time. ETAs are not stored;
+    they depend on the departure time and come from ETACalculator.
+    """
+
+    def __init__(self, fare_calculator: FareCalculator, places: Dict[str, Tuple[float, float]],
+                 table_file: Optional[str] = DEFAULT_FARE_TABLE_FILE):
+        """
+        Args:
+            fare_calculator: Calculator whose distance sources, tariff store,
+                surge engine and promotions the table uses
+            places: Place name -> (lat, lng)
+            table_file: JSON file the table is persisted to, None to keep it in memory only
+        """
+        self.fare_calculator = fare_calculator
+        self.places = dict(places)
+        self.table_file = table_file
+        self.tariff_version: Optional[int] = None
+        self.distance_fingerprint: Optional[str] = None  # FareCalculator.distance_fingerprint of the distances
+        self._loaded_version: Optional[int] = None  # Tariff version the table file was written with
+        self._loaded_fingerprint: Optional[str] = None
+        self._entries: Dict[Tuple, FareTableEntry] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load_or_build(cls, fare_calculator: FareCalculator, places: Dict[str, Tuple[float, float]],
+                      table_file: Optional[str] = DEFAULT_FARE_TABLE_FILE):
+        """
+        Table for the given places, reusing the distances of the table file
+
+        Pairs missing from the file are computed, stale fares are repriced
+        and the file is rewritten if anything changed. Distances from a file
+        written with other distance sources are all recomputed. The table
+        registers itself with the calculator's tariff store.
+        """
+        table = cls(fare_calculator, places, table_file)
+        distances = {}
+        if table_file is not None and os.path.exists(table_file):
+            try:
+                distances = table.load_distances()
+            except Exception as e:
+                print(f"Error loading fare table: {e}")
+            if distances and table._loaded_fingerprint != fare_calculator.distance_fingerprint():
+                print("Fare table distance sources changed, recomputing distances")
+                distances = {}
+
+        if table.build(distances) and table_file is not None:
+            try:
+                table.save()
+            except Exception as e:
+                print(f"Error saving fare table: {e}")
+        fare_calculator.tariff_store.add_listener(table.on_tariff_change)
+        return table
+
+    @staticmethod
+    def key(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng) -> Tuple:
+        return (round(pickup_lat, KEY_DECIMALS), round(pickup_lng, KEY_DECIMALS),
+                round(dropoff_lat, KEY_DECIMALS), round(dropoff_lng, KEY_DECIMALS))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _pairs(self) -> List[Tuple[str, str]]:
+        return [(origin, destination) for origin in self.places for destination in self.places
+                if origin != destination]
+
+    def build(self, distances: Optional[Dict[Tuple, Tuple[float, str]]] = None) -> bool:
+        """
+        Price every ordered pair of places at the active tariff
+
+        Args:
+            distances: Known key -> (distance_km, distance_mode), e.g. from
+                load_distances; other pairs are computed with the calculator
+
+        Returns:
+            True if the table differs from what the file held
+        """
+        distances = dict(distances or {})
+        fingerprint = self.fare_calculator.distance_fingerprint()
+        computed = False
+        for origin, destination in self._pairs():
+            key = self.key(*self.places[origin], *self.places[destination])
+            if key not in distances:
+                try:
+                    distances[key] = self.fare_calculator.get_trip_distance(*self.places[origin],
+                                                                            *self.places[destination])
+                    computed = True
+                except Exception as e:
+                    print(f"Error precomputing {origin} -> {destination}: {e}")
+
+        tariff = self.fare_calculator.tariff_store.current
+        self._reprice(distances, tariff, fingerprint)
+        return computed or self._loaded_version != tariff.version or self._loaded_fingerprint != fingerprint
+
+    def _reprice(self, distances: Dict[Tuple, Tuple[float, str]], tariff: Tariff, fingerprint: Optional[str]):
+        """Derive every pair's fares from its distance"""
+        pair_keys = {self.key(*self.places[origin], *self.places[destination])
+                     for origin, destination in self._pairs()}
+
+        entries = {}
+        for key, (distance_km, distance_mode) in distances.items():
+            if key not in pair_keys:
+                continue  # A place that was removed
+            entries[key] = FareTableEntry(
+                distance_km, distance_mode, self.fare_calculator.price_trip(distance_km, distance_mode, tariff=tariff)
+            )
+
+        # Readers see either the old table or the new one, never a mix
+        with self._lock:
+            self._entries = entries
+            self.tariff_version = tariff.version
+            self.distance_fingerprint = fingerprint
+
+    def on_tariff_change(self, tariff: Tariff):
+        """TariffStore listener: reprice every pair and persist the new fares"""
+        with self._lock:
+            distances = {key: (entry.distance_km, entry.distance_mode) for key, entry in self._entries.items()}
+            fingerprint = self.distance_fingerprint
+        self._reprice(distances, tariff, fingerprint)
+        if self.table_file is not None:
+            try:
+                self.save()
+            except Exception as e:
+                print(f"Error saving fare table: {e}")
+
+    def entry(self, pickup_lat, pickup_lng, dropoff_lat, dropoff_lng) -> Optional[FareTableEntry]:
+        """Precomputed entry for a trip between two places, or None"""
+        return self._entries.get(self.key(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng))
+
+    def quote_all(self, pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, when: Optional[datetime] = None,
+                  first_ride: bool = False) -> Optional[Dict]:
+        """
+        FareCalculator.quote_all for a trip between two places
+
+        Returns:
+            Dictionary of UI vehicle name -> FareResult, or None if the trip
+            is not in the table or the table lags behind the active tariff
+            or distance sources
+        """
+        with self._lock:
+            entry = self._entries.get(self.key(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng))
+            table_version, fingerprint = self.tariff_version, self.distance_fingerprint
+        tariff = self.fare_calculator.tariff_store.current
+        if entry is None or table_version != tariff.version:
+            return None
+        if fingerprint != self.fare_calculator.distance_fingerprint():
+            return None
+
+        fares = entry.fares
+        surge_multiplier = self.fare_calculator.get_surge_multiplier(pickup_lat, pickup_lng)
+        if surge_multiplier != 1.0:
+            fares = self.fare_calculator.price_trip(entry.distance_km, entry.distance_mode, tariff=tariff,
+                                                    surge_multiplier=surge_multiplier)
+        return self.fare_calculator.apply_promotions(dict(fares), pickup_lat, pickup_lng, when, first_ride)
+
+    def calculate_fare(self, pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, vehicle_type_name,
+                       when: Optional[datetime] = None, first_ride: bool = False):
+        """FareCalculator.calculate_fare for a trip between two places, or None if not in the table"""
+        fares = self.quote_all(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, when, first_ride)
+        if fares is None or vehicle_type_name not in fares:
+            return None
+        return fares[vehicle_type_name]
+
+    def load_distances(self) -> Dict[Tuple, Tuple[float, str]]:
+        """
+        Trip distances stored in the table file
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+            ValueError: If the file is malformed
+        """
+        with open(self.table_file, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+
+        distances = {}
+        try:
+            for pair in data["pairs"]:
+                key = self.key(*pair["origin"], *pair["destination"])
+                distances[key] = (float(pair["distance_km"]), pair["distance_mode"])
+            self._loaded_version = data.get("tariff_version")
+            self._loaded_fingerprint = data.get("distance_fingerprint")
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"{self.table_file}: invalid fare table: {e}")
+        return distances
+
+    def save(self):
+        """Write the table to the table file atomically"""
+        names = {(round(lat, KEY_DECIMALS), round(lng, KEY_DECIMALS)): name
+                 for name, (lat, lng) in self.places.items()}
+        with self._lock:
+            entries, tariff_version, fingerprint = self._entries, self.tariff_version, self.distance_fingerprint
+
+        pairs = []
+        for key, entry in entries.items():
+            origin, destination = key[:2], key[2:]
+            pairs.append({
+                "from": names.get(origin, ""),
+                "to": names.get(destination, ""),
+                "origin": list(origin),
+                "destination": list(destination),
+                "distance_km": entry.distance_km,
+                "distance_mode": entry.distance_mode,
+                "total_fare_centavos": {name: fare.total_fare_centavos for name, fare in entry.fares.items()},
+            })
+
+        temp_file = f"{self.table_file}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as file:
+            json.dump({"tariff_version": tariff_version, "distance_fingerprint": fingerprint, "pairs": pairs},
+                      file, indent=1)
+        os.replace(temp_file, self.table_file)
+        self._loaded_version = tariff_version
+        self._loaded_fingerprint = fingerprint
@@ -0,0 +1,321 @@
+import json
+import math
+import os
+import time
+import numpy as np
+from typing import Dict, List, NamedTuple, Optional
+
+DEFAULT_GEOFENCE_FILE = os.path.join("data", "geofences.json")
+
+KIND_SERVICE_AREA = "service_area"
+KIND_NO_PICKUP = "no_pickup"
+KIND_CAMPUS = "campus"
+KIND_AIRPORT = "airport"
+
+
+class Geofence(NamedTuple):
+    fence_id: str
+    name: str
+    kind: str
+    lats: np.ndarray
+    lngs: np.ndarray
+
+
+def load_geofences(geofence_file: str = DEFAULT_GEOFENCE_FILE) -> List[Geofence]:
+    """
+    Read polygons from a JSON file of the form
+    {"fences": [{"id", "name", "kind", "polygon": [[lat, lng], ...]}, ...]}
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        ValueError: If a fence is malformed
+    """
+    with open(geofence_file, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+
+    fences = []
+    for entry in data.get("fences", []):
+        try:
+            points = np.asarray(entry["polygon"], dtype=np.float64)
+            fence = Geofence(str(entry["id"]), entry.get("name", entry["id"]), entry["kind"],
+                             points[:, 0].copy(), points[:, 1].copy())
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid geofence {entry.get('id', '?')}: {e}")
+        if len(fence.lats) < 3:
+            raise ValueError(f"Geofence {fence.fence_id} needs at least 3 vertices")
+        fences.append(fence)
+    return fences
+
+
+class GeofenceIndex:
+    """
+    Static R-tree over geofence polygons for point-in-polygon queries
+
+    The tree is bulk loaded with Sort-Tile-Recursive packing over the
+    polygon bounding boxes, so a lookup only runs the exact ray-casting test
+    on the few polygons whose boxes contain the point. Batch queries walk
+    the tree once for a whole array of points and run the polygon test as
+    one vectorized operation per candidate polygon.
+    """
+
+    def __init__(self, fences: List[Geofence], node_capacity: int = 8):
+        """
+        Args:
+            fences: Polygons to index, e.g. from load_geofences
+            node_capacity: Maximum children per R-tree node
+        """
+        self.fences = list(fences)
+        self.node_capacity = max(2, node_capacity)
+        self.fence_index: Dict[str, int] = {fence.fence_id: i for i, fence in enumerate(self.fences)}
+
+        # Edge lists for the scalar test: (lat1, lng1, lat2, lng2) per edge
+        self._edges = [
+            list(zip(f.lats.tolist(), f.lngs.tolist(), np.roll(f.lats, -1).tolist(), np.roll(f.lngs, -1).tolist()))
+            for f in self.fences
+        ]
+        self._has_service_area = any(f.kind == KIND_SERVICE_AREA for f in self.fences)
+        self._build_tree()
+
+    @classmethod
+    def load(cls, geofence_file: str = DEFAULT_GEOFENCE_FILE):
+        """Build an index from a geofence JSON file"""
+        return cls(load_geofences(geofence_file))
+
+    @classmethod
+    def load_if_exists(cls, geofence_file: str = DEFAULT_GEOFENCE_FILE):
+        """Build an index, or return None if the file is missing or invalid"""
+        if not os.path.exists(geofence_file):
+            return None
+        try:
+            return cls.load(geofence_file)
+        except Exception as e:
+            print(f"Error loading geofences: {e}")
+            return None
+
+    def __len__(self):
+        return len(self.fences)
+
+    def _build_tree(self):
+        """
+        Pack the bounding boxes level by level (STR)
+
+        self._levels[0] holds the fences, each higher level holds nodes whose
+        children are a contiguous [start, end) range of the level below.
+        Boxes are (lat_min, lat_max, lng_min, lng_max).
+        """
+        boxes = np.array([[f.lats.min(), f.lats.max(), f.lngs.min(), f.lngs.max()] for f in self.fences],
+                         dtype=np.float64).reshape(-1, 4)
+        items = np.arange(len(self.fences))
+        self._levels = []
+
+        while True:
+            order = self._str_order(boxes)
+            boxes, items = boxes[order], items[order]
+            level = {"boxes": boxes, "items": items, "item_list": items.tolist(),
+                     "box_list": [tuple(b) for b in boxes.tolist()]}
+            self._levels.append(level)
+            if len(boxes) <= self.node_capacity:
+                break
+
+            starts = np.arange(0, len(boxes), self.node_capacity)
+            ends = np.minimum(starts + self.node_capacity, len(boxes))
+            boxes = np.array([[boxes[s:e, 0].min(), boxes[s:e, 1].max(), boxes[s:e, 2].min(), boxes[s:e, 3].max()]
+                              for s, e in zip(starts, ends)])
+            items = np.arange(len(starts))
+            level["parents"] = list(zip(starts.tolist(), ends.tolist()))
+
+        # Children ranges are stored on the parent level for traversal
+        for lower, upper in zip(self._levels, self._levels[1:]):
+            ranges = lower.pop("parents")
+            upper["children"] = [ranges[i] for i in upper["items"].tolist()]
+
+    def _str_order(self, boxes: np.ndarray) -> np.ndarray:
+        """Sort-Tile-Recursive order: vertical slabs by longitude, then latitude within each slab"""
+        n = len(boxes)
+        if n == 0:
+            return np.arange(0)
+        centers_lat = (boxes[:, 0] + boxes[:, 1]) / 2
+        centers_lng = (boxes[:, 2] + boxes[:, 3]) / 2
+        node_count = math.ceil(n / self.node_capacity)
+        slab_size = math.ceil(math.sqrt(node_count)) * self.node_capacity
+
+        by_lng = np.argsort(centers_lng, kind="stable")
+        order = []
+        for start in range(0, n, slab_size):
+            slab = by_lng[start:start + slab_size]
+            order.extend(slab[np.argsort(centers_lat[slab], kind="stable")].tolist())
+        return np.array(order, dtype=np.int64)
+
+    def _candidates(self, lat: float, lng: float) -> List[int]:
+        """Fence indices whose bounding box contains the point"""
+        if not self.fences:
+            return []
+
+        top = len(self._levels) - 1
+        stack = [(top, i) for i in range(len(self._levels[top]["box_list"]))]
+        found = []
+        while stack:
+            depth, i = stack.pop()
+            level = self._levels[depth]
+            lat_min, lat_max, lng_min, lng_max = level["box_list"][i]
+            if lat < lat_min or lat > lat_max or lng < lng_min or lng > lng_max:
+                continue
+            if depth == 0:
+                found.append(level["item_list"][i])
+            else:
+                start, end = level["children"][i]
+                stack.extend((depth - 1, child) for child in range(start, end))
+        return found
+
+    def _point_in_fence(self, fence: int, lat: float, lng: float) -> bool:
+        """Even-odd ray casting along the longitude axis"""
+        inside = False
+        for lat1, lng1, lat2, lng2 in self._edges[fence]:
+            if (lat1 > lat) != (lat2 > lat):
+                crossing = lng1 + (lat - lat1) * (lng2 - lng1) / (lat2 - lat1)
+                if lng < crossing:
+                    inside = not inside
+        return inside
+
+    def fences_at(self, lat: float, lng: float) -> List[Geofence]:
+        """All fences containing a point"""
+        return [self.fences[i] for i in self._candidates(lat, lng) if self._point_in_fence(i, lat, lng)]
+
+    def kinds_at(self, lat: float, lng: float) -> set:
+        """Set of fence kinds containing a point"""
+        return {fence.kind for fence in self.fences_at(lat, lng)}
+
+    def contains_batch(self, lats, lngs) -> np.ndarray:
+        """
+        Vectorized point-in-polygon for many points at once
+
+        Args:
+            lats, lngs: Arrays of point coordinates
+
+        Returns:
+            Boolean array of shape (n_points, n_fences); column j follows self.fences[j]
+        """
+        lats = np.ravel(np.asarray(lats, dtype=np.float64))
+        lngs = np.ravel(np.asarray(lngs, dtype=np.float64))
+        result = np.zeros((len(lats), len(self.fences)), dtype=bool)
+        if not self.fences or len(lats) == 0:
+            return result
+
+        # Walk the tree once, carrying the indices of points inside each box
+        top = len(self._levels) - 1
+        stack = [(top, i, np.arange(len(lats))) for i in range(len(self._levels[top]["box_list"]))]
+        while stack:
+            depth, i, points = stack.pop()
+            level = self._levels[depth]
+            lat_min, lat_max, lng_min, lng_max = level["box_list"][i]
+            p_lat, p_lng = lats[points], lngs[points]
+            points = points[(p_lat >= lat_min) & (p_lat <= lat_max) & (p_lng >= lng_min) & (p_lng <= lng_max)]
+            if len(points) == 0:
+                continue
+            if depth == 0:
+                fence = level["item_list"][i]
+                result[points, fence] = self._points_in_fence_batch(fence, lats[points], lngs[points])
+            else:
+                start, end = level["children"][i]
+                stack.extend((depth - 1, child, points) for child in range(start, end))
+        return result
+
+    def _points_in_fence_batch(self, fence: int, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+        """Even-odd ray casting for an array of points against one polygon"""
+        f = self.fences[fence]
+        lat1, lng1 = f.lats[None, :], f.lngs[None, :]
+        lat2, lng2 = np.roll(f.lats, -1)[None, :], np.roll(f.lngs, -1)[None, :]
+        y, x = lats[:, None], lngs[:, None]
+
+        spans = (lat1 > y) != (lat2 > y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            crossing = lng1 + (y - lat1) * (lng2 - lng1) / (lat2 - lat1)
+        return (np.count_nonzero(spans & (x < crossing), axis=1) % 2) == 1
+
+    def kind_mask_batch(self, lats, lngs, kind: str) -> np.ndarray:
+        """Boolean array: point lies inside at least one fence of the given kind"""
+        columns = [i for i, fence in enumerate(self.fences) if fence.kind == kind]
+        if not columns:
+            return np.zeros(np.size(lats), dtype=bool)
+        return self.contains_batch(lats, lngs)[:, columns].any(axis=1)
+
+    def in_service_area(self, lat: float, lng: float) -> bool:
+        """True when the point is inside a service area (or none are defined)"""
+        if not self._has_service_area:
+            return True
+        return KIND_SERVICE_AREA in self.kinds_at(lat, lng)
+
+    def check_pickup(self, lat: float, lng: float) -> Optional[str]:
+        """
+        Validate a pickup point
+
+        Returns:
+            None if pickups are allowed there, otherwise a message for the user
+        """
+        fences = self.fences_at(lat, lng)
+        if self._has_service_area and not any(f.kind == KIND_SERVICE_AREA for f in fences):
+            return "This location is outside our service area."
+        for fence in fences:
+            if fence.kind == KIND_NO_PICKUP:
+                return f"Pickups are not allowed at {fence.name}."
+        return None
+
+    def check_dropoff(self, lat: float, lng: float) -> Optional[str]:
+        """
+        Validate a dropoff point
+
+        Returns:
+            None if the point is inside the service area, otherwise a message
+        """
+        if not self.in_service_area(lat, lng):
+            return "This location is outside our service area."
+        return None
+
+    def pickup_allowed_batch(self, lats, lngs) -> np.ndarray:
+        """Vectorized check_pickup: True where a pickup would be accepted"""
+        inside = self.contains_batch(lats, lngs)
+        kinds = np.array([fence.kind for fence in self.fences])
+        allowed = ~inside[:, kinds == KIND_NO_PICKUP].any(axis=1)
+        if self._has_service_area:
+            allowed &= inside[:, kinds == KIND_SERVICE_AREA].any(axis=1)
+        return allowed
+
+
+def benchmark_geofences(geofence_file: str = DEFAULT_GEOFENCE_FILE, n_points: int = 100000,
+                        seed: int = 0) -> Dict:
+    """
+    Measure single-point and batch lookup throughput
+
+    Returns:
+        Dictionary with microseconds per single lookup, batch points per
+        second, and the number of points where the two paths disagreed
+    """
+    index = GeofenceIndex.load(geofence_file)
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(14.45, 14.75, n_points)
+    lngs = rng.uniform(120.94, 121.13, n_points)
+
+    sample = min(n_points, 20000)
+    start = time.perf_counter()
+    single = [index.check_pickup(lat, lng) is None
+              for lat, lng in zip(lats[:sample].tolist(), lngs[:sample].tolist())]
+    single_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = index.pickup_allowed_batch(lats, lngs)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        "fences": len(index),
+        "single_us": single_seconds / sample * 1e6,
+        "batch_points_per_second": n_points / batch_seconds,
+        "mismatches": int(np.count_nonzero(batch[:sample] != np.array(single))),
+    }
+
+
+if __name__ == "__main__":
+    stats = benchmark_geofences()
+    print(f"{stats['fences']} fences")
+    print(f"single lookup: {stats['single_us']:.2f} us")
+    print(f"batch: {stats['batch_points_per_second'] / 1e6:.2f}M points/s")
+    print(f"mismatches: {stats['mismatches']}")
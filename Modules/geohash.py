@@ -0,0 +1,281 @@
+import time
+import numpy as np
+from typing import Dict, Tuple
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_BASE32_BYTES = np.frombuffer(BASE32.encode("ascii"), dtype=np.uint8)
+_DECODE_MAP = {char: value for value, char in enumerate(BASE32)}
+
+# Byte value -> base32 digit (either case), 255 for invalid characters
+_DECODE_TABLE = np.full(256, 255, dtype=np.uint8)
+_DECODE_TABLE[_BASE32_BYTES] = np.arange(32, dtype=np.uint8)
+_DECODE_TABLE[np.frombuffer(BASE32.upper().encode("ascii"), dtype=np.uint8)] = np.arange(32, dtype=np.uint8)
+
+MAX_PRECISION = 12  # 60 bits, fits in an int64
+
+DIRECTIONS = {
+    "n": (1, 0), "ne": (1, 1), "e": (0, 1), "se": (-1, 1),
+    "s": (-1, 0), "sw": (-1, -1), "w": (0, -1), "nw": (1, -1),
+}
+
+
+def _bit_counts(precision: int) -> Tuple[int, int]:
+    """Number of (latitude, longitude) bits for a precision; longitude gets the extra bit"""
+    total = 5 * precision
+    return total // 2, total - total // 2
+
+
+def _check_precision(precision: int):
+    if not 1 <= precision <= MAX_PRECISION:
+        raise ValueError(f"precision must be between 1 and {MAX_PRECISION}")
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """Cell height and width in degrees for a precision"""
+    lat_bits, lng_bits = _bit_counts(precision)
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def encode(lat: float, lng: float, precision: int = 9) -> str:
+    """
+    Encode a coordinate as a geohash string
+
+    Args:
+        lat, lng: Coordinate in degrees
+        precision: Number of characters (1-12); 7 is about 150 m, 9 about 5 m
+
+    Returns:
+        Geohash string
+    """
+    _check_precision(precision)
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # Geohash bits alternate starting with longitude
+
+    while len(chars) < precision:
+        rng, coordinate = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if coordinate >= mid:
+            value = (value << 1) | 1
+            rng[0] = mid
+        else:
+            value <<= 1
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+
+    return "".join(chars)
+
+
+def decode_bbox(geohash: str) -> Tuple[float, float, float, float]:
+    """
+    Bounding box of a geohash cell
+
+    Returns:
+        Tuple of (lat_min, lat_max, lng_min, lng_max)
+
+    Raises:
+        ValueError: If the geohash contains invalid characters
+    """
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+
+    for char in geohash.lower():
+        value = _DECODE_MAP.get(char)
+        if value is None:
+            raise ValueError(f"Invalid geohash character: {char!r}")
+        for shift in range(4, -1, -1):
+            rng = lng_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (value >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+
+    return lat_range[0], lat_range[1], lng_range[0], lng_range[1]
+
+
+def decode(geohash: str) -> Tuple[float, float]:
+    """Center (lat, lng) of a geohash cell"""
+    lat_min, lat_max, lng_min, lng_max = decode_bbox(geohash)
+    return (lat_min + lat_max) / 2, (lng_min + lng_max) / 2
+
+
+def adjacent(geohash: str, direction: str) -> str:
+    """
+    Neighboring cell of the same precision in a compass direction
+
+    Longitude wraps around the antimeridian; latitude is clamped at the poles.
+    """
+    if direction not in DIRECTIONS:
+        raise ValueError(f"Unknown direction: {direction}")
+    d_lat, d_lng = DIRECTIONS[direction]
+    lat, lng = decode(geohash)
+    height, width = cell_size(len(geohash))
+
+    lat = min(max(lat + d_lat * height, -90 + height / 2), 90 - height / 2)
+    lng = (lng + d_lng * width + 180) % 360 - 180
+    return encode(lat, lng, len(geohash))
+
+
+def neighbors(geohash: str) -> Dict[str, str]:
+    """All eight neighbors of a geohash cell keyed by direction"""
+    return {direction: adjacent(geohash, direction) for direction in DIRECTIONS}
+
+
+def _spread_bits(values: np.ndarray) -> np.ndarray:
+    """Insert a zero bit between each of the low 32 bits (Morton spreading)"""
+    v = values.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    v = (v | (v << np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    v = (v | (v << np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x3333333333333333)
+    v = (v | (v << np.uint64(1))) & np.uint64(0x5555555555555555)
+    return v
+
+
+def _compact_bits(values: np.ndarray) -> np.ndarray:
+    """Inverse of _spread_bits: gather every other bit"""
+    v = values & np.uint64(0x5555555555555555)
+    v = (v | (v >> np.uint64(1))) & np.uint64(0x3333333333333333)
+    v = (v | (v >> np.uint64(2))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    v = (v | (v >> np.uint64(4))) & np.uint64(0x00FF00FF00FF00FF)
+    v = (v | (v >> np.uint64(8))) & np.uint64(0x0000FFFF0000FFFF)
+    v = (v | (v >> np.uint64(16))) & np.uint64(0x00000000FFFFFFFF)
+    return v
+
+
+def encode_int_batch(lats, lngs, precision: int = 9) -> np.ndarray:
+    """
+    Vectorized geohash as integers (5 * precision bits)
+
+    Integer codes sort in the same order as the geohash strings, which makes
+    them convenient as compact spatial keys.
+    """
+    _check_precision(precision)
+    lat_bits, lng_bits = _bit_counts(precision)
+
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+
+    lat_cells = np.clip(np.floor((lats + 90.0) / 180.0 * (1 << lat_bits)), 0, (1 << lat_bits) - 1)
+    lng_cells = np.clip(np.floor((lngs + 180.0) / 360.0 * (1 << lng_bits)), 0, (1 << lng_bits) - 1)
+
+    lat_spread = _spread_bits(lat_cells)
+    lng_spread = _spread_bits(lng_cells)
+
+    # The most significant bit is always a longitude bit
+    if lat_bits == lng_bits:
+        return (lng_spread << np.uint64(1)) | lat_spread
+    return lng_spread | (lat_spread << np.uint64(1))
+
+
+def encode_batch(lats, lngs, precision: int = 9) -> np.ndarray:
+    """
+    Vectorized geohash encoding
+
+    Args:
+        lats, lngs: Arrays of coordinates
+        precision: Number of characters (1-12)
+
+    Returns:
+        NumPy array of geohash strings (dtype '<U{precision}')
+    """
+    codes = encode_int_batch(lats, lngs, precision).ravel()
+    shifts = np.arange(5 * (precision - 1), -1, -5, dtype=np.uint64)
+    digits = (codes[:, None] >> shifts[None, :]) & np.uint64(31)
+    chars = _BASE32_BYTES[digits.astype(np.intp)]
+    shape = np.shape(np.asarray(lats) + np.asarray(lngs))
+    return np.ascontiguousarray(chars).view(f"S{precision}").reshape(shape).astype(f"U{precision}")
+
+
+def decode_batch(geohashes) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized decoding of same-length geohashes to cell centers
+
+    Returns:
+        Tuple of (lats, lngs) arrays
+
+    Raises:
+        ValueError: If lengths differ or a geohash has invalid characters
+    """
+    hashes = np.asarray(geohashes)
+    if hashes.size == 0:
+        return np.empty(hashes.shape), np.empty(hashes.shape)
+
+    # Fixed-width byte strings; shorter entries are zero padded and rejected below
+    raw = np.ascontiguousarray(hashes.ravel().astype(np.bytes_))
+    precision = raw.dtype.itemsize
+    _check_precision(precision)
+
+    chars = raw.view(np.uint8).reshape(-1, precision)
+    if (chars == 0).any():
+        raise ValueError("decode_batch expects geohashes of a single precision")
+    digits = _DECODE_TABLE[chars]
+    if (digits == 255).any():
+        raise ValueError("Invalid geohash character in batch")
+
+    codes = np.zeros(len(chars), dtype=np.uint64)
+    for column in range(precision):
+        codes = (codes << np.uint64(5)) | digits[:, column].astype(np.uint64)
+
+    lat_bits, lng_bits = _bit_counts(precision)
+    if lat_bits == lng_bits:
+        lng_cells = _compact_bits(codes >> np.uint64(1))
+        lat_cells = _compact_bits(codes)
+    else:
+        lng_cells = _compact_bits(codes)
+        lat_cells = _compact_bits(codes >> np.uint64(1))
+
+    lats = (lat_cells.astype(np.float64) + 0.5) * (180.0 / (1 << lat_bits)) - 90.0
+    lngs = (lng_cells.astype(np.float64) + 0.5) * (360.0 / (1 << lng_bits)) - 180.0
+    return lats.reshape(hashes.shape), lngs.reshape(hashes.shape)
+
+
+def benchmark_encode(n_points: int = 1_000_000, precision: int = 9, seed: int = 0) -> Dict:
+    """
+    Measure batch encoding throughput and round-trip accuracy
+
+    Returns:
+        Dictionary with points per second for encode/decode and the largest
+        round-trip error relative to the cell size (must be <= 0.5)
+    """
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(-90, 90, n_points)
+    lngs = rng.uniform(-180, 180, n_points)
+
+    start = time.perf_counter()
+    hashes = encode_batch(lats, lngs, precision)
+    encode_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    decoded_lats, decoded_lngs = decode_batch(hashes)
+    decode_seconds = time.perf_counter() - start
+
+    height, width = cell_size(precision)
+    worst = max(float(np.max(np.abs(decoded_lats - lats))) / height,
+                float(np.max(np.abs(decoded_lngs - lngs))) / width)
+
+    return {
+        "n_points": n_points,
+        "precision": precision,
+        "encode_points_per_second": n_points / encode_seconds,
+        "decode_points_per_second": n_points / decode_seconds,
+        "max_roundtrip_error_cells": worst,
+    }
+
+
+if __name__ == "__main__":
+    stats = benchmark_encode()
+    print(f"encode: {stats['encode_points_per_second'] / 1e6:.2f}M points/s")
+    print(f"decode: {stats['decode_points_per_second'] / 1e6:.2f}M points/s")
+    print(f"max round-trip error: {stats['max_roundtrip_error_cells']:.3f} cells")
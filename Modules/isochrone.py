@@ -0,0 +1,230 @@
+import math
+import os
+import time
+import numpy as np
+from datetime import datetime
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from . import geohash
+from .distance_calculator import DistanceCalculator
+from .distance_matrix import DistanceMatrix
+from .fare_calculation import FareCalculator
+from .routing import RoadRouter
+from .spatial_index import KM_PER_DEGREE
+from .vehicle import Vehicle
+from .zone_table import DEFAULT_ZONES_FILE, Zone, ZoneIndex, shared_zone_index
+
+DEFAULT_THRESHOLDS = (5, 10, 15, 30)  # Minutes
+DEFAULT_PRECISION = 6  # Geohash cells of roughly 1.2 km x 0.6 km
+
+
+class IsochroneIndex:
+    """
+    Precomputed reachability of geohash cells from each zone per vehicle type
+
+    For every zone the travel distance to each surrounding geohash cell is
+    computed once (road network if a router is given, straight line
+    otherwise) and kept sorted, so the set of cells a vehicle reaches within
+    N minutes is a prefix of that list. Sets are cached per zone, vehicle
+    speed and threshold, which turns "can a Motorcycle reach this pickup in
+    5 minutes?" into a geohash encode plus a set-membership test. With a
+    speed profile the speed is the zone's speed in the departure's 15-minute
+    slot, so the sets follow the time of day like the ETAs do.
+    """
+
+    def __init__(self, zones: List[Zone], router: Optional[RoadRouter] = None,
+                 precision: int = DEFAULT_PRECISION, thresholds=DEFAULT_THRESHOLDS, speed_profile=None):
+        """
+        Args:
+            zones: ZoneIndex, e.g. from shared_zone_index, or zone definitions from load_zones
+            router: Optional RoadRouter for road distances
+            precision: Geohash precision of the reachability cells
+            thresholds: Travel times in minutes to precompute sets for
+            speed_profile: Optional SpeedProfile for time-of-day speeds, the
+                one ETACalculator uses; Vehicle.AVERAGE_SPEED otherwise
+        """
+        self.zone_rows = ZoneIndex.of(zones)
+        self.zones = self.zone_rows.zones
+        self.zone_index = self.zone_rows.rows
+        self.router = router
+        self.speed_profile = speed_profile
+        self.precision = precision
+        self.thresholds = tuple(sorted(thresholds))
+
+        self._cell_distances: Dict[Tuple[int, float], Tuple[np.ndarray, np.ndarray]] = {}
+        self._cache: Dict[Tuple[int, float, float], FrozenSet[str]] = {}
+
+    @classmethod
+    def from_zones_file(cls, zones_file: str = DEFAULT_ZONES_FILE, router: Optional[RoadRouter] = None, **kwargs):
+        """Build an index over the zones of a zone definition file"""
+        return cls(shared_zone_index(zones_file), router, **kwargs)
+
+    @classmethod
+    def load_if_exists(cls, zones_file: str = DEFAULT_ZONES_FILE, router: Optional[RoadRouter] = None, **kwargs):
+        """Build an index, or return None if the zones file is missing or invalid"""
+        if not os.path.exists(zones_file):
+            return None
+        try:
+            return cls.from_zones_file(zones_file, router, **kwargs)
+        except Exception as e:
+            print(f"Error loading isochrone zones: {e}")
+            return None
+
+    def speed_for(self, vehicle_type: str, zone: int, when: Optional[datetime] = None) -> float:
+        """
+        Speed in km/h of a vehicle class name or UI name leaving a zone
+
+        Raises:
+            ValueError: If the vehicle type is unknown
+        """
+        class_name = FareCalculator.VEHICLE_TYPE_MAPPING.get(vehicle_type, vehicle_type)
+        if class_name not in Vehicle.AVERAGE_SPEED:
+            raise ValueError(f"Unknown vehicle type: {vehicle_type}")
+        if self.speed_profile is not None:
+            center = self.zones[zone]
+            return float(self.speed_profile.speed(class_name, center.lat, center.lng, when))
+        return Vehicle.AVERAGE_SPEED[class_name]
+
+    def _max_reach_km(self) -> float:
+        fastest = max(Vehicle.AVERAGE_SPEED.values())
+        if self.speed_profile is not None:
+            fastest = max(fastest, float(self.speed_profile.speeds.max()))
+        return fastest * self.thresholds[-1] / 60
+
+    def _zone_cells(self, zone: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Geohash cells around a zone and their travel distance, nearest first
+
+        Cells are kept while their center is within the reach of the fastest
+        vehicle at the largest threshold.
+        """
+        reach_km = self._max_reach_km()
+        cached = self._cell_distances.get((zone, reach_km))
+        if cached is not None:
+            return cached
+
+        center = self.zones[zone]
+        height, width = geohash.cell_size(self.precision)
+        d_lat = reach_km / KM_PER_DEGREE
+        d_lng = d_lat / max(math.cos(math.radians(center.lat)), 1e-6)
+
+        rows = np.arange(math.floor((center.lat - d_lat + 90) / height), math.floor((center.lat + d_lat + 90) / height) + 1)
+        cols = np.arange(math.floor((center.lng - d_lng + 180) / width), math.floor((center.lng + d_lng + 180) / width) + 1)
+        cell_lats = np.repeat((rows + 0.5) * height - 90, len(cols))
+        cell_lngs = np.tile((cols + 0.5) * width - 180, len(rows))
+
+        distances = self._distances_from(center, cell_lats, cell_lngs)
+        keep = np.flatnonzero(distances <= reach_km)
+        order = keep[np.argsort(distances[keep], kind="stable")]
+
+        cells = (geohash.encode_batch(cell_lats[order], cell_lngs[order], self.precision), distances[order])
+        self._cell_distances[(zone, reach_km)] = cells
+        return cells
+
+    def _distances_from(self, center: Zone, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+        """Travel distance in km from a zone center to many points"""
+        if self.router is None:
+            return DistanceCalculator.calculate_distance_km_batch(center.lat, center.lng, lats, lngs)
+
+        # Same model as RoadRouter.route: access leg + road + access leg
+        graph = self.router.graph
+        source, snap_start_km = graph.nearest_node(center.lat, center.lng)
+        road_m = self.router.costs_from(source, RoadRouter.METRIC_DISTANCE, self._max_reach_km() * 1000)
+        nodes, snap_end_km = DistanceMatrix().nearest_drivers(lats, lngs, graph.lats, graph.lngs, k=1)
+        return snap_start_km + road_m[nodes[:, 0]] / 1000 + snap_end_km[:, 0]
+
+    def reachable_cells(self, vehicle_type: str, zone_id: str, minutes: float,
+                        when: Optional[datetime] = None) -> FrozenSet[str]:
+        """
+        Geohash cells a vehicle type reaches from a zone within a travel time
+
+        Args:
+            when: Departure time for the speed profile, defaults to now
+
+        Raises:
+            KeyError: If the zone id is unknown
+            ValueError: If the vehicle type is unknown or minutes exceeds the largest threshold
+        """
+        if minutes > self.thresholds[-1]:
+            raise ValueError(f"minutes must be at most {self.thresholds[-1]}")
+        zone = self.zone_index[zone_id]
+        return self._cells_within(zone, self.speed_for(vehicle_type, zone, when), minutes)
+
+    def _cells_within(self, zone: int, speed: float, minutes: float) -> FrozenSet[str]:
+        """Cells reached from a zone at a speed within minutes, cached"""
+        key = (zone, speed, minutes)
+        cells = self._cache.get(key)
+        if cells is None:
+            hashes, distances = self._zone_cells(zone)
+            count = int(np.searchsorted(distances, speed * minutes / 60, side="right"))
+            cells = frozenset(hashes[:count].tolist())
+            self._cache[key] = cells
+        return cells
+
+    def _zone_speeds(self, zone: int) -> set:
+        """Every speed a vehicle can leave a zone at, over all vehicle types and slots"""
+        if self.speed_profile is None:
+            return set(Vehicle.AVERAGE_SPEED.values())
+        center = self.zones[zone]
+        profile_zone = self.speed_profile.zone_rows.zone_of(center.lat, center.lng)
+        speeds = set(np.unique(self.speed_profile.speeds[:, profile_zone, :]).tolist())
+        missing = [v for v in Vehicle.AVERAGE_SPEED if v not in self.speed_profile.vehicle_index]
+        return speeds | {Vehicle.AVERAGE_SPEED[v] for v in missing}
+
+    def precompute(self):
+        """Build every (zone, vehicle speed, threshold) set up front"""
+        for zone in range(len(self.zones)):
+            for speed in self._zone_speeds(zone):
+                for minutes in self.thresholds:
+                    self._cells_within(zone, speed, minutes)
+
+    def zone_id_of(self, lat: float, lng: float) -> Optional[str]:
+        """Id of the zone containing a point, or None"""
+        zone = self.zone_rows.zone_of(lat, lng)
+        return None if zone == self.zone_rows.default_zone else self.zones[zone].zone_id
+
+    def can_reach(self, vehicle_type: str, zone_id: str, lat: float, lng: float, minutes: float,
+                  when: Optional[datetime] = None) -> bool:
+        """True if the vehicle type reaches the point from the zone within minutes"""
+        return geohash.encode(lat, lng, self.precision) in self.reachable_cells(vehicle_type, zone_id, minutes, when)
+
+    def reachable_mask(self, vehicle_type: str, zone_id: str, lats, lngs, minutes: float,
+                       when: Optional[datetime] = None) -> np.ndarray:
+        """Vectorized can_reach for arrays of points"""
+        cells = self.reachable_cells(vehicle_type, zone_id, minutes, when)
+        hashes = geohash.encode_batch(np.ravel(lats), np.ravel(lngs), self.precision)
+        return np.fromiter((h in cells for h in hashes.tolist()), dtype=bool, count=len(hashes))
+
+    def reach_buckets(self, lat1, lng1, lat2, lng2,
+                      when: Optional[datetime] = None) -> Optional[Dict[str, Optional[int]]]:
+        """
+        Smallest threshold within which each vehicle type covers a trip departing at when (default now)
+
+        Returns:
+            Dictionary of vehicle class name -> minutes threshold (None when
+            beyond the largest threshold), or None if the origin is outside
+            every zone
+        """
+        zone = self.zone_rows.zone_of(lat1, lng1)
+        if zone == self.zone_rows.default_zone:
+            return None
+        zone_id = self.zones[zone].zone_id
+        cell = geohash.encode(lat2, lng2, self.precision)
+
+        buckets = {}
+        for vehicle_type in Vehicle.AVERAGE_SPEED:
+            buckets[vehicle_type] = next(
+                (minutes for minutes in self.thresholds
+                 if cell in self.reachable_cells(vehicle_type, zone_id, minutes, when)), None)
+        return buckets
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    index = IsochroneIndex.from_zones_file()
+    index.precompute()
+    print(f"Precomputed {len(index._cache)} isochrones for {len(index.zones)} zones "
+          f"in {time.perf_counter() - start:.2f}s")
+    for zone in index.zones:
+        sizes = ", ".join(f"{m} min: {len(index.reachable_cells('Motorcycle', zone.zone_id, m))}"
+                          for m in index.thresholds)
+        print(f"{zone.zone_id:>12} Motorcycle cells - {sizes}")
@@ -0,0 +1,75 @@
+import math
+import numpy as np
+
+CENTAVOS_PER_PESO = 100
+BASIS_POINTS = 10_000  # Tax rates are held in basis points (0.03 -> 300)
+SURGE_SCALE = 100      # Surge multipliers are held in hundredths (1.3 -> 130)
+
+# Float noise tolerated below the rounding boundary, in centavos: 2.675 pesos
+# is 267.49999999999997 centavos as a float and must still round up
+_EPSILON = 1e-6
+
+
+# Rounding rule: every amount is rounded once, half up, to a whole centavo.
+# Amounts are never negative, so half up and half away from zero agree.
+
+def round_half_up(centavos: float) -> int:
+    """Round a fractional centavo amount to a whole centavo, half up"""
+    return math.floor(centavos + 0.5 + _EPSILON)
+
+
+def round_half_up_batch(centavos) -> np.ndarray:
+    """round_half_up over an array, as int64"""
+    return np.floor(np.asarray(centavos, dtype=np.float64) + (0.5 + _EPSILON)).astype(np.int64)
+
+
+def div_round_half_up(numerator, denominator):
+    """
+    Integer numerator / denominator rounded half up, exactly
+
+    Works on Python ints and on int64 arrays alike; both must be non-negative.
+    """
+    return (2 * numerator + denominator) // (2 * denominator)
+
+
+def to_centavos(pesos: float) -> int:
+    """Peso amount -> whole centavos"""
+    return round_half_up(pesos * CENTAVOS_PER_PESO)
+
+
+def to_centavos_batch(pesos) -> np.ndarray:
+    """to_centavos over an array, as int64"""
+    return round_half_up_batch(np.asarray(pesos, dtype=np.float64) * CENTAVOS_PER_PESO)
+
+
+def to_pesos(centavos) -> float:
+    """Whole centavos -> pesos, for display and for callers that expect floats"""
+    return centavos / CENTAVOS_PER_PESO
+
+
+def to_basis_points(rate: float) -> int:
+    """Rate (e.g. tax 0.03) -> basis points"""
+    return round_half_up(rate * BASIS_POINTS)
+
+
+def to_surge_hundredths(multiplier: float) -> int:
+    """Surge multiplier -> hundredths"""
+    return round_half_up(multiplier * SURGE_SCALE)
+
+
+def format_pesos(centavos: int, thousands: bool = False) -> str:
+    """Whole centavos -> '₱ 219.72' (or '₱ 1,250.00' with thousands separators)"""
+    pesos, rest = divmod(int(centavos), CENTAVOS_PER_PESO)
+    return f"₱ {pesos:,}.{rest:02d}" if thousands else f"₱ {pesos}.{rest:02d}"
+
+
+def parse_centavos(text) -> int:
+    """
+    Price as written to the booking history ('₱ 219.72', '1,250.00', 219.72) -> whole centavos
+
+    Raises:
+        ValueError: If the text is not an amount
+    """
+    if isinstance(text, str):
+        text = text.replace('₱', '').replace(',', '').strip()
+    return to_centavos(float(text))
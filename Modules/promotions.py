@@ -0,0 +1,257 @@
+import json
+import os
+from datetime import datetime
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+import numpy as np
+from . import money
+from .fare_calculation import FareCalculator
+from .vehicle import Vehicle
+from .zone_table import DEFAULT_ZONES_FILE, Zone, ZoneIndex, shared_zone_index
+
+DEFAULT_PROMOTIONS_FILE = os.path.join("data", "promotions.json")
+
+KIND_PERCENT = "percent"
+KIND_FLAT = "flat"
+
+MINUTES_PER_DAY = 24 * 60
+
+# Quotes evaluated per step of evaluate(), bounds the (quotes x promotions) work arrays
+EVALUATE_CHUNK = 4096
+
+
+class Promotion(NamedTuple):
+    promo_id: str
+    kind: str  # KIND_PERCENT (amount is percent off) or KIND_FLAT (amount is pesos off)
+    amount: float
+    vehicle_types: Optional[FrozenSet[str]] = None  # Vehicle class names, None for every vehicle
+    zone_ids: Optional[FrozenSet[str]] = None  # Pickup zones, None for anywhere
+    first_ride: bool = False
+    start_minute: int = 0  # Daily window [start, end) in minutes after midnight, may wrap past midnight
+    end_minute: int = MINUTES_PER_DAY
+    valid_from: Optional[datetime] = None
+    valid_until: Optional[datetime] = None
+    max_discount: Optional[float] = None  # Cap in pesos for percent promotions
+
+
+def _parse_minute(text: str) -> int:
+    """'07:30' -> 450"""
+    hours, minutes = text.split(":")
+    minute = int(hours) * 60 + int(minutes)
+    if not 0 <= minute <= MINUTES_PER_DAY:
+        raise ValueError(f"time of day out of range: {text}")
+    return minute
+
+
+def load_promotions(promotions_file: str = DEFAULT_PROMOTIONS_FILE) -> List[Promotion]:
+    """
+    Read promotions from a JSON file of the form
+    {"promotions": [{"id", "kind": "percent"|"flat", "amount", "vehicles": [...], "zones": [...],
+    "first_ride", "hours": ["07:00", "10:00"], "valid_from", "valid_until", "max_discount"}, ...]}
+
+    Everything but id, kind and amount is optional. Vehicles are class or UI
+    names, zones are zone ids of the zones file and dates are ISO 8601.
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        ValueError: If a promotion is malformed or an id is repeated
+    """
+    with open(promotions_file, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+
+    promotions = []
+    seen = set()
+    for entry in data.get("promotions", []):
+        try:
+            vehicles = entry.get("vehicles")
+            zones = entry.get("zones")
+            start_minute, end_minute = (_parse_minute(entry["hours"][0]), _parse_minute(entry["hours"][1])) \
+                if entry.get("hours") else (0, MINUTES_PER_DAY)
+            promo = Promotion(
+                str(entry["id"]), entry["kind"], float(entry["amount"]),
+                frozenset(FareCalculator.VEHICLE_TYPE_MAPPING.get(v, v) for v in vehicles) if vehicles else None,
+                frozenset(str(z) for z in zones) if zones else None,
+                bool(entry.get("first_ride", False)), start_minute, end_minute,
+                datetime.fromisoformat(entry["valid_from"]) if entry.get("valid_from") else None,
+                datetime.fromisoformat(entry["valid_until"]) if entry.get("valid_until") else None,
+                float(entry["max_discount"]) if entry.get("max_discount") is not None else None
+            )
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid promotion {entry.get('id', '?')}: {e}")
+        if promo.kind not in (KIND_PERCENT, KIND_FLAT):
+            raise ValueError(f"Promotion {promo.promo_id}: kind must be {KIND_PERCENT} or {KIND_FLAT}")
+        if promo.amount < 0 or (promo.kind == KIND_PERCENT and promo.amount > 100):
+            raise ValueError(f"Promotion {promo.promo_id}: amount out of range")
+        if promo.promo_id in seen:
+            raise ValueError(f"Duplicate promotion id {promo.promo_id}")
+        seen.add(promo.promo_id)
+        promotions.append(promo)
+    return promotions
+
+
+class PromotionTable:
+    """
+    Promotions compiled into a decision table
+
+    Every promotion becomes one column of per-rule arrays (kind, amount,
+    cap, daily window, validity, first-ride flag), and a boolean table
+    indexed by [vehicle, pickup zone] lists which promotions can match at
+    all. Evaluating a quote is one table lookup plus a few vectorized
+    operations over the promotions, instead of running every rule's
+    conditions per quote per vehicle. When several promotions match, the
+    largest discount wins; discounts never exceed the fare.
+    """
+
+    def __init__(self, promotions: List[Promotion], zones: List[Zone] = ()):
+        """
+        Args:
+            promotions: Promotions to compile, e.g. from load_promotions
+            zones: ZoneIndex or zone definitions zone-restricted promotions refer to
+
+        Raises:
+            ValueError: If a promotion names an unknown vehicle type or zone
+        """
+        self.promotions = list(promotions)
+        self.vehicle_types = list(Vehicle.AVERAGE_SPEED)
+        self.vehicle_index: Dict[str, int] = {v: i for i, v in enumerate(self.vehicle_types)}
+        self.zone_rows = ZoneIndex.of(zones)
+        zone_index = self.zone_rows.rows
+
+        n = len(self.promotions)
+        self._matches = np.zeros((len(self.vehicle_types), len(self.zone_rows) + 1, n), dtype=bool)
+        for rule, promo in enumerate(self.promotions):
+            vehicles, zones = slice(None), slice(None)
+            if promo.vehicle_types is not None:
+                unknown = promo.vehicle_types - set(self.vehicle_index)
+                if unknown:
+                    raise ValueError(f"Promotion {promo.promo_id}: unknown vehicle types {sorted(unknown)}")
+                vehicles = [self.vehicle_index[v] for v in promo.vehicle_types]
+            if promo.zone_ids is not None:
+                unknown = promo.zone_ids - set(zone_index)
+                if unknown:
+                    raise ValueError(f"Promotion {promo.promo_id}: unknown zones {sorted(unknown)}")
+                zones = [zone_index[z] for z in promo.zone_ids]
+            self._matches[np.ix_(np.arange(len(self.vehicle_types))[vehicles],
+                                 np.arange(len(self.zone_rows) + 1)[zones], [rule])] = True
+
+        self._is_percent = np.array([p.kind == KIND_PERCENT for p in self.promotions], dtype=bool)
+        self._percent_bp = np.array([money.to_basis_points(p.amount / 100) if p.kind == KIND_PERCENT else 0
+                                     for p in self.promotions], dtype=np.int64)
+        self._flat = np.array([money.to_centavos(p.amount) if p.kind == KIND_FLAT else 0
+                               for p in self.promotions], dtype=np.int64)
+        self._cap = np.array([money.to_centavos(p.max_discount) if p.max_discount is not None
+                              else np.iinfo(np.int64).max for p in self.promotions], dtype=np.int64)
+        self._first_ride = np.array([p.first_ride for p in self.promotions], dtype=bool)
+        self._start_minute = np.array([p.start_minute for p in self.promotions], dtype=np.int64)
+        self._end_minute = np.array([p.end_minute for p in self.promotions], dtype=np.int64)
+        self._valid_from = np.array([p.valid_from.timestamp() if p.valid_from else -np.inf
+                                     for p in self.promotions], dtype=np.float64)
+        self._valid_until = np.array([p.valid_until.timestamp() if p.valid_until else np.inf
+                                      for p in self.promotions], dtype=np.float64)
+
+    @classmethod
+    def load(cls, promotions_file: str = DEFAULT_PROMOTIONS_FILE, zones_file: str = DEFAULT_ZONES_FILE):
+        """Compile a promotions file, with the zones of the zones file if it exists"""
+        zones = shared_zone_index(zones_file) if os.path.exists(zones_file) else []
+        return cls(load_promotions(promotions_file), zones)
+
+    @classmethod
+    def load_if_exists(cls, promotions_file: str = DEFAULT_PROMOTIONS_FILE, zones_file: str = DEFAULT_ZONES_FILE):
+        """Compile a promotions file, or return None if it is missing or invalid"""
+        if not os.path.exists(promotions_file):
+            return None
+        try:
+            return cls.load(promotions_file, zones_file)
+        except Exception as e:
+            print(f"Error loading promotions: {e}")
+            return None
+
+    def __len__(self):
+        return len(self.promotions)
+
+    def active_mask(self, when: Optional[datetime] = None, first_ride: bool = False) -> np.ndarray:
+        """Promotions whose validity, daily window and first-ride condition hold"""
+        if when is None:
+            when = datetime.now()
+        minute = when.hour * 60 + when.minute
+        timestamp = when.timestamp()
+
+        start, end = self._start_minute, self._end_minute
+        in_window = np.where(start <= end, (start <= minute) & (minute < end), (minute >= start) | (minute < end))
+        active = in_window & (self._valid_from <= timestamp) & (timestamp <= self._valid_until)
+        if not first_ride:
+            active &= ~self._first_ride
+        return active
+
+    def evaluate(self, total_fare_centavos, vehicle_indices, zone_indices, when: Optional[datetime] = None,
+                 first_ride: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Best discount for arrays of quotes
+
+        Args:
+            total_fare_centavos: Fares before discount
+            vehicle_indices: Indices into self.vehicle_types
+            zone_indices: Pickup zone rows (see zone_of / zones_batch)
+            when: Time of the quotes, defaults to now
+            first_ride: Whether the rider has never ridden before
+
+        Returns:
+            Tuple of (discount in centavos, index into self.promotions or -1) int64 arrays
+        """
+        totals = np.ravel(np.asarray(total_fare_centavos, dtype=np.int64))
+        vehicles = np.ravel(np.asarray(vehicle_indices, dtype=np.int64))
+        zones = np.ravel(np.asarray(zone_indices, dtype=np.int64))
+        discounts = np.zeros(len(totals), dtype=np.int64)
+        rules = np.full(len(totals), -1, dtype=np.int64)
+        if not self.promotions or not len(totals):
+            return discounts, rules
+
+        active = self.active_mask(when, first_ride)
+        if not active.any():
+            return discounts, rules
+
+        for start in range(0, len(totals), EVALUATE_CHUNK):
+            chunk = slice(start, start + EVALUATE_CHUNK)
+            fares = totals[chunk, None]
+            candidates = self._matches[vehicles[chunk], zones[chunk]] & active
+            percent_off = np.minimum(money.div_round_half_up(fares * self._percent_bp, money.BASIS_POINTS), self._cap)
+            off = np.minimum(np.where(self._is_percent, percent_off, self._flat), fares)
+            off = np.where(candidates, off, -1)
+
+            best = off.argmax(axis=1)
+            amount = off[np.arange(len(best)), best]
+            matched = amount > 0
+            discounts[chunk] = np.where(matched, amount, 0)
+            rules[chunk] = np.where(matched, best, -1)
+        return discounts, rules
+
+    def apply(self, fares: Dict, pickup_lat: float, pickup_lng: float, when: Optional[datetime] = None,
+              first_ride: bool = False) -> Dict:
+        """
+        Discount a quote of one or more vehicle types in one evaluation
+
+        Args:
+            fares: UI vehicle name -> FareResult, as from FareCalculator.quote_all;
+                any discount they already carry is replaced
+            pickup_lat, pickup_lng: Pickup point the zone conditions refer to
+            when: Time of the quote, defaults to now
+            first_ride: Whether the rider has never ridden before
+
+        Returns:
+            New dictionary with discounted copies of the matching FareResults
+        """
+        names, totals, vehicles = [], [], []
+        for name, fare in fares.items():
+            vehicle = self.vehicle_index.get(FareCalculator.VEHICLE_TYPE_MAPPING.get(name, name))
+            if fare.error or vehicle is None:
+                continue
+            names.append(name)
+            totals.append(fare.gross_fare_centavos)
+            vehicles.append(vehicle)
+
+        zone = self.zone_rows.zone_of(pickup_lat, pickup_lng)
+        discounts, rules = self.evaluate(totals, vehicles, [zone] * len(names), when, first_ride)
+        discounted = dict(fares)
+        for name, discount, rule in zip(names, discounts.tolist(), rules.tolist()):
+            if rule >= 0:
+                discounted[name] = fares[name].with_promotion(discount, self.promotions[rule].promo_id)
+        return discounted
@@ -0,0 +1,311 @@
+import argparse
+import csv
+import os
+import time
+import numpy as np
+from typing import Dict, Iterator, List, Optional, Tuple
+from . import money
+from .fare_calculation import FareCalculator
+from .tariff import shared_tariff_store
+from .vehicle import Vehicle
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None  # The csv module path below is used instead
+
+DEFAULT_HISTORY_FILE = "Book_history.csv"
+DEFAULT_DRIVER_FILE = os.path.join("data", "driver.csv")
+DEFAULT_CHUNK_SIZE = 100_000
+
+TARIFF_FIELDS = ("base_fare", "cost_per_km", "tax_rate")
+
+
+def current_tariff() -> Dict[str, Dict[str, float]]:
+    """The live tariff as vehicle class name -> {base_fare, cost_per_km, tax_rate}"""
+    tariff = shared_tariff_store.current
+    return {
+        vehicle_type: dict(zip(TARIFF_FIELDS, tariff.rates(vehicle_type)))
+        for vehicle_type in Vehicle.AVERAGE_SPEED
+    }
+
+
+def load_candidate_tariff(tariff_file: str) -> Dict[str, Dict[str, float]]:
+    """
+    Load a candidate tariff from a CSV with columns
+    vehicle_type, base_fare, cost_per_km, tax_rate
+
+    vehicle_type is a class name (e.g. Car4Seater) or UI name. Empty cells
+    and vehicle types missing from the file keep the current tariff.
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        ValueError: If a row is malformed or names an unknown vehicle type
+    """
+    tariff = current_tariff()
+    with open(tariff_file, 'r', encoding='utf-8') as file:
+        rows = csv.DictReader(line for line in file if not line.startswith('#'))
+        for row_no, row in enumerate(rows, start=2):
+            try:
+                name = row['vehicle_type'].strip()
+                vehicle_type = FareCalculator.VEHICLE_TYPE_MAPPING.get(name, name)
+                if vehicle_type not in tariff:
+                    raise ValueError(f"unknown vehicle type {name!r}")
+                for field in TARIFF_FIELDS:
+                    value = (row.get(field) or '').strip()
+                    if value:
+                        tariff[vehicle_type][field] = float(value)
+            except (AttributeError, KeyError, ValueError) as e:
+                raise ValueError(f"{tariff_file}: row {row_no}: invalid tariff record: {e}")
+    return tariff
+
+
+def load_vehicle_name_types(driver_file: str = DEFAULT_DRIVER_FILE) -> Dict[str, str]:
+    """
+    Vehicle model name -> vehicle class name from the driver file
+
+    Older history rows only record the vehicle model (e.g. "Ford Transit").
+    """
+    if not os.path.exists(driver_file):
+        return {}
+    with open(driver_file, 'r', newline='', encoding='utf-8') as file:
+        return {
+            row['vehicle_name'].strip(): FareCalculator.VEHICLE_TYPE_MAPPING.get(row['Vehicle_Type'].strip(),
+                                                                                row['Vehicle_Type'].strip())
+            for row in csv.DictReader(file)
+            if row.get('vehicle_name') and row.get('Vehicle_Type')
+        }
+
+
+def _parse_amount(text: str) -> float:
+    """'0.74 km' / '₱ 219.72' / '1,250.00' -> float"""
+    return float(text.replace('₱', '').replace('km', '').replace(',', '').strip())
+
+
+def _parse_column(values) -> np.ndarray:
+    """Parse a pandas column of amounts, NaN where unparseable"""
+    codes, uniques = pd.factorize(values)
+    parsed = np.empty(len(uniques) + 1, dtype=np.float64)
+    parsed[-1] = np.nan  # factorize codes missing values as -1
+    for i, text in enumerate(uniques.tolist()):
+        try:
+            parsed[i] = _parse_amount(text)
+        except ValueError:
+            parsed[i] = np.nan
+    return parsed[codes]
+
+
+class HistoryRepricer:
+    """
+    Re-price the booking history under a candidate tariff
+
+    The history is streamed in fixed-size chunks: each chunk is parsed into
+    arrays of distance, recorded price and vehicle index, priced with
+    FareCalculator.price_batch (the production formula) and folded into
+    per-vehicle totals, so memory stays bounded however long the file is.
+    """
+
+    def __init__(self, candidate_tariff: Dict[str, Dict[str, float]],
+                 vehicle_name_types: Optional[Dict[str, str]] = None,
+                 statuses: Optional[Tuple[str, ...]] = ("completed",)):
+        """
+        Args:
+            candidate_tariff: Vehicle class name -> {base_fare, cost_per_km, tax_rate}
+            vehicle_name_types: Vehicle model -> class name for rows without Vehicle_Type
+            statuses: Booking statuses to include (lowercase), None for every row
+        """
+        self.vehicle_types: List[str] = list(Vehicle.AVERAGE_SPEED)
+        self.vehicle_index = {v: i for i, v in enumerate(self.vehicle_types)}
+        self.vehicle_name_types = vehicle_name_types or {}
+        self.statuses = None if statuses is None else {status.lower() for status in statuses}
+        self.skipped = 0
+
+        tariff = current_tariff()
+        for vehicle_type, fields in candidate_tariff.items():
+            tariff.setdefault(vehicle_type, {}).update(fields)
+        # Centavos and basis points, as FareCalculator.price_batch expects
+        self.base_fare = np.array([money.to_centavos(tariff[v]['base_fare']) for v in self.vehicle_types],
+                                  dtype=np.int64)
+        self.cost_per_km = np.array([money.to_centavos(tariff[v]['cost_per_km']) for v in self.vehicle_types],
+                                    dtype=np.int64)
+        self.tax_rate = np.array([money.to_basis_points(tariff[v]['tax_rate']) for v in self.vehicle_types],
+                                 dtype=np.int64)
+
+    def _vehicle_of(self, ui_name: str, vehicle_name: str) -> int:
+        """Vehicle index of a history row, -1 if it cannot be determined"""
+        ui_name = ui_name.strip()
+        vehicle_type = FareCalculator.VEHICLE_TYPE_MAPPING.get(ui_name, ui_name)
+        if not vehicle_type:
+            vehicle_type = self.vehicle_name_types.get(vehicle_name.strip(), '')
+        return self.vehicle_index.get(vehicle_type, -1)
+
+    def iter_chunks(self, csv_file: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[np.ndarray, ...]]:
+        """
+        Parse the history into arrays, chunk_size rows at a time
+
+        Uses pandas' C parser when pandas is installed, the csv module otherwise.
+
+        Yields:
+            Tuples of (vehicle_index, distance_km, recorded_price) arrays,
+            prices in int64 centavos; rows that cannot be priced are
+            counted in self.skipped
+        """
+        self.skipped = 0
+        if pd is not None:
+            yield from self._iter_chunks_pandas(csv_file, chunk_size)
+            return
+
+        vehicles, distances, prices = [], [], []
+        vehicle_cache: Dict[Tuple[str, str], int] = {}
+
+        with open(csv_file, 'r', newline='', encoding='utf-8') as file:
+            reader = csv.reader(file)
+            header = next(reader, [])
+            columns = {name: i for i, name in enumerate(header)}
+            if 'Distance' not in columns or 'Price' not in columns:
+                raise ValueError(f"{csv_file} has no Distance/Price columns")
+            distance_col, price_col = columns['Distance'], columns['Price']
+            status_col = columns.get('Status')
+            type_col, name_col = columns.get('Vehicle_Type'), columns.get('Vehicle')
+
+            for row in reader:
+                if len(row) < len(header):
+                    self.skipped += 1
+                    continue
+                if self.statuses is not None and (status_col is None or row[status_col].lower() not in self.statuses):
+                    continue
+
+                key = (row[type_col] if type_col is not None else '', row[name_col] if name_col is not None else '')
+                vehicle = vehicle_cache.get(key)
+                if vehicle is None:
+                    vehicle = vehicle_cache[key] = self._vehicle_of(*key)
+                try:
+                    distance_km = _parse_amount(row[distance_col])
+                    price = money.parse_centavos(row[price_col])
+                except ValueError:
+                    vehicle = -1
+                if vehicle < 0:
+                    self.skipped += 1
+                    continue
+
+                vehicles.append(vehicle)
+                distances.append(distance_km)
+                prices.append(price)
+                if len(vehicles) >= chunk_size:
+                    yield (np.array(vehicles, dtype=np.int64), np.array(distances, dtype=np.float64),
+                           np.array(prices, dtype=np.int64))
+                    vehicles, distances, prices = [], [], []
+
+        if vehicles:
+            yield (np.array(vehicles, dtype=np.int64), np.array(distances, dtype=np.float64),
+                   np.array(prices, dtype=np.int64))
+
+    def _iter_chunks_pandas(self, csv_file: str, chunk_size: int) -> Iterator[Tuple[np.ndarray, ...]]:
+        """iter_chunks with pandas' chunked reader and vectorized parsing"""
+        header = set(pd.read_csv(csv_file, nrows=0).columns)
+        if 'Distance' not in header or 'Price' not in header:
+            raise ValueError(f"{csv_file} has no Distance/Price columns")
+        usecols = [c for c in ('Vehicle_Type', 'Vehicle', 'Distance', 'Price', 'Status') if c in header]
+
+        for frame in pd.read_csv(csv_file, usecols=usecols, dtype=str, keep_default_na=False, chunksize=chunk_size):
+            if self.statuses is not None:
+                if 'Status' not in frame:
+                    continue
+                frame = frame[frame['Status'].str.lower().isin(list(self.statuses))]
+
+            # Parse each distinct value once; the history repeats vehicles, distances and prices a lot
+            type_codes, type_values = pd.factorize(frame['Vehicle_Type'] if 'Vehicle_Type' in frame
+                                                   else pd.Series('', index=frame.index))
+            name_codes, name_values = pd.factorize(frame['Vehicle'] if 'Vehicle' in frame
+                                                   else pd.Series('', index=frame.index))
+            pair_codes = type_codes.astype(np.int64) * max(len(name_values), 1) + name_codes
+            pairs, inverse = np.unique(pair_codes, return_inverse=True)
+            lookup = [self._vehicle_of(type_values[code // max(len(name_values), 1)],
+                                       name_values[code % max(len(name_values), 1)]) for code in pairs.tolist()]
+            vehicles = np.array(lookup, dtype=np.int64)[inverse]
+
+            distances = _parse_column(frame['Distance'])
+            prices = _parse_column(frame['Price'])
+
+            valid = (vehicles >= 0) & ~np.isnan(distances) & ~np.isnan(prices)
+            self.skipped += int(len(valid) - valid.sum())
+            if valid.any():
+                yield vehicles[valid], distances[valid], money.to_centavos_batch(prices[valid])
+
+    def reprice(self, csv_file: str = DEFAULT_HISTORY_FILE, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict:
+        """
+        Re-price every included trip and total the revenue per vehicle type
+
+        Returns:
+            Dictionary with 'by_vehicle' (class name -> trips, current_revenue,
+            candidate_revenue, delta, delta_pct), overall 'totals' and the
+            number of 'skipped' rows
+        """
+        n = len(self.vehicle_types)
+        trips = np.zeros(n, dtype=np.int64)
+        current = np.zeros(n, dtype=np.int64)  # Centavos
+        candidate = np.zeros(n, dtype=np.int64)
+
+        for vehicles, distances, prices in self.iter_chunks(csv_file, chunk_size):
+            _, _, repriced = FareCalculator.price_batch(
+                distances, self.base_fare[vehicles], self.cost_per_km[vehicles], self.tax_rate[vehicles]
+            )
+            trips += np.bincount(vehicles, minlength=n)
+            # float64 bincount sums of whole centavos are exact far beyond any history size
+            current += np.bincount(vehicles, weights=prices, minlength=n).astype(np.int64)
+            candidate += np.bincount(vehicles, weights=repriced, minlength=n).astype(np.int64)
+
+        def summary(trip_count, current_revenue, candidate_revenue):
+            delta = int(candidate_revenue) - int(current_revenue)
+            return {
+                'trips': int(trip_count),
+                'current_revenue': money.to_pesos(int(current_revenue)),
+                'candidate_revenue': money.to_pesos(int(candidate_revenue)),
+                'delta': money.to_pesos(delta),
+                'delta_pct': delta / int(current_revenue) * 100 if current_revenue else 0.0,
+            }
+
+        return {
+            'by_vehicle': {v: summary(trips[i], current[i], candidate[i]) for i, v in enumerate(self.vehicle_types)},
+            'totals': summary(trips.sum(), current.sum(), candidate.sum()),
+            'skipped': self.skipped,
+        }
+
+
+def format_report(report: Dict) -> str:
+    """
+    Revenue delta table for a reprice() result
+
+    Columns are sized to their widest cell and separated by two spaces, so
+    totals over millions of trips stay aligned and never run together.
+    """
+    table = [("Vehicle", "Trips", "Current", "Candidate", "Delta", "Delta %")]
+    rows = list(report['by_vehicle'].items()) + [("TOTAL", report['totals'])]
+    for vehicle_type, row in rows:
+        table.append((str(vehicle_type), f"{row['trips']:,}", f"{row['current_revenue']:,.2f}",
+                      f"{row['candidate_revenue']:,.2f}", f"{row['delta']:+,.2f}", f"{row['delta_pct']:+.2f}%"))
+
+    widths = [max(len(cells[i]) for cells in table) for i in range(len(table[0]))]
+    lines = []
+    for cells in table:
+        label, *values = cells
+        lines.append("  ".join([label.ljust(widths[0])] + [v.rjust(w) for v, w in zip(values, widths[1:])]))
+    lines.append(f"Skipped rows: {report['skipped']}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-price the booking history under a candidate tariff")
+    parser.add_argument("tariff", help="Candidate tariff CSV (vehicle_type,base_fare,cost_per_km,tax_rate)")
+    parser.add_argument("--history", default=DEFAULT_HISTORY_FILE)
+    parser.add_argument("--drivers", default=DEFAULT_DRIVER_FILE,
+                        help="Driver CSV used to resolve vehicle types of older rows")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--all-statuses", action="store_true", help="Include cancelled and pending bookings")
+
+    args = parser.parse_args()
+    start = time.perf_counter()
+    repricer = HistoryRepricer(load_candidate_tariff(args.tariff), load_vehicle_name_types(args.drivers),
+                               statuses=None if args.all_statuses else ("completed",))
+    print(format_report(repricer.reprice(args.history, args.chunk_size)))
+    print(f"Re-priced in {time.perf_counter() - start:.2f}s")
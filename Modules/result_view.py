@@ -0,0 +1,38 @@
+from collections.abc import Mapping
+
+
+class ResultView(Mapping):
+    """
+    Read-only dictionary view over a slotted result object
+
+    Subclasses list their public fields in _FIELDS; result["field"] and
+    result.get("field") read the attribute of the same name, so code written
+    against the old result dictionaries keeps working. Fields listed in
+    _OPTIONAL_FIELDS are only present as keys when they are not None.
+    """
+
+    __slots__ = ()
+    _FIELDS = ()
+    _OPTIONAL_FIELDS = ()
+
+    def _keys(self):
+        return [field for field in self._FIELDS
+                if field not in self._OPTIONAL_FIELDS or getattr(self, field) is not None]
+
+    def __getitem__(self, key):
+        if key not in self._FIELDS or (key in self._OPTIONAL_FIELDS and getattr(self, key) is None):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def to_dict(self) -> dict:
+        """Plain dictionary with every field evaluated"""
+        return {field: getattr(self, field) for field in self._keys()}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
@@ -0,0 +1,118 @@
+import math
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Tuple
+from .distance_calculator import DistanceCalculator
+
+METERS_PER_DEGREE = math.pi * DistanceCalculator.EARTH_RADIUS_KM * 1000 / 180
+
+_MISSING = object()
+
+
+class RouteCache:
+    """
+    Bounded LRU cache for distance, routing and ETA results
+
+    Entries are keyed by a namespace plus origin and destination snapped to
+    a grid of roughly cell_size_m meters, so repeated queries between the
+    same places (campuses, malls, predefined locations) are answered
+    without recomputation. Safe to share between the UI and worker threads.
+    """
+
+    def __init__(self, max_entries: int = 10000, cell_size_m: float = 20):
+        """
+        Args:
+            max_entries: Maximum number of cached results before LRU eviction
+            cell_size_m: Approximate grid cell size used to snap coordinates
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        if cell_size_m <= 0:
+            raise ValueError("cell_size_m must be positive")
+
+        self.max_entries = max_entries
+        self.cell_size_m = cell_size_m
+        self._cell_deg = cell_size_m / METERS_PER_DEGREE
+
+        self._entries: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def snap(self, lat: float, lng: float) -> Tuple[int, int]:
+        """Grid cell of a coordinate"""
+        return (int(math.floor(lat / self._cell_deg)), int(math.floor(lng / self._cell_deg)))
+
+    def make_key(self, namespace: str, lat1, lng1, lat2, lng2, *extra) -> Tuple:
+        """Cache key for an origin/destination pair plus any extra discriminators"""
+        return (namespace,) + self.snap(lat1, lng1) + self.snap(lat2, lng2) + extra
+
+    def get(self, key, default=None):
+        """Look up a key, counting a hit or miss and refreshing its LRU position"""
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entries if full"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, namespace: str, lat1, lng1, lat2, lng2, compute: Callable[[], object], *extra):
+        """
+        Return the cached result for a route or compute and store it
+
+        Args:
+            namespace: Kind of result (e.g. "road_km"), keeps unrelated values apart
+            lat1, lng1, lat2, lng2: Origin and destination
+            compute: Zero-argument callable producing the value on a miss
+            extra: Additional hashable key parts (e.g. vehicle type)
+
+        Returns:
+            The cached or freshly computed value
+        """
+        key = self.make_key(namespace, lat1, lng1, lat2, lng2, *extra)
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def invalidate(self, namespace: str = None):
+        """Drop every entry, or only the entries of one namespace"""
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == namespace]:
+                    del self._entries[key]
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Process-wide cache shared by FareCalculator, ETACalculator and the booking UI
+shared_route_cache = RouteCache()
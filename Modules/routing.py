@@ -0,0 +1,471 @@
+import csv
+import hashlib
+import heapq
+import math
+import os
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from .distance_calculator import DistanceCalculator
+from .spatial_index import GridSpatialIndex
+from .spatial_tree import to_unit_vectors
+
+DEFAULT_GRAPH_FILE = os.path.join("data", "road_graph.csv")
+
+
+class RoadGraph:
+    """
+    Road network held in compact arrays (CSR adjacency)
+
+    The graph file is a plain CSV with two record types:
+        N,node_id,lat,lng
+        E,from_node,to_node,length_m,speed_kph,oneway
+    Lines starting with '#' are comments. Two-way edges (oneway=0) are
+    stored in both directions.
+    """
+
+    def __init__(self, node_ids, lats, lngs, edge_from, edge_to, lengths_m, speeds_kph):
+        self.node_ids = list(node_ids)
+        self.node_index: Dict[str, int] = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lngs = np.asarray(lngs, dtype=np.float64)
+        self.points = to_unit_vectors(self.lats, self.lngs).reshape(-1, 3)
+
+        edge_from = np.asarray(edge_from, dtype=np.int32)
+        edge_to = np.asarray(edge_to, dtype=np.int32)
+        speeds_kph = np.asarray(speeds_kph, dtype=np.float32)
+
+        # An edge is never shorter than the straight line between its ends,
+        # which keeps the great-circle heuristic consistent
+        straight_m = DistanceCalculator.calculate_distance_km_batch(
+            self.lats[edge_from], self.lngs[edge_from], self.lats[edge_to], self.lngs[edge_to]) * 1000
+        lengths_m = np.maximum(np.asarray(lengths_m, dtype=np.float64), straight_m)
+        times_s = lengths_m / (speeds_kph / 3.6)
+
+        self.max_speed_kph = float(speeds_kph.max()) if len(speeds_kph) else 1.0
+
+        self.forward = self._build_csr(edge_from, edge_to, lengths_m, times_s)
+        self.backward = self._build_csr(edge_to, edge_from, lengths_m, times_s)
+
+        self._node_index_grid = None
+        self._fingerprint = None
+
+    def _build_csr(self, sources, targets, lengths_m, times_s):
+        """Sort edges by source node into offsets/targets/weights arrays"""
+        order = np.argsort(sources, kind="stable")
+        counts = np.bincount(sources, minlength=len(self.node_ids))
+        offsets = np.zeros(len(self.node_ids) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return {
+            "offsets": offsets,
+            "targets": targets[order].astype(np.int32),
+            "length_m": lengths_m[order].astype(np.float32),
+            "time_s": times_s[order].astype(np.float32),
+        }
+
+    @property
+    def node_count(self):
+        return len(self.node_ids)
+
+    @property
+    def edge_count(self):
+        return len(self.forward["targets"])
+
+    @property
+    def fingerprint(self) -> str:
+        """Digest of the node positions and edges, identifying the distances this graph produces"""
+        if self._fingerprint is None:
+            digest = hashlib.sha1()
+            for array in (self.lats, self.lngs, self.forward["offsets"], self.forward["targets"],
+                          self.forward["length_m"], self.forward["time_s"]):
+                digest.update(np.ascontiguousarray(array).tobytes())
+            self._fingerprint = digest.hexdigest()[:16]
+        return self._fingerprint
+
+    @classmethod
+    def load(cls, graph_file: str = DEFAULT_GRAPH_FILE):
+        """
+        Load a road graph from a CSV graph file
+
+        Raises:
+            FileNotFoundError: If the graph file does not exist
+            ValueError: If the file references unknown nodes or is malformed
+        """
+        node_ids, lats, lngs = [], [], []
+        raw_edges = []
+
+        with open(graph_file, 'r', encoding='utf-8') as file:
+            for line_no, row in enumerate(csv.reader(file), start=1):
+                if not row or row[0].startswith('#'):
+                    continue
+                try:
+                    if row[0] == 'N':
+                        node_ids.append(row[1].strip())
+                        lats.append(float(row[2]))
+                        lngs.append(float(row[3]))
+                    elif row[0] == 'E':
+                        oneway = len(row) > 5 and row[5].strip() in ('1', 'true', 'yes')
+                        raw_edges.append((row[1].strip(), row[2].strip(), float(row[3]), float(row[4]), oneway))
+                    else:
+                        raise ValueError(f"unknown record type {row[0]!r}")
+                except (IndexError, ValueError) as e:
+                    raise ValueError(f"{graph_file}:{line_no}: invalid graph record: {e}")
+
+        node_index = {node_id: i for i, node_id in enumerate(node_ids)}
+        edge_from, edge_to, lengths, speeds = [], [], [], []
+        for source, target, length_m, speed_kph, oneway in raw_edges:
+            if source not in node_index or target not in node_index:
+                raise ValueError(f"Edge {source}->{target} references an unknown node")
+            if speed_kph <= 0:
+                raise ValueError(f"Edge {source}->{target} has non-positive speed")
+            pairs = [(source, target)] if oneway else [(source, target), (target, source)]
+            for a, b in pairs:
+                edge_from.append(node_index[a])
+                edge_to.append(node_index[b])
+                lengths.append(length_m)
+                speeds.append(speed_kph)
+
+        return cls(node_ids, lats, lngs, edge_from, edge_to, lengths, speeds)
+
+    def nearest_node(self, lat: float, lng: float) -> Tuple[int, float]:
+        """
+        Snap a coordinate to the closest graph node
+
+        Returns:
+            Tuple of (node_index, distance_km)
+        """
+        if self._node_index_grid is None:
+            grid = GridSpatialIndex(cell_size_deg=0.002)
+            for i in range(self.node_count):
+                grid.update(i, float(self.lats[i]), float(self.lngs[i]))
+            self._node_index_grid = grid
+
+        match = self._node_index_grid.nearest(lat, lng, k=1)
+        if not match:
+            raise ValueError("Road graph has no nodes")
+        return match[0]
+
+
+class RoadRouter:
+    """
+    Shortest road distance / travel time queries with bidirectional A*
+
+    Everything runs from memory; there are no network calls.
+    """
+
+    METRIC_DISTANCE = "distance"
+    METRIC_TIME = "time"
+
+    ACCESS_SPEED_KPH = 20  # Speed assumed between a coordinate and its snapped node
+    MAX_SNAP_KM = 1.0  # Points farther than this from every node are off the network
+
+    def __init__(self, graph: RoadGraph, max_snap_km: float = MAX_SNAP_KM):
+        """
+        Args:
+            graph: Road network to route on
+            max_snap_km: Largest straight-line access leg to the nearest node;
+                routes from or to points farther away are not answered, so
+                callers fall back to straight-line distance
+        """
+        self.graph = graph
+        self.max_snap_km = max_snap_km
+
+        # Plain lists are much faster than NumPy scalars in the search loop
+        self._fwd = self._as_lists(graph.forward)
+        self._bwd = self._as_lists(graph.backward)
+        self._xyz = graph.points.tolist()
+        
+        self.hierarchy = None
+
+    @classmethod
+    def from_file(cls, graph_file: str = DEFAULT_GRAPH_FILE, max_snap_km: float = MAX_SNAP_KM):
+        """Load a graph file and build a router for it"""
+        return cls(RoadGraph.load(graph_file), max_snap_km)
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        Identifies the distances this router returns, for cache keys
+
+        Unlike id(router), which can be reused by a new router once the old
+        one is garbage collected, equal fingerprints mean the same graph, query
+        method and snap limit.
+        """
+        method = 'ch' if self.hierarchy is not None else 'astar'
+        return f"{self.graph.fingerprint}:{method}:{self.max_snap_km!r}"
+
+    def attach_hierarchy(self, hierarchy):
+        """
+        Answer distance-only queries from a ContractionHierarchy
+        
+        Raises:
+            ValueError: If the hierarchy was built from a different graph
+        """
+        if hierarchy is not None and not hierarchy.matches(self.graph):
+            raise ValueError("Contraction hierarchy does not match the road graph")
+        self.hierarchy = hierarchy
+    
+    @staticmethod
+    def _as_lists(csr):
+        return (csr["offsets"].tolist(), csr["targets"].tolist(),
+                csr["length_m"].tolist(), csr["time_s"].tolist())
+
+    def _great_circle_m(self, a: int, b: int) -> float:
+        """Great-circle distance between two nodes in meters"""
+        xa, ya, za = self._xyz[a]
+        xb, yb, zb = self._xyz[b]
+        chord = math.sqrt((xa - xb) ** 2 + (ya - yb) ** 2 + (za - zb) ** 2)
+        return 2000.0 * DistanceCalculator.EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+    def _weight_index(self, metric):
+        if metric == self.METRIC_DISTANCE:
+            return 2, 1.0
+        if metric == self.METRIC_TIME:
+            # Lower bound on seconds: straight line at the fastest road speed
+            return 3, 3.6 / self.graph.max_speed_kph
+        raise ValueError(f"Unknown metric: {metric}")
+
+    def dijkstra(self, source: int, target: int, metric: str = METRIC_DISTANCE) -> float:
+        """
+        Plain unidirectional Dijkstra, kept as the reference for benchmarks
+        
+        Returns:
+            Cost in meters or seconds, inf if unreachable
+        """
+        w_idx, _ = self._weight_index(metric)
+        offsets, targets, weights = self._fwd[0], self._fwd[1], self._fwd[w_idx]
+        
+        inf = float("inf")
+        dist = {source: 0.0}
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if u == target:
+                return d
+            if d > dist[u]:
+                continue
+            for e in range(offsets[u], offsets[u + 1]):
+                v = targets[e]
+                nd = d + weights[e]
+                if nd < dist.get(v, inf):
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+        return inf
+    
+    def costs_from(self, source: int, metric: str = METRIC_DISTANCE, max_cost: float = float("inf")) -> np.ndarray:
+        """
+        One-to-all Dijkstra from a node index
+
+        Args:
+            source: Start node index
+            metric: "distance" (meters) or "time" (seconds)
+            max_cost: Stop once every node within this cost is settled
+
+        Returns:
+            Array of costs per node, inf for nodes unreachable within max_cost
+        """
+        w_idx, _ = self._weight_index(metric)
+        offsets, targets, weights = self._fwd[0], self._fwd[1], self._fwd[w_idx]
+        
+        inf = float("inf")
+        dist = {source: 0.0}
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > max_cost:
+                break
+            if d > dist[u]:
+                continue
+            for e in range(offsets[u], offsets[u + 1]):
+                v = targets[e]
+                nd = d + weights[e]
+                if nd < dist.get(v, inf):
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+        
+        costs = np.full(self.graph.node_count, inf)
+        for node, d in dist.items():
+            if d <= max_cost:
+                costs[node] = d
+        return costs
+    
+    def shortest_path(self, source: int, target: int, metric: str = METRIC_DISTANCE) -> Tuple[float, List[int]]:
+        """
+        Bidirectional A* between two node indices
+
+        Uses the symmetric average potential p(v) = (h_t(v) - h_s(v)) / 2,
+        so both searches see the same consistent reduced costs and can stop
+        as soon as the two frontier keys add up to the best meeting cost.
+
+        Returns:
+            Tuple of (cost, node_path); cost is meters or seconds depending
+            on metric, and (inf, []) if the target is unreachable
+        """
+        if source == target:
+            return 0.0, [source]
+
+        w_idx, scale = self._weight_index(metric)
+        scale *= 1 - 1e-6  # Guard against float32 weights rounding below the heuristic
+        f_off, f_tgt, f_w = self._fwd[0], self._fwd[1], self._fwd[w_idx]
+        b_off, b_tgt, b_w = self._bwd[0], self._bwd[1], self._bwd[w_idx]
+        gc = self._great_circle_m
+
+        potentials: Dict[int, float] = {}
+
+        def potential(v):
+            p = potentials.get(v)
+            if p is None:
+                p = 0.5 * scale * (gc(v, target) - gc(source, v))
+                potentials[v] = p
+            return p
+
+        inf = float("inf")
+        g_f = {source: 0.0}
+        g_b = {target: 0.0}
+        pred_f = {source: -1}
+        pred_b = {target: -1}
+        closed_f, closed_b = set(), set()
+        heap_f = [(potential(source), source)]
+        heap_b = [(-potential(target), target)]
+        best, meet = inf, -1
+
+        while heap_f and heap_b:
+            if heap_f[0][0] + heap_b[0][0] >= best:
+                break
+
+            if len(heap_f) <= len(heap_b):
+                _, u = heapq.heappop(heap_f)
+                if u in closed_f:
+                    continue
+                closed_f.add(u)
+                gu = g_f[u]
+                for e in range(f_off[u], f_off[u + 1]):
+                    v = f_tgt[e]
+                    ng = gu + f_w[e]
+                    if ng < g_f.get(v, inf):
+                        g_f[v] = ng
+                        pred_f[v] = u
+                        heapq.heappush(heap_f, (ng + potential(v), v))
+                    gb = g_b.get(v)
+                    if gb is not None and ng + gb < best:
+                        best, meet = ng + gb, v
+            else:
+                _, u = heapq.heappop(heap_b)
+                if u in closed_b:
+                    continue
+                closed_b.add(u)
+                gu = g_b[u]
+                for e in range(b_off[u], b_off[u + 1]):
+                    v = b_tgt[e]
+                    ng = gu + b_w[e]
+                    if ng < g_b.get(v, inf):
+                        g_b[v] = ng
+                        pred_b[v] = u
+                        heapq.heappush(heap_b, (ng - potential(v), v))
+                    gf = g_f.get(v)
+                    if gf is not None and ng + gf < best:
+                        best, meet = ng + gf, v
+
+        if meet < 0:
+            return inf, []
+
+        path = []
+        node = meet
+        while node != -1:
+            path.append(node)
+            node = pred_f[node]
+        path.reverse()
+        node = pred_b[meet]
+        while node != -1:
+            path.append(node)
+            node = pred_b[node]
+        return best, path
+
+    def path_totals(self, path: List[int]) -> Tuple[float, float]:
+        """Sum length (m) and time (s) along a node path, using the cheapest parallel edge"""
+        offsets, targets, lengths, times = self._fwd
+        total_m = total_s = 0.0
+        for u, v in zip(path, path[1:]):
+            options = [(lengths[e], times[e]) for e in range(offsets[u], offsets[u + 1]) if targets[e] == v]
+            length_m, time_s = min(options)
+            total_m += length_m
+            total_s += time_s
+        return total_m, total_s
+
+    def route(self, lat1, lng1, lat2, lng2, metric: str = METRIC_DISTANCE) -> Optional[Dict]:
+        """
+        Road route between two coordinates
+
+        Both coordinates are snapped to their nearest node; the straight-line
+        access legs are included at ACCESS_SPEED_KPH.
+
+        Returns:
+            Dictionary with distance_km, duration_minutes, node_path and
+            snap distances, or None if no road path exists or either point
+            is more than max_snap_km from the network
+        """
+        source, snap_start_km = self.graph.nearest_node(lat1, lng1)
+        target, snap_end_km = self.graph.nearest_node(lat2, lng2)
+        if max(snap_start_km, snap_end_km) > self.max_snap_km:
+            return None
+
+        cost, path = self.shortest_path(source, target, metric)
+        if not path:
+            return None
+
+        road_m, road_s = self.path_totals(path)
+        access_km = snap_start_km + snap_end_km
+        access_minutes = access_km / self.ACCESS_SPEED_KPH * 60
+
+        return {
+            'distance_km': road_m / 1000 + access_km,
+            'duration_minutes': road_s / 60 + access_minutes,
+            'road_distance_km': road_m / 1000,
+            'snap_start_km': snap_start_km,
+            'snap_end_km': snap_end_km,
+            'node_path': [self.graph.node_ids[i] for i in path],
+            'metric': metric,
+        }
+
+    def road_distance_m(self, source: int, target: int) -> float:
+        """Shortest road distance in meters between two node indices, inf if unreachable"""
+        if self.hierarchy is not None and self.hierarchy.metric == self.METRIC_DISTANCE:
+            return self.hierarchy.query(source, target)
+        _, path = self.shortest_path(source, target, self.METRIC_DISTANCE)
+        if not path:
+            return float("inf")
+        return self.path_totals(path)[0]
+
+    def route_distance_km(self, lat1, lng1, lat2, lng2, route_cache=None) -> Optional[float]:
+        """
+        Shortest road distance in kilometers, or None if unreachable or
+        either point is more than max_snap_km from the network
+
+        Args:
+            route_cache: Optional RouteCache for the node-to-node road part.
+                It is keyed on the snapped nodes, not on nearby coordinates,
+                and the access legs are always measured from the exact
+                points, so a trip's distance never depends on what was
+                cached before.
+        """
+        source, snap_start_km = self.graph.nearest_node(lat1, lng1)
+        target, snap_end_km = self.graph.nearest_node(lat2, lng2)
+        if max(snap_start_km, snap_end_km) > self.max_snap_km:
+            return None
+
+        if route_cache is None:
+            road_m = self.road_distance_m(source, target)
+        else:
+            key = ("road_m", source, target, self.fingerprint)
+            road_m = route_cache.get(key)
+            if road_m is None:
+                road_m = self.road_distance_m(source, target)
+                route_cache.put(key, road_m)
+
+        if road_m == float("inf"):
+            return None
+        return road_m / 1000 + snap_start_km + snap_end_km
+
+    def route_duration_minutes(self, lat1, lng1, lat2, lng2) -> Optional[float]:
+        """Fastest road travel time in minutes, or None if unreachable"""
+        result = self.route(lat1, lng1, lat2, lng2, self.METRIC_TIME)
+        return result['duration_minutes'] if result else None
@@ -0,0 +1,212 @@
+import math
+import numpy as np
+from typing import Callable, Dict, Hashable, List, Optional, Set, Tuple
+from .distance_calculator import DistanceCalculator
+
+KM_PER_DEGREE = math.pi * DistanceCalculator.EARTH_RADIUS_KM / 180  # ~111.19 km per degree of latitude
+
+
+class GridSpatialIndex:
+    """
+    Uniform latitude/longitude bucket index for live positions (e.g. drivers)
+
+    Positions are hashed into square cells of cell_size_deg degrees, so moving
+    an item is O(1) and proximity queries only look at the cells around the
+    query point instead of scanning every item.
+    """
+
+    def __init__(self, cell_size_deg: float = 0.005):
+        """
+        Args:
+            cell_size_deg: Cell edge in degrees (0.005 is roughly 550 m)
+        """
+        if cell_size_deg <= 0:
+            raise ValueError("cell_size_deg must be positive")
+
+        self.cell_size_deg = cell_size_deg
+        self._cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self._positions: Dict[Hashable, Tuple[float, float, Tuple[int, int]]] = {}
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, item_id):
+        return item_id in self._positions
+
+    def _cell_of(self, lat, lng) -> Tuple[int, int]:
+        return (int(math.floor(lat / self.cell_size_deg)),
+                int(math.floor(lng / self.cell_size_deg)))
+
+    def update(self, item_id: Hashable, lat: float, lng: float):
+        """Insert an item or move it to a new position in O(1)"""
+        new_cell = self._cell_of(lat, lng)
+        old = self._positions.get(item_id)
+
+        if old is not None and old[2] != new_cell:
+            self._discard_from_cell(item_id, old[2])
+
+        if old is None or old[2] != new_cell:
+            self._cells.setdefault(new_cell, set()).add(item_id)
+
+        self._positions[item_id] = (lat, lng, new_cell)
+
+    def remove(self, item_id: Hashable) -> bool:
+        """Remove an item; returns False if it was not indexed"""
+        old = self._positions.pop(item_id, None)
+        if old is None:
+            return False
+        self._discard_from_cell(item_id, old[2])
+        return True
+
+    def _discard_from_cell(self, item_id, cell):
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.discard(item_id)
+            if not bucket:
+                del self._cells[cell]
+
+    def clear(self):
+        """Remove all items"""
+        self._cells.clear()
+        self._positions.clear()
+
+    def get_position(self, item_id: Hashable) -> Optional[Tuple[float, float]]:
+        """Get the indexed (lat, lng) of an item"""
+        entry = self._positions.get(item_id)
+        return (entry[0], entry[1]) if entry else None
+
+    def _distances_to(self, lat, lng, item_ids) -> np.ndarray:
+        """Haversine distances from a point to a list of indexed items"""
+        positions = self._positions
+        lats = np.fromiter((positions[i][0] for i in item_ids), dtype=np.float64, count=len(item_ids))
+        lngs = np.fromiter((positions[i][1] for i in item_ids), dtype=np.float64, count=len(item_ids))
+        return DistanceCalculator.calculate_distance_km_batch(lat, lng, lats, lngs)
+
+    def _lng_cells_for(self, lat, km):
+        """Number of longitude cells needed to cover km at the given latitude"""
+        cos_lat = max(math.cos(math.radians(min(abs(lat) + 2 * self.cell_size_deg, 89.9))), 1e-6)
+        return int(math.ceil(km / (KM_PER_DEGREE * cos_lat * self.cell_size_deg)))
+
+    def within_radius(self, lat: float, lng: float, radius_km: float,
+                      predicate: Optional[Callable[[Hashable], bool]] = None) -> List[Tuple[Hashable, float]]:
+        """
+        Find all items within radius_km of a point
+
+        Args:
+            lat, lng: Query point
+            radius_km: Search radius in kilometers
+            predicate: Optional filter called with each candidate item id
+
+        Returns:
+            List of (item_id, distance_km) sorted by distance
+        """
+        ci, cj = self._cell_of(lat, lng)
+        span_i = int(math.ceil(radius_km / (KM_PER_DEGREE * self.cell_size_deg)))
+        span_j = self._lng_cells_for(lat + math.copysign(radius_km / KM_PER_DEGREE, lat), radius_km)
+
+        candidates = []
+        cells = self._cells
+        for i in range(ci - span_i, ci + span_i + 1):
+            for j in range(cj - span_j, cj + span_j + 1):
+                bucket = cells.get((i, j))
+                if bucket:
+                    candidates.extend(bucket)
+
+        if predicate is not None:
+            candidates = [c for c in candidates if predicate(c)]
+        if not candidates:
+            return []
+
+        distances = self._distances_to(lat, lng, candidates)
+        order = np.argsort(distances)
+        return [(candidates[idx], float(distances[idx])) for idx in order if distances[idx] <= radius_km]
+
+    def nearest(self, lat: float, lng: float, k: int = 1,
+                predicate: Optional[Callable[[Hashable], bool]] = None,
+                max_radius_km: Optional[float] = None) -> List[Tuple[Hashable, float]]:
+        """
+        Find the k nearest items to a point by expanding rings of cells
+
+        Args:
+            lat, lng: Query point
+            k: Number of items to return
+            predicate: Optional filter called with each candidate item id
+            max_radius_km: Optional cut-off distance
+
+        Returns:
+            List of up to k (item_id, distance_km) tuples sorted by distance
+        """
+        if k <= 0 or not self._positions:
+            return []
+
+        ci, cj = self._cell_of(lat, lng)
+        cell_km_lat = KM_PER_DEGREE * self.cell_size_deg
+        cells = self._cells
+        total = len(self._positions)
+
+        found_ids: List[Hashable] = []
+        found_dist = np.empty(0, dtype=np.float64)
+        scanned = 0
+        ring = 0
+
+        while True:
+            # On a sparse grid, walking empty rings costs more than a full scan
+            if ring > 0 and 8 * ring > len(cells):
+                return self._nearest_by_scan(lat, lng, k, predicate, max_radius_km)
+
+            ring_ids = []
+            if ring == 0:
+                ring_cells = [(ci, cj)]
+            else:
+                ring_cells = [(ci + di, cj + dj)
+                              for di in range(-ring, ring + 1)
+                              for dj in (-ring, ring)]
+                ring_cells += [(ci + di, cj + dj)
+                               for di in (-ring, ring)
+                               for dj in range(-ring + 1, ring)]
+
+            for cell in ring_cells:
+                bucket = cells.get(cell)
+                if bucket:
+                    scanned += len(bucket)
+                    ring_ids.extend(bucket)
+
+            if predicate is not None:
+                ring_ids = [i for i in ring_ids if predicate(i)]
+            if ring_ids:
+                found_ids.extend(ring_ids)
+                found_dist = np.concatenate([found_dist, self._distances_to(lat, lng, ring_ids)])
+
+            # Everything outside the scanned square is at least this far away
+            cos_lat = math.cos(math.radians(min(abs(lat) + (ring + 1) * self.cell_size_deg, 89.9)))
+            safe_km = ring * cell_km_lat * min(1.0, cos_lat)
+
+            if max_radius_km is not None and safe_km >= max_radius_km:
+                break
+            if len(found_ids) >= k and np.partition(found_dist, k - 1)[k - 1] <= safe_km:
+                break
+            if scanned >= total:
+                break
+            ring += 1
+
+        if not found_ids:
+            return []
+
+        order = np.argsort(found_dist)[:k]
+        results = [(found_ids[idx], float(found_dist[idx])) for idx in order]
+        if max_radius_km is not None:
+            results = [r for r in results if r[1] <= max_radius_km]
+        return results
+
+    def _nearest_by_scan(self, lat, lng, k, predicate, max_radius_km):
+        """Brute-force k-nearest over every indexed item"""
+        candidates = list(self._positions)
+        if predicate is not None:
+            candidates = [c for c in candidates if predicate(c)]
+        if not candidates:
+            return []
+
+        distances = self._distances_to(lat, lng, candidates)
+        order = np.argsort(distances)[:k]
+        return [(candidates[idx], float(distances[idx])) for idx in order
+                if max_radius_km is None or distances[idx] <= max_radius_km]
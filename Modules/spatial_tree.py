@@ -0,0 +1,377 @@
+import heapq
+import math
+import time
+import numpy as np
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+from .distance_calculator import DistanceCalculator
+
+
+def to_unit_vectors(lats, lngs) -> np.ndarray:
+    """
+    Convert latitude/longitude arrays to 3D points on the unit sphere
+
+    The straight-line (chord) distance c between two unit vectors maps to the
+    great-circle distance as 2 * R * asin(c / 2), which is exactly the
+    Haversine result, so ordering by chord length is ordering by distance.
+    """
+    lat_rad = np.radians(np.asarray(lats, dtype=np.float64))
+    lng_rad = np.radians(np.asarray(lngs, dtype=np.float64))
+    cos_lat = np.cos(lat_rad)
+    return np.stack([cos_lat * np.cos(lng_rad), cos_lat * np.sin(lng_rad), np.sin(lat_rad)], axis=-1)
+
+
+def km_to_chord(distance_km: float) -> float:
+    """Chord length on the unit sphere for a great-circle distance in km"""
+    angle = distance_km / DistanceCalculator.EARTH_RADIUS_KM
+    if angle >= math.pi:
+        return 2.0
+    return 2.0 * math.sin(angle / 2.0)
+
+
+class SphericalKDTree:
+    """
+    Static KD-tree over unit-sphere coordinates for proximity search
+
+    Drop-in alternative to GridSpatialIndex: it exposes the same update /
+    remove / nearest / within_radius methods, but keeps positions in a tree
+    that is rebuilt in bulk (at most every rebuild_interval seconds) instead
+    of maintaining buckets on every move. Items moved since the last build
+    are held in a small pending set that every query scans directly, so
+    results always reflect the latest positions; the rebuild only restores
+    the tree's pruning. Suited to fleets whose layout changes slowly
+    compared with query volume, and to large-k queries.
+    """
+
+    def __init__(self, leaf_size: int = 16, rebuild_interval: float = 2.0, max_pending: int = 256):
+        """
+        Args:
+            leaf_size: Maximum number of points stored in a leaf
+            rebuild_interval: Minimum seconds between automatic rebuilds
+            max_pending: Pending moves that force a rebuild before the interval has passed
+        """
+        self.leaf_size = max(1, leaf_size)
+        self.rebuild_interval = rebuild_interval
+        self.max_pending = max_pending
+
+        self._positions: Dict[Hashable, Tuple[float, float]] = {}
+        self._pending: Dict[Hashable, Tuple[float, float]] = {}  # Moved or added since the last build
+        self._dirty = False
+        self._last_build = 0.0
+
+        # Snapshot arrays of the last build, in tree order
+        self._ids: List[Hashable] = []
+        self._lats = np.empty(0)
+        self._lngs = np.empty(0)
+        self._points = np.empty((0, 3))
+
+        # Flat node arrays: [start, end) slice into the points, child indices (-1 for leaves)
+        self._node_start = np.empty(0, dtype=np.int64)
+        self._node_end = np.empty(0, dtype=np.int64)
+        self._node_left = np.empty(0, dtype=np.int64)
+        self._node_right = np.empty(0, dtype=np.int64)
+        self._node_min = np.empty((0, 3))
+        self._node_max = np.empty((0, 3))
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, item_id):
+        return item_id in self._positions
+
+    def update(self, item_id: Hashable, lat: float, lng: float):
+        """Record a new position; queries see it immediately through the pending set"""
+        self._positions[item_id] = (lat, lng)
+        self._pending[item_id] = (lat, lng)
+        self._dirty = True
+
+    def remove(self, item_id: Hashable) -> bool:
+        """Remove an item; it is filtered out of queries immediately"""
+        if self._positions.pop(item_id, None) is None:
+            return False
+        self._pending.pop(item_id, None)
+        self._dirty = True
+        return True
+
+    @property
+    def pending_count(self) -> int:
+        """Items whose position changed since the last build (scanned linearly by every query)"""
+        return len(self._pending)
+
+    def clear(self):
+        """Remove all items"""
+        self._positions.clear()
+        self.rebuild()
+
+    def get_position(self, item_id: Hashable) -> Optional[Tuple[float, float]]:
+        """Get the latest recorded (lat, lng) of an item"""
+        return self._positions.get(item_id)
+
+    def rebuild(self, item_ids=None, lats=None, lngs=None):
+        """
+        Rebuild the tree, optionally replacing every position in bulk
+
+        Args:
+            item_ids: Optional sequence of ids replacing the current contents
+            lats, lngs: Arrays of positions matching item_ids
+        """
+        if item_ids is not None:
+            self._positions = {item_id: (float(lat), float(lng))
+                               for item_id, lat, lng in zip(item_ids, lats, lngs)}
+
+        ids = list(self._positions)
+        coords = np.array([self._positions[i] for i in ids], dtype=np.float64).reshape(-1, 2)
+        points = to_unit_vectors(coords[:, 0], coords[:, 1]).reshape(-1, 3)
+
+        order = np.arange(len(ids))
+        starts, ends, lefts, rights, mins, maxs = [], [], [], [], [], []
+
+        def build(lo, hi):
+            node = len(starts)
+            starts.append(lo)
+            ends.append(hi)
+            lefts.append(-1)
+            rights.append(-1)
+            block = points[order[lo:hi]]
+            mins.append(block.min(axis=0) if hi > lo else np.zeros(3))
+            maxs.append(block.max(axis=0) if hi > lo else np.zeros(3))
+
+            if hi - lo > self.leaf_size:
+                # Split on the widest dimension at the median
+                dim = int(np.argmax(maxs[node] - mins[node]))
+                mid = (lo + hi) // 2
+                part = np.argpartition(block[:, dim], mid - lo)
+                order[lo:hi] = order[lo:hi][part]
+                lefts[node] = build(lo, mid)
+                rights[node] = build(mid, hi)
+            return node
+
+        build(0, len(ids))
+
+        self._ids = [ids[i] for i in order]
+        self._lats = coords[order, 0]
+        self._lngs = coords[order, 1]
+        self._points = points[order]
+        self._node_start = np.array(starts, dtype=np.int64)
+        self._node_end = np.array(ends, dtype=np.int64)
+        self._node_left = np.array(lefts, dtype=np.int64)
+        self._node_right = np.array(rights, dtype=np.int64)
+        self._node_min = np.array(mins).reshape(-1, 3)
+        self._node_max = np.array(maxs).reshape(-1, 3)
+
+        self._pending.clear()
+        self._dirty = False
+        self._last_build = time.monotonic()
+
+    def _ensure_fresh(self):
+        """Rebuild if positions changed and the rebuild interval has passed or too many moves are pending"""
+        if self._dirty and (not self._ids or len(self._pending) > self.max_pending
+                            or time.monotonic() - self._last_build >= self.rebuild_interval):
+            self.rebuild()
+
+    def _pending_candidates(self, point, predicate) -> Tuple[List[Hashable], np.ndarray, np.ndarray, np.ndarray]:
+        """Ids, positions and squared chord distances of pending items passing the predicate"""
+        ids = [item_id for item_id in self._pending if predicate is None or predicate(item_id)]
+        coords = np.array([self._pending[item_id] for item_id in ids], dtype=np.float64).reshape(-1, 2)
+        diff = to_unit_vectors(coords[:, 0], coords[:, 1]).reshape(-1, 3) - point
+        return ids, coords[:, 0], coords[:, 1], np.einsum('ij,ij->i', diff, diff)
+
+    def _box_distance_sq(self, node, point) -> float:
+        """Squared distance from a point to a node's bounding box"""
+        below = self._node_min[node] - point
+        above = point - self._node_max[node]
+        gap = np.maximum(np.maximum(below, above), 0.0)
+        return float(gap @ gap)
+
+    def _leaf_candidates(self, node, point, predicate):
+        """Indices and squared chord distances of live points in a leaf"""
+        lo, hi = self._node_start[node], self._node_end[node]
+        diff = self._points[lo:hi] - point
+        dist_sq = np.einsum('ij,ij->i', diff, diff)
+        for offset in range(hi - lo):
+            idx = lo + offset
+            item_id = self._ids[idx]
+            if item_id not in self._positions or item_id in self._pending:
+                continue  # Removed since the last build, or moved and answered from the pending set
+            if predicate is not None and not predicate(item_id):
+                continue
+            yield idx, float(dist_sq[offset])
+
+    def _results(self, lat, lng, indices, pending=None) -> List[Tuple[Hashable, float]]:
+        """
+        Attach Haversine distances so results agree with DistanceCalculator exactly
+
+        Indices >= 0 are tree positions; index -1 - j is entry j of pending,
+        the (ids, lats, lngs) of _pending_candidates.
+        """
+        if not len(indices):
+            return []
+        indices = np.asarray(indices, dtype=np.int64)
+        ids, lats, lngs = self._ids, self._lats, self._lngs
+        if pending is not None and len(pending[0]):
+            ids = ids + pending[0]
+            lats = np.concatenate([lats, pending[1]])
+            lngs = np.concatenate([lngs, pending[2]])
+            indices = np.where(indices < 0, len(self._ids) - 1 - indices, indices)
+        distances = DistanceCalculator.calculate_distance_km_batch(lat, lng, lats[indices], lngs[indices])
+        return [(ids[idx], float(dist)) for idx, dist in zip(indices.tolist(), distances)]
+
+    def nearest(self, lat: float, lng: float, k: int = 1,
+                predicate: Optional[Callable[[Hashable], bool]] = None,
+                max_radius_km: Optional[float] = None) -> List[Tuple[Hashable, float]]:
+        """
+        Find the k nearest items to a point
+
+        Args:
+            lat, lng: Query point
+            k: Number of items to return
+            predicate: Optional filter called with each candidate item id
+            max_radius_km: Optional cut-off distance
+
+        Returns:
+            List of up to k (item_id, distance_km) tuples sorted by distance
+        """
+        self._ensure_fresh()
+        if k <= 0 or not self._ids:
+            return []
+
+        point = to_unit_vectors(lat, lng)
+        limit_sq = km_to_chord(max_radius_km) ** 2 if max_radius_km is not None else float("inf")
+
+        best: List[Tuple[float, int]] = []  # Max-heap of (-dist_sq, idx)
+
+        # Pending moves seed the heap, which also tightens the tree pruning
+        pending = self._pending_candidates(point, predicate)
+        for j, dist_sq in enumerate(pending[3].tolist()):
+            if dist_sq > limit_sq:
+                continue
+            if len(best) < k:
+                heapq.heappush(best, (-dist_sq, -1 - j))
+            elif dist_sq < -best[0][0]:
+                heapq.heapreplace(best, (-dist_sq, -1 - j))
+
+        frontier = [(self._box_distance_sq(0, point), 0)]
+
+        while frontier:
+            box_sq, node = heapq.heappop(frontier)
+            worst_sq = -best[0][0] if len(best) >= k else limit_sq
+            if box_sq > worst_sq:
+                break
+
+            left = self._node_left[node]
+            if left < 0:
+                for idx, dist_sq in self._leaf_candidates(node, point, predicate):
+                    if dist_sq > limit_sq:
+                        continue
+                    if len(best) < k:
+                        heapq.heappush(best, (-dist_sq, idx))
+                    elif dist_sq < -best[0][0]:
+                        heapq.heapreplace(best, (-dist_sq, idx))
+            else:
+                for child in (left, self._node_right[node]):
+                    heapq.heappush(frontier, (self._box_distance_sq(child, point), child))
+
+        ordered = [idx for _, idx in sorted(best, reverse=True)]
+        return self._results(lat, lng, ordered, pending[:3])
+
+    def within_radius(self, lat: float, lng: float, radius_km: float,
+                      predicate: Optional[Callable[[Hashable], bool]] = None) -> List[Tuple[Hashable, float]]:
+        """
+        Find all items within radius_km of a point
+
+        Returns:
+            List of (item_id, distance_km) sorted by distance
+        """
+        self._ensure_fresh()
+        if not self._ids:
+            return []
+
+        point = to_unit_vectors(lat, lng)
+        limit_sq = km_to_chord(radius_km) ** 2
+
+        pending = self._pending_candidates(point, predicate)
+        hits: List[Tuple[float, int]] = [(dist_sq, -1 - j) for j, dist_sq in enumerate(pending[3].tolist())
+                                         if dist_sq <= limit_sq]
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if self._box_distance_sq(node, point) > limit_sq:
+                continue
+            left = self._node_left[node]
+            if left < 0:
+                hits.extend((dist_sq, idx) for idx, dist_sq in self._leaf_candidates(node, point, predicate)
+                            if dist_sq <= limit_sq)
+            else:
+                stack.append(left)
+                stack.append(self._node_right[node])
+
+        hits.sort()
+        return [r for r in self._results(lat, lng, [idx for _, idx in hits], pending[:3]) if r[1] <= radius_km]
+
+    def nearest_batch(self, lats, lngs, k: int = 1,
+                      predicate: Optional[Callable[[Hashable], bool]] = None,
+                      max_radius_km: Optional[float] = None,
+                      chunk_elements: int = 1 << 22) -> List[List[Tuple[Hashable, float]]]:
+        """
+        nearest() for many query points at once
+
+        The live items (tree snapshot plus pending moves) are gathered and
+        filtered by the predicate once, then each block of query points is
+        matched against all of them with one matrix product and a partial
+        sort. This is O(queries x items) but runs entirely in NumPy, which
+        beats one tree walk per query for fleet-sized indexes; for a few
+        queries against a very large index, call nearest() instead.
+
+        Args:
+            lats, lngs: Arrays of query points
+            chunk_elements: Upper bound on the query x item distances held in memory at once
+
+        Returns:
+            List with one nearest() result per query point
+        """
+        self._ensure_fresh()
+        query_lats = np.ravel(np.asarray(lats, dtype=np.float64))
+        query_lngs = np.ravel(np.asarray(lngs, dtype=np.float64))
+        if k <= 0 or not self._positions:
+            return [[] for _ in range(len(query_lats))]
+
+        # Every live item once: tree points not removed or moved, then the pending set
+        keep = np.fromiter((item_id in self._positions and item_id not in self._pending
+                            and (predicate is None or predicate(item_id)) for item_id in self._ids),
+                           dtype=bool, count=len(self._ids))
+        pending_ids = [item_id for item_id in self._pending if predicate is None or predicate(item_id)]
+        pending_coords = np.array([self._pending[i] for i in pending_ids], dtype=np.float64).reshape(-1, 2)
+        ids = [self._ids[i] for i in np.flatnonzero(keep).tolist()] + pending_ids
+        item_lats = np.concatenate([self._lats[keep], pending_coords[:, 0]])
+        item_lngs = np.concatenate([self._lngs[keep], pending_coords[:, 1]])
+        points = np.concatenate([self._points[keep], to_unit_vectors(pending_coords[:, 0],
+                                                                     pending_coords[:, 1]).reshape(-1, 3)])
+        if not ids:
+            return [[] for _ in range(len(query_lats))]
+
+        queries = to_unit_vectors(query_lats, query_lngs).reshape(-1, 3)
+        limit_sq = km_to_chord(max_radius_km) ** 2 if max_radius_km is not None else np.inf
+        count = min(k, len(ids))
+        block = max(1, chunk_elements // len(ids))
+
+        results = []
+        for lo in range(0, len(queries), block):
+            q = queries[lo:lo + block]
+            # |a - b|^2 = 2 - 2 a.b for unit vectors
+            dist_sq = np.maximum(2.0 - 2.0 * (q @ points.T), 0.0)
+            dist_sq[dist_sq > limit_sq] = np.inf
+
+            nearest = np.argpartition(dist_sq, count - 1, axis=1)[:, :count] if count < len(ids) \
+                else np.broadcast_to(np.arange(len(ids)), (len(q), len(ids)))
+            rows = np.arange(len(q))[:, None]
+            order = np.argsort(dist_sq[rows, nearest], axis=1, kind="stable")
+            nearest = nearest[rows, order]
+            found = np.isfinite(dist_sq[rows, nearest])
+
+            distances = DistanceCalculator.calculate_distance_km_batch(
+                query_lats[lo:lo + block, None], query_lngs[lo:lo + block, None],
+                item_lats[nearest], item_lngs[nearest])
+            for row in range(len(q)):
+                columns = np.flatnonzero(found[row])
+                results.append([(ids[i], float(d)) for i, d in zip(nearest[row, columns].tolist(),
+                                                                   distances[row, columns].tolist())])
+        return results
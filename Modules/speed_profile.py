@@ -0,0 +1,144 @@
+import csv
+import os
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, Optional
+from .vehicle import Vehicle
+from .zone_table import DEFAULT_ZONES_FILE, ZoneIndex, shared_zone_index
+
+DEFAULT_SPEED_PROFILE_FILE = os.path.join("data", "speed_profiles.csv")
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+ANY = "*"
+
+
+def _parse_slot(value: str) -> int:
+    """'HH:MM' on a 15-minute boundary (24:00 allowed as end of day) -> slot index"""
+    hours, minutes = (int(part) for part in value.strip().split(":"))
+    total = hours * 60 + minutes
+    if total % SLOT_MINUTES or not 0 <= total <= 24 * 60:
+        raise ValueError(f"time {value!r} is not on a {SLOT_MINUTES}-minute boundary")
+    return total // SLOT_MINUTES
+
+
+def time_slot(when: Optional[datetime] = None) -> int:
+    """15-minute slot of the day (0-95) for a datetime, defaults to now"""
+    if when is None:
+        when = datetime.now()
+    return (when.hour * 60 + when.minute) // SLOT_MINUTES
+
+
+class SpeedProfile:
+    """
+    Travel speed per vehicle type, zone and 15-minute slot of the day
+
+    Speeds are held in one float32 array of shape
+    (vehicle types, zones + 1, 96); the extra zone row covers points outside
+    every zone. A lookup is a zone resolution plus one array read, and
+    batch lookups are a single fancy-indexing operation.
+    """
+
+    def __init__(self, zones, vehicle_types: Optional[List[str]] = None):
+        """
+        Args:
+            zones: ZoneIndex, e.g. from shared_zone_index, or zone definitions from load_zones
+            vehicle_types: Vehicle class names, defaults to Vehicle.AVERAGE_SPEED's keys
+
+        Every cell starts at the vehicle's Vehicle.AVERAGE_SPEED.
+        """
+        self.vehicle_types = list(vehicle_types or Vehicle.AVERAGE_SPEED)
+        self.vehicle_index: Dict[str, int] = {v: i for i, v in enumerate(self.vehicle_types)}
+        self.zone_rows = ZoneIndex.of(zones)
+
+        base = np.array([Vehicle.AVERAGE_SPEED.get(v, 60) for v in self.vehicle_types], dtype=np.float32)
+        self.speeds = np.repeat(base[:, None, None], len(self.zone_rows) + 1, axis=1).repeat(SLOTS_PER_DAY, axis=2)
+
+        # Bumped on every change so cached ETAs computed from older speeds are not reused
+        self.version = 0
+
+    @classmethod
+    def load(cls, profile_file: str = DEFAULT_SPEED_PROFILE_FILE, zones_file: str = DEFAULT_ZONES_FILE):
+        """
+        Build a profile from a CSV with columns
+        vehicle_type, zone_id, start, end, speed_kph
+
+        zone_id "*" applies to every zone and to points outside all zones.
+        Rows are applied in file order, so later rows override earlier ones.
+        Lines starting with '#' are comments.
+
+        Raises:
+            FileNotFoundError: If either file does not exist
+            ValueError: If a row is malformed or names an unknown vehicle or zone
+        """
+        profile = cls(shared_zone_index(zones_file))
+        with open(profile_file, 'r', encoding='utf-8') as file:
+            rows = csv.DictReader(line for line in file if not line.startswith('#'))
+            for row_no, row in enumerate(rows, start=2):
+                try:
+                    profile.set_speed(row['vehicle_type'].strip(), row['zone_id'].strip(),
+                                      _parse_slot(row['start']), _parse_slot(row['end']),
+                                      float(row['speed_kph']))
+                except (AttributeError, KeyError, ValueError) as e:
+                    raise ValueError(f"{profile_file}: row {row_no}: invalid speed profile record: {e}")
+        return profile
+
+    @classmethod
+    def load_if_exists(cls, profile_file: str = DEFAULT_SPEED_PROFILE_FILE, zones_file: str = DEFAULT_ZONES_FILE):
+        """Load a profile, or return None if a file is missing or invalid"""
+        if not (os.path.exists(profile_file) and os.path.exists(zones_file)):
+            return None
+        try:
+            return cls.load(profile_file, zones_file)
+        except Exception as e:
+            print(f"Error loading speed profile: {e}")
+            return None
+
+    def set_speed(self, vehicle_type: str, zone_id: str, start_slot: int, end_slot: int, speed_kph: float):
+        """
+        Set the speed for a vehicle type and zone over slots [start_slot, end_slot)
+
+        Raises:
+            ValueError: If the vehicle type, zone or slot range is invalid
+        """
+        if speed_kph <= 0:
+            raise ValueError("speed_kph must be positive")
+        if not 0 <= start_slot < end_slot <= SLOTS_PER_DAY:
+            raise ValueError("slot range must be non-empty and within the day")
+        if vehicle_type not in self.vehicle_index:
+            raise ValueError(f"Unknown vehicle type: {vehicle_type}")
+        if zone_id != ANY and zone_id not in self.zone_rows.rows:
+            raise ValueError(f"Unknown zone: {zone_id}")
+
+        zones = slice(None) if zone_id == ANY else self.zone_rows.rows[zone_id]
+        self.speeds[self.vehicle_index[vehicle_type], zones, start_slot:end_slot] = speed_kph
+        self.version += 1
+
+    def speed(self, vehicle_type: str, lat: float, lng: float, when: Optional[datetime] = None) -> float:
+        """
+        Speed in km/h for a vehicle type starting at a point at a given time
+
+        Unknown vehicle types fall back to their Vehicle.AVERAGE_SPEED.
+        """
+        vehicle = self.vehicle_index.get(vehicle_type)
+        if vehicle is None:
+            return Vehicle.AVERAGE_SPEED.get(vehicle_type, 60)
+        return float(self.speeds[vehicle, self.zone_rows.zone_of(lat, lng), time_slot(when)])
+
+    def speeds_for_all(self, lat: float, lng: float, when: Optional[datetime] = None) -> np.ndarray:
+        """Speeds of every vehicle type (in self.vehicle_types order) at a point and time"""
+        return self.speeds[:, self.zone_rows.zone_of(lat, lng), time_slot(when)]
+
+    def speeds_batch(self, vehicle_indices, zone_indices, slots) -> np.ndarray:
+        """
+        Vectorized lookup
+
+        Args:
+            vehicle_indices: Array of indices into self.vehicle_types
+            zone_indices: Array of zone rows (see ZoneIndex)
+            slots: Array of 15-minute slots (see time_slot)
+
+        Returns:
+            Array of speeds in km/h, broadcast over the three inputs
+        """
+        return self.speeds[np.asarray(vehicle_indices), np.asarray(zone_indices), np.asarray(slots)]
@@ -0,0 +1,178 @@
+import math
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+from . import geohash
+
+DEFAULT_PRECISION = 6  # Geohash cells of roughly 1.2 km x 0.6 km
+
+
+class SlidingWindowCounter:
+    """
+    Event count over the last window_seconds, in fixed-size buckets
+
+    Adding an event and reading the total both touch at most `buckets`
+    slots, so every operation is O(1) regardless of the event rate.
+    """
+
+    __slots__ = ("bucket_seconds", "counts", "bucket_ids", "total")
+
+    def __init__(self, window_seconds: float, buckets: int):
+        self.bucket_seconds = window_seconds / buckets
+        self.counts = [0] * buckets
+        self.bucket_ids = [-1] * buckets
+        self.total = 0
+
+    def _expire(self, bucket: int):
+        """Zero every slot that has fallen out of the window ending at bucket"""
+        size = len(self.counts)
+        for slot in range(size):
+            if self.counts[slot] and bucket - self.bucket_ids[slot] >= size:
+                self.total -= self.counts[slot]
+                self.counts[slot] = 0
+
+    def add(self, now: float, count: int = 1):
+        bucket = int(now // self.bucket_seconds)
+        self._expire(bucket)
+        slot = bucket % len(self.counts)
+        if self.bucket_ids[slot] != bucket:
+            self.total -= self.counts[slot]
+            self.counts[slot] = 0
+            self.bucket_ids[slot] = bucket
+        self.counts[slot] += count
+        self.total += count
+
+    def value(self, now: float) -> int:
+        self._expire(int(now // self.bucket_seconds))
+        return self.total
+
+
+class SurgeEngine:
+    """
+    Demand/supply surge multipliers per geohash cell
+
+    Demand is the number of ride requests per cell over a sliding window;
+    supply is the number of available drivers currently in the cell. Both
+    are maintained incrementally from booking and driver events (O(1) per
+    event), so a quote only reads two counters instead of scanning drivers
+    or the booking history.
+
+    Supply is only known where drivers report positions: a cell with no
+    positioned driver gets no surge while any available driver has no
+    position (it could be in that cell), nor before any driver is known.
+    """
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, window_seconds: float = 600, buckets: int = 10,
+                 threshold: float = 1.0, sensitivity: float = 0.25, max_multiplier: float = 2.0,
+                 step: float = 0.1, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            precision: Geohash precision of the surge cells
+            window_seconds: Length of the demand window
+            buckets: Number of buckets the window is split into
+            threshold: Demand/supply ratio above which surge starts
+            sensitivity: Multiplier increase per unit of ratio above the threshold
+            max_multiplier: Upper bound of the multiplier
+            step: Multipliers are rounded down to a multiple of this
+            clock: Monotonic time source in seconds
+        """
+        if window_seconds <= 0 or buckets <= 0:
+            raise ValueError("window_seconds and buckets must be positive")
+        if max_multiplier < 1:
+            raise ValueError("max_multiplier must be at least 1")
+
+        self.precision = precision
+        self.window_seconds = window_seconds
+        self.buckets = buckets
+        self.threshold = threshold
+        self.sensitivity = sensitivity
+        self.max_multiplier = max_multiplier
+        self.step = step
+        self.clock = clock
+
+        self._demand: Dict[str, SlidingWindowCounter] = {}
+        self._supply: Dict[str, int] = {}
+        self._driver_cells: Dict[str, str] = {}  # Plate -> cell the driver is counted as supply in
+        self._unpositioned = set()  # Plates of available drivers without a position
+        self._lock = threading.Lock()
+
+    def cell_of(self, lat: float, lng: float) -> str:
+        return geohash.encode(lat, lng, self.precision)
+
+    def record_request(self, lat: float, lng: float, count: int = 1):
+        """Count a ride request at a pickup point"""
+        cell = self.cell_of(lat, lng)
+        with self._lock:
+            counter = self._demand.get(cell)
+            if counter is None:
+                counter = self._demand[cell] = SlidingWindowCounter(self.window_seconds, self.buckets)
+            counter.add(self.clock(), count)
+
+    def update_driver(self, plate_no: str, lat: Optional[float], lng: Optional[float], available: bool):
+        """
+        Record a driver's current position and availability
+
+        Drivers without a position are not counted as supply anywhere.
+        """
+        cell = self.cell_of(lat, lng) if available and lat is not None else None
+        with self._lock:
+            if available and lat is None:
+                self._unpositioned.add(plate_no)
+            else:
+                self._unpositioned.discard(plate_no)
+            previous = self._driver_cells.get(plate_no)
+            if previous == cell:
+                return
+            if previous is not None:
+                self._supply[previous] -= 1
+                if not self._supply[previous]:
+                    del self._supply[previous]
+                del self._driver_cells[plate_no]
+            if cell is not None:
+                self._supply[cell] = self._supply.get(cell, 0) + 1
+                self._driver_cells[plate_no] = cell
+
+    def on_driver_change(self, driver):
+        """DriverManager driver listener: track a driver after a status or position change"""
+        self.update_driver(driver.plate_no, driver.lat, driver.lng, driver.is_available)
+
+    def demand_supply(self, lat: float, lng: float) -> Tuple[int, Optional[int]]:
+        """(requests in the window, available drivers) for the cell of a point; supply None if unknown"""
+        cell = self.cell_of(lat, lng)
+        with self._lock:
+            counter = self._demand.get(cell)
+            demand = counter.value(self.clock()) if counter is not None else 0
+            return demand, self._cell_supply(cell)
+
+    def _cell_supply(self, cell: str) -> Optional[int]:
+        """Positioned supply of a cell, None when unpositioned or unseen drivers could be there"""
+        supply = self._supply.get(cell, 0)
+        if supply == 0 and (self._unpositioned or not self._driver_cells):
+            return None
+        return supply
+
+    def _multiplier(self, demand: int, supply: Optional[int]) -> float:
+        if supply is None:
+            return 1.0  # Never surge against a fleet the engine cannot see
+        ratio = demand / max(supply, 1)
+        if ratio <= self.threshold:
+            return 1.0
+        raw = min(1.0 + self.sensitivity * (ratio - self.threshold), self.max_multiplier)
+        return round(math.floor(raw / self.step + 1e-9) * self.step, 2)
+
+    def multiplier(self, lat: float, lng: float) -> float:
+        """Surge multiplier (>= 1) for a pickup point"""
+        return self._multiplier(*self.demand_supply(lat, lng))
+
+    def multiplier_batch(self, lats, lngs) -> np.ndarray:
+        """Surge multipliers for arrays of pickup points"""
+        cells = geohash.encode_batch(np.ravel(lats), np.ravel(lngs), self.precision).tolist()
+        now = self.clock()
+        multipliers = {}
+        with self._lock:
+            for cell in set(cells):
+                counter = self._demand.get(cell)
+                demand = counter.value(now) if counter is not None else 0
+                multipliers[cell] = self._multiplier(demand, self._cell_supply(cell))
+        return np.fromiter((multipliers[cell] for cell in cells), dtype=np.float64, count=len(cells))
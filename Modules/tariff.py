@@ -0,0 +1,219 @@
+import json
+import os
+import threading
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
+from .vehicle import Vehicle
+
+DEFAULT_TARIFF_FILE = os.path.join("data", "tariff.json")
+
+DEFAULT_TAX_RATE = 0.03
+
+# Built-in prices as shipped, before any store rebinds the Vehicle dictionaries
+_BUILTIN_PRICES = (dict(Vehicle.BASE_FARES), dict(Vehicle.COST_PER_KM), dict(Vehicle.TAX_RATES))
+
+
+class Tariff(NamedTuple):
+    """Immutable snapshot of every vehicle type's pricing"""
+    version: int
+    base_fares: Mapping[str, float]
+    cost_per_km: Mapping[str, float]
+    tax_rates: Mapping[str, float]
+
+    def rates(self, vehicle_type: str) -> Tuple[float, float, float]:
+        """(base_fare, cost_per_km, tax_rate) of a vehicle class name"""
+        return (self.base_fares.get(vehicle_type, 0), self.cost_per_km.get(vehicle_type, 0),
+                self.tax_rates.get(vehicle_type, DEFAULT_TAX_RATE))
+
+
+def make_tariff(version: int, base_fares: Dict[str, float], cost_per_km: Dict[str, float],
+                tax_rates: Dict[str, float]) -> Tariff:
+    """
+    Build a read-only Tariff from plain dictionaries (which are copied)
+
+    Raises:
+        ValueError: If a fare or rate is negative
+    """
+    for name, values in (("base_fare", base_fares), ("cost_per_km", cost_per_km), ("tax_rate", tax_rates)):
+        for vehicle_type, value in values.items():
+            if value < 0:
+                raise ValueError(f"{name} of {vehicle_type} must not be negative")
+    return Tariff(int(version), MappingProxyType(dict(base_fares)), MappingProxyType(dict(cost_per_km)),
+                  MappingProxyType(dict(tax_rates)))
+
+
+def tariff_from_vehicle() -> Tariff:
+    """The built-in Vehicle class pricing as version 0"""
+    return make_tariff(0, *_BUILTIN_PRICES)
+
+
+def load_tariff(tariff_file: str = DEFAULT_TARIFF_FILE) -> Tariff:
+    """
+    Read a tariff from a JSON file of the form
+    {"version": 3, "vehicles": {"Car4Seater": {"base_fare", "cost_per_km", "tax_rate"}, ...}}
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        ValueError: If the version or a vehicle entry is malformed
+    """
+    with open(tariff_file, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+
+    try:
+        version = int(data["version"])
+        base_fares, cost_per_km, tax_rates = {}, {}, {}
+        for vehicle_type, entry in data["vehicles"].items():
+            base_fares[vehicle_type] = float(entry["base_fare"])
+            cost_per_km[vehicle_type] = float(entry["cost_per_km"])
+            tax_rates[vehicle_type] = float(entry.get("tax_rate", DEFAULT_TAX_RATE))
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"{tariff_file}: invalid tariff: {e}")
+    return make_tariff(version, base_fares, cost_per_km, tax_rates)
+
+
+class TariffStore:
+    """
+    Holds the active tariff and swaps it atomically on reload
+
+    Readers take `store.current` once and price from that snapshot, so a
+    quote never mixes fares from two versions. A reload builds a complete
+    new Tariff first and then replaces the reference in one assignment
+    (copy-on-write). For the process-wide store only (publish_to_vehicle),
+    Vehicle.BASE_FARES, COST_PER_KM and TAX_RATES are rebound to fresh
+    dictionaries for code that reads them directly; other stores never
+    touch them. Listeners are told about every swap, e.g. to drop cached quotes.
+    The tariff file is loaded the first time the active tariff is read, so
+    every user of the store (the booking page, the admin dashboard, the
+    repricing CLI) prices from the file rather than the built-in prices.
+    """
+
+    def __init__(self, tariff_file: str = DEFAULT_TARIFF_FILE, publish_to_vehicle: bool = False):
+        """
+        Args:
+            tariff_file: JSON tariff file loaded on first use and by reloads
+            publish_to_vehicle: Rebind the Vehicle price dictionaries on every swap
+        """
+        self.tariff_file = tariff_file
+        self.publish_to_vehicle = publish_to_vehicle
+        self._current: Optional[Tariff] = None
+        self.listeners: List[Callable[[Tariff], None]] = []
+        self._loaded_mtime: Optional[int] = None
+        self._lock = threading.RLock()  # update() may trigger the first load, which swaps
+
+    @property
+    def current(self) -> Tariff:
+        """The active tariff; the first read loads the tariff file if there is one"""
+        if self._current is None:
+            self._current = tariff_from_vehicle()
+            self.reload_if_changed()
+        return self._current
+
+    @property
+    def version(self) -> int:
+        return self.current.version
+
+    def add_listener(self, callback: Callable[[Tariff], None]):
+        """Call callback(new_tariff) after every swap"""
+        self.listeners.append(callback)
+
+    def swap(self, tariff: Tariff):
+        """Make a tariff the active one"""
+        with self._lock:
+            self._current = tariff
+            if self.publish_to_vehicle:
+                Vehicle.BASE_FARES = dict(tariff.base_fares)
+                Vehicle.COST_PER_KM = dict(tariff.cost_per_km)
+                Vehicle.TAX_RATES = dict(tariff.tax_rates)
+
+        for callback in list(self.listeners):
+            try:
+                callback(tariff)
+            except Exception as e:
+                print(f"Error notifying tariff listener: {e}")
+
+    def update(self, base_fares: Optional[Dict[str, float]] = None, cost_per_km: Optional[Dict[str, float]] = None,
+               tax_rates: Optional[Dict[str, float]] = None) -> Tariff:
+        """
+        Change some prices in memory as a new version
+
+        Vehicle types not mentioned keep their current prices.
+
+        Returns:
+            The new active Tariff
+        """
+        with self._lock:
+            current = self.current
+            tariff = make_tariff(current.version + 1,
+                                 {**current.base_fares, **(base_fares or {})},
+                                 {**current.cost_per_km, **(cost_per_km or {})},
+                                 {**current.tax_rates, **(tax_rates or {})})
+        self.swap(tariff)
+        return tariff
+
+    def load(self) -> Tariff:
+        """
+        Load the tariff file and make it active
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+            ValueError: If the file is invalid, older than the active tariff,
+                or changes prices without a new version
+        """
+        mtime = os.stat(self.tariff_file).st_mtime_ns
+        tariff = load_tariff(self.tariff_file)
+        current = self.current
+        if tariff.version < current.version:
+            raise ValueError(f"{self.tariff_file}: version {tariff.version} is older than "
+                             f"active version {current.version}")
+        if tariff != current and tariff.version == current.version:
+            # Cached quotes are keyed by version, so changed prices need a new one
+            raise ValueError(f"{self.tariff_file}: prices changed but version {tariff.version} was not bumped")
+        self._loaded_mtime = mtime
+        if tariff != current:
+            self.swap(tariff)
+        return tariff
+
+    def reload_if_changed(self) -> bool:
+        """
+        Hot reload: load the tariff file if it changed since the last load
+
+        Errors are printed and the active tariff is kept.
+
+        Returns:
+            True if a new tariff was made active
+        """
+        try:
+            if not os.path.exists(self.tariff_file):
+                return False
+            if os.stat(self.tariff_file).st_mtime_ns == self._loaded_mtime:
+                return False
+            previous = self.current
+            self.load()
+            return self.current is not previous
+        except Exception as e:
+            print(f"Error reloading tariff: {e}")
+            return False
+
+    def save(self, tariff: Optional[Tariff] = None):
+        """Write a tariff (default: the active one) to the tariff file atomically"""
+        tariff = tariff or self.current
+        data = {
+            "version": tariff.version,
+            "vehicles": {
+                vehicle_type: {
+                    "base_fare": tariff.base_fares.get(vehicle_type, 0),
+                    "cost_per_km": tariff.cost_per_km.get(vehicle_type, 0),
+                    "tax_rate": tariff.tax_rates.get(vehicle_type, DEFAULT_TAX_RATE),
+                }
+                for vehicle_type in sorted(set(tariff.base_fares) | set(tariff.cost_per_km) | set(tariff.tax_rates))
+            }
+        }
+        temp_file = f"{self.tariff_file}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as file:
+            json.dump(data, file, indent=2)
+        os.replace(temp_file, self.tariff_file)
+        self._loaded_mtime = os.stat(self.tariff_file).st_mtime_ns
+
+
+# Process-wide tariff used by FareCalculator unless one is passed explicitly
+shared_tariff_store = TariffStore(publish_to_vehicle=True)
@@ -1,4 +1,5 @@
 from abc import ABC
+from . import money
 
 class Vehicle(ABC):
     TAX_RATES = {
@@ -33,6 +34,14 @@ class Vehicle(ABC):
         "Motorcycle": 70,
     }
 
+    CAPACITY = {
+        "Car4Seater": 4,
+        "Car6Seater": 6,
+        "Minivan": 7,
+        "Van": 12,
+        "Motorcycle": 1,
+    }
+
     def __init__(self, vehicle_name, vehicle_type, capacity):
         self.vehicle_name = vehicle_name
         self.vehicle_type = vehicle_type
@@ -56,12 +65,17 @@ class Vehicle(ABC):
         tax_rate = self.TAX_RATES.get(self.vehicle_type, 0.0)
         return base_cost * tax_rate
 
+    def calculate_cost_with_tax_centavos(self, distance):
+        # Whole centavos, each amount rounded once half up (see Modules.money)
+        base_cost = money.round_half_up(distance * money.to_centavos(self.cost_per_km))
+        tax_rate = money.to_basis_points(self.TAX_RATES.get(self.vehicle_type, 0.0))
+        tax = money.div_round_half_up(base_cost * tax_rate, money.BASIS_POINTS)
+        base_fare = money.to_centavos(self.BASE_FARES.get(self.vehicle_type, 0.0))
+        return base_cost + base_fare, tax
+
     def calculate_cost_with_tax(self, distance):
-        base_cost = self.calculate_cost(distance)
-        tax = self.calculate_tax(distance)
-        base_fare = self.BASE_FARES.get(self.vehicle_type, 0.0)
-        total_base = base_cost + base_fare
-        return total_base, tax
+        total_base, tax = self.calculate_cost_with_tax_centavos(distance)
+        return money.to_pesos(total_base), money.to_pesos(tax)
 
     def calculate_eta_minutes(self, distance_km):
         """
@@ -123,12 +137,12 @@ class Car(Vehicle):
 
 class Car4Seater(Car):
     def __init__(self, vehicle_name):
-        super().__init__(vehicle_name, "Car4Seater", 4)
+        super().__init__(vehicle_name, "Car4Seater", Vehicle.CAPACITY["Car4Seater"])
 
 
 class Car6Seater(Car):
     def __init__(self, vehicle_name):
-        super().__init__(vehicle_name, "Car6Seater", 6)
+        super().__init__(vehicle_name, "Car6Seater", Vehicle.CAPACITY["Car6Seater"])
 
 
 # Renamed from 'van' to 'VanBase' for clarity
@@ -139,14 +153,14 @@ class VanBase(Vehicle):
 
 class Van(VanBase):
     def __init__(self, vehicle_name):
-        super().__init__(vehicle_name, "Van", 12)
+        super().__init__(vehicle_name, "Van", Vehicle.CAPACITY["Van"])
 
 
 class Minivan(VanBase):
     def __init__(self, vehicle_name):
-        super().__init__(vehicle_name, "Minivan", 7)
+        super().__init__(vehicle_name, "Minivan", Vehicle.CAPACITY["Minivan"])
 
 
 class Motorcycle(Vehicle):
     def __init__(self, vehicle_name):
-        super().__init__(vehicle_name, "Motorcycle", 1)
\ No newline at end of file
+        super().__init__(vehicle_name, "Motorcycle", Vehicle.CAPACITY["Motorcycle"])
\ No newline at end of file
@@ -0,0 +1,432 @@
+import argparse
+import csv
+import hashlib
+import math
+import os
+import struct
+import time
+import numpy as np
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from .distance_calculator import DistanceCalculator
+from .routing import DEFAULT_GRAPH_FILE, RoadRouter
+from .spatial_index import KM_PER_DEGREE
+
+DEFAULT_ZONES_FILE = os.path.join("data", "zones.csv")
+DEFAULT_ZONE_TABLE_FILE = os.path.join("data", "zone_table.bin")
+
+ZT_MAGIC = b"GODOZT01"
+ZT_HEADER = struct.Struct("<8sqqq")  # magic, zones, zone id width, source code
+ZONE_ID_WIDTH = 32
+SOURCE_CODES = {"haversine": 0, "road": 1}
+
+# Speed used for travel times when the table is built without a road graph
+FALLBACK_SPEED_KPH = 30.0
+
+# Cell edge of the point -> candidate zones lookup grid (roughly 280 m)
+ZONE_CELL_DEG = 0.0025
+
+# A trip is only answered from the table when both points are this close to
+# their zone centroids; the access legs are added to the centroid distance
+MAX_ACCESS_KM = 0.15
+
+
+class Zone(NamedTuple):
+    zone_id: str
+    name: str
+    lat: float
+    lng: float
+    radius_km: float
+
+
+def load_zones(zones_file: str = DEFAULT_ZONES_FILE) -> List[Zone]:
+    """
+    Read zone definitions from a CSV file with columns
+    zone_id, name, lat, lng, radius_km
+
+    Raises:
+        FileNotFoundError: If the zones file does not exist
+        ValueError: If a row is malformed or a zone id is repeated
+    """
+    zones = []
+    seen = set()
+    with open(zones_file, 'r', encoding='utf-8') as file:
+        for line_no, row in enumerate(csv.DictReader(file), start=2):
+            try:
+                zone = Zone(row['zone_id'].strip(), row['name'].strip(), float(row['lat']),
+                            float(row['lng']), float(row['radius_km']))
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"{zones_file}:{line_no}: invalid zone record: {e}")
+            if not zone.zone_id or len(zone.zone_id.encode('utf-8')) > ZONE_ID_WIDTH:
+                raise ValueError(f"{zones_file}:{line_no}: zone id must be 1-{ZONE_ID_WIDTH} bytes")
+            if zone.radius_km <= 0:
+                raise ValueError(f"{zones_file}:{line_no}: radius_km must be positive")
+            if zone.zone_id in seen:
+                raise ValueError(f"{zones_file}:{line_no}: duplicate zone id {zone.zone_id}")
+            seen.add(zone.zone_id)
+            zones.append(zone)
+    return zones
+
+
+def check_zones_disjoint(zone_ids, lats, lngs, radii_km):
+    """
+    Raise ValueError if any two zone circles overlap
+
+    A point in an overlap belongs to either zone, so a trip between two
+    nearby points could be priced at the distance between two centroids.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+    radii_km = np.asarray(radii_km, dtype=np.float64)
+    distance_km = DistanceCalculator.calculate_distance_km_batch(
+        lats[:, None], lngs[:, None], lats[None, :], lngs[None, :])
+    overlap = np.triu(distance_km < radii_km[:, None] + radii_km[None, :], k=1)
+    if overlap.any():
+        i, j = (int(k) for k in np.argwhere(overlap)[0])
+        raise ValueError(f"Zones {zone_ids[i]} and {zone_ids[j]} overlap "
+                         f"({distance_km[i, j]:.3f} km apart, radii {radii_km[i]} + {radii_km[j]} km)")
+
+
+class ZoneLocator:
+    """
+    Point -> zone resolution for circular zones
+
+    Every grid cell a zone circle may touch lists that zone as a candidate,
+    so a lookup is one dict access plus a distance check per candidate.
+    """
+
+    def __init__(self, lats, lngs, radii_km):
+        self._circles = list(zip(np.asarray(lats, dtype=np.float64).tolist(),
+                                 np.asarray(lngs, dtype=np.float64).tolist(),
+                                 np.asarray(radii_km, dtype=np.float64).tolist()))
+        self._cells = {}
+        for i, (lat, lng, radius_km) in enumerate(self._circles):
+            d_lat = radius_km / KM_PER_DEGREE
+            d_lng = d_lat / max(math.cos(math.radians(lat)), 1e-6)
+            for row in range(*self._cell_range(lat - d_lat, lat + d_lat)):
+                for col in range(*self._cell_range(lng - d_lng, lng + d_lng)):
+                    self._cells.setdefault((row, col), []).append(i)
+
+    @classmethod
+    def from_zones(cls, zones: List[Zone]):
+        return cls([z.lat for z in zones], [z.lng for z in zones], [z.radius_km for z in zones])
+
+    @staticmethod
+    def _cell_range(low: float, high: float) -> Tuple[int, int]:
+        return int(math.floor(low / ZONE_CELL_DEG)), int(math.floor(high / ZONE_CELL_DEG)) + 1
+
+    def zone_of(self, lat: float, lng: float) -> Optional[int]:
+        """Index of the closest zone whose radius contains the point, or None"""
+        candidates = self._cells.get((int(math.floor(lat / ZONE_CELL_DEG)), int(math.floor(lng / ZONE_CELL_DEG))))
+        if not candidates:
+            return None
+
+        best, best_distance = None, float("inf")
+        for zone in candidates:
+            zone_lat, zone_lng, radius_km = self._circles[zone]
+            distance = DistanceCalculator.calculate_distance_km_planar(lat, lng, zone_lat, zone_lng)
+            if distance <= radius_km and distance < best_distance:
+                best, best_distance = zone, distance
+        return best
+
+    def zone_of_batch(self, lats, lngs) -> np.ndarray:
+        """
+        Vectorized zone_of
+
+        Returns:
+            Array of zone indices, -1 for points outside every zone
+        """
+        lats = np.ravel(np.asarray(lats, dtype=np.float64))
+        lngs = np.ravel(np.asarray(lngs, dtype=np.float64))
+        zones = np.full(len(lats), -1, dtype=np.int64)
+        best = np.full(len(lats), np.inf)
+        for i, (zone_lat, zone_lng, radius_km) in enumerate(self._circles):
+            distance = DistanceCalculator.calculate_distance_km_planar_batch(lats, lngs, zone_lat, zone_lng)
+            closer = (distance <= radius_km) & (distance < best)
+            zones[closer] = i
+            best[closer] = distance[closer]
+        return zones
+
+
+class ZoneIndex:
+    """
+    Zone rows of points for arrays with one row per zone plus a default row
+
+    Speed profiles, ETA learners, promotions and isochrones all keep per-zone
+    arrays with an extra row for points outside every zone. Those loaded from
+    the same zones file share one index from shared_zone_index, so the file
+    is parsed and its locator grid built once per process.
+    """
+
+    def __init__(self, zones: List[Zone]):
+        self.zones = list(zones)
+        self.zone_ids = [zone.zone_id for zone in self.zones]
+        self.rows: Dict[str, int] = {zone_id: i for i, zone_id in enumerate(self.zone_ids)}
+        self.default_zone = len(self.zone_ids)  # Row of points outside every zone
+        self.locator = ZoneLocator.from_zones(self.zones)
+
+    @classmethod
+    def of(cls, zones):
+        """The index itself, or a new index over a list of zones"""
+        return zones if isinstance(zones, cls) else cls(zones)
+
+    def __len__(self):
+        return len(self.zone_ids)
+
+    def zone_of(self, lat: float, lng: float) -> int:
+        """Zone row for a point (default_zone when outside every zone)"""
+        zone = self.locator.zone_of(lat, lng)
+        return self.default_zone if zone is None else zone
+
+    def zones_batch(self, lats, lngs) -> np.ndarray:
+        """Zone rows for arrays of points"""
+        zones = self.locator.zone_of_batch(lats, lngs)
+        zones[zones < 0] = self.default_zone
+        return zones
+
+
+_shared_zone_indexes: Dict[str, Tuple[float, ZoneIndex]] = {}
+
+
+def shared_zone_index(zones_file: str = DEFAULT_ZONES_FILE) -> ZoneIndex:
+    """
+    The process-wide ZoneIndex of a zones file, reloaded when the file changes
+
+    Raises:
+        FileNotFoundError: If the zones file does not exist
+        ValueError: If a row is malformed or a zone id is repeated
+    """
+    path = os.path.abspath(zones_file)
+    modified = os.path.getmtime(path)
+    cached = _shared_zone_indexes.get(path)
+    if cached is None or cached[0] != modified:
+        cached = _shared_zone_indexes[path] = (modified, ZoneIndex(load_zones(path)))
+    return cached[1]
+
+
+def build_zone_table(zones: List[Zone], output_file: str = DEFAULT_ZONE_TABLE_FILE,
+                     router: Optional[RoadRouter] = None) -> str:
+    """
+    Precompute distance and travel time between every ordered pair of zones
+
+    The file holds a fixed header followed by the zone ids, centroids and
+    radii, then two dense float32 matrices (distance km, travel minutes),
+    laid out so ZoneTable can memory-map it without parsing.
+
+    Args:
+        zones: Zone definitions, e.g. from load_zones
+        output_file: Destination path
+        router: Optional RoadRouter; without one, straight-line distances
+            and FALLBACK_SPEED_KPH are used
+
+    Returns:
+        Path of the written file
+
+    Raises:
+        ValueError: If there are no zones or two zones overlap
+    """
+    n = len(zones)
+    if n == 0:
+        raise ValueError("At least one zone is required")
+    check_zones_disjoint([z.zone_id for z in zones], [z.lat for z in zones], [z.lng for z in zones],
+                         [z.radius_km for z in zones])
+
+    lats = np.array([z.lat for z in zones], dtype=np.float64)
+    lngs = np.array([z.lng for z in zones], dtype=np.float64)
+    radii = np.array([z.radius_km for z in zones], dtype=np.float64)
+    zone_ids = np.array([z.zone_id.encode('utf-8') for z in zones], dtype=f"S{ZONE_ID_WIDTH}")
+
+    # Straight-line matrix first; it is also the fallback for unreachable pairs
+    distance_km = DistanceCalculator.calculate_distance_km_batch(
+        lats[:, None], lngs[:, None], lats[None, :], lngs[None, :])
+    minutes = distance_km / FALLBACK_SPEED_KPH * 60
+    source = "haversine"
+
+    if router is not None:
+        source = "road"
+        for i in range(n):
+            for j in range(n):
+                if i == j:
+                    continue
+                result = router.route(lats[i], lngs[i], lats[j], lngs[j])
+                if result is not None:
+                    distance_km[i, j] = result['distance_km']
+                    minutes[i, j] = result['duration_minutes']
+
+    directory = os.path.dirname(output_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(output_file, 'wb') as file:
+        file.write(ZT_HEADER.pack(ZT_MAGIC, n, ZONE_ID_WIDTH, SOURCE_CODES[source]))
+        arrays = (zone_ids, lats, lngs, radii,
+                  distance_km.astype(np.float32), minutes.astype(np.float32))
+        for array in arrays:
+            file.write(array.tobytes())
+            padding = (-array.nbytes) % 8  # Keep every array 8-byte aligned
+            file.write(b"\0" * padding)
+
+    return output_file
+
+
+class ZoneTable:
+    """
+    Memory-mapped zone-to-zone distance and travel time matrix
+
+    A trip whose pickup and dropoff both lie within max_access_km of the
+    centroids of two different zones is answered with two array reads
+    instead of a routing query: the centroid-to-centroid value plus the
+    straight access legs to and from the centroids. Other trips fall back
+    to live distances. Several processes can map the same file and share
+    its pages.
+    """
+
+    def __init__(self, table_file: str, mmap_mode: str = "r", max_access_km: float = MAX_ACCESS_KM):
+        with open(table_file, 'rb') as file:
+            magic, n, id_width, source_code = ZT_HEADER.unpack(file.read(ZT_HEADER.size))
+        if magic != ZT_MAGIC:
+            raise ValueError(f"{table_file} is not a zone table file")
+
+        self.table_file = table_file
+        self.zone_count = n
+        self.source = {code: name for name, code in SOURCE_CODES.items()}[source_code]
+
+        offset = ZT_HEADER.size
+        layout = [
+            ("_zone_ids", f"S{id_width}", (n,)),
+            ("lats", np.float64, (n,)),
+            ("lngs", np.float64, (n,)),
+            ("radii_km", np.float64, (n,)),
+            ("distance_km", np.float32, (n, n)),
+            ("minutes", np.float32, (n, n)),
+        ]
+        for name, dtype, shape in layout:
+            array = np.memmap(table_file, dtype=dtype, mode=mmap_mode, offset=offset,
+                              shape=shape).view(np.ndarray)
+            setattr(self, name, array)
+            offset += array.nbytes + (-array.nbytes) % 8
+
+        self.zone_ids = [raw.decode('utf-8') for raw in self._zone_ids]
+        self.zone_index = {zone_id: i for i, zone_id in enumerate(self.zone_ids)}
+        check_zones_disjoint(self.zone_ids, self.lats, self.lngs, self.radii_km)
+        self.locator = ZoneLocator(self.lats, self.lngs, self.radii_km)
+        self.max_access_km = max_access_km
+        self._fingerprint = None
+
+    @classmethod
+    def load(cls, table_file: str = DEFAULT_ZONE_TABLE_FILE):
+        """Memory-map a table built by build_zone_table"""
+        return cls(table_file)
+
+    @classmethod
+    def load_if_exists(cls, table_file: str = DEFAULT_ZONE_TABLE_FILE):
+        """Memory-map a table, or return None if it is missing or unreadable"""
+        if not os.path.exists(table_file):
+            return None
+        try:
+            return cls(table_file)
+        except Exception as e:
+            print(f"Error loading zone table: {e}")
+            return None
+
+    @property
+    def fingerprint(self) -> str:
+        """Digest of the zones, matrices and access limit, identifying the answers this table gives"""
+        if self._fingerprint is None:
+            digest = hashlib.sha1(f"{self.source}:{self.max_access_km!r}".encode())
+            for array in (self._zone_ids, self.lats, self.lngs, self.radii_km, self.distance_km, self.minutes):
+                digest.update(np.ascontiguousarray(array).tobytes())
+            self._fingerprint = digest.hexdigest()[:16]
+        return self._fingerprint
+
+    def zone_of(self, lat: float, lng: float) -> Optional[int]:
+        """Index of the closest zone whose radius contains the point, or None"""
+        return self.locator.zone_of(lat, lng)
+
+    def _access_km(self, zone: int, lat: float, lng: float) -> float:
+        return DistanceCalculator.calculate_distance_km_planar(lat, lng, float(self.lats[zone]), float(self.lngs[zone]))
+
+    def lookup(self, lat1, lng1, lat2, lng2) -> Optional[Tuple[float, float]]:
+        """
+        Distance and travel time between two points through their zone centroids
+
+        The access legs are covered at FALLBACK_SPEED_KPH.
+
+        Returns:
+            Tuple of (distance_km, minutes), or None when either point is
+            outside every zone or farther than max_access_km from its
+            centroid, or both are in the same zone
+        """
+        origin = self.zone_of(lat1, lng1)
+        if origin is None:
+            return None
+        destination = self.zone_of(lat2, lng2)
+        if destination is None or destination == origin:
+            return None
+        origin_km, destination_km = self._access_km(origin, lat1, lng1), self._access_km(destination, lat2, lng2)
+        if origin_km > self.max_access_km or destination_km > self.max_access_km:
+            return None
+        access_km = origin_km + destination_km
+        return (float(self.distance_km[origin, destination]) + access_km,
+                float(self.minutes[origin, destination]) + access_km / FALLBACK_SPEED_KPH * 60)
+
+    def lookup_batch(self, lat1, lng1, lat2, lng2) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized lookup for arrays of trips
+
+        Returns:
+            Tuple of (distance_km, minutes) arrays, NaN where lookup would
+            return None
+        """
+        lat1, lng1 = np.ravel(np.asarray(lat1, dtype=np.float64)), np.ravel(np.asarray(lng1, dtype=np.float64))
+        lat2, lng2 = np.ravel(np.asarray(lat2, dtype=np.float64)), np.ravel(np.asarray(lng2, dtype=np.float64))
+        origins = self.locator.zone_of_batch(lat1, lng1)
+        destinations = self.locator.zone_of_batch(lat2, lng2)
+        known = (origins >= 0) & (destinations >= 0) & (origins != destinations)
+
+        origin_km = DistanceCalculator.calculate_distance_km_planar_batch(
+            lat1, lng1, self.lats[origins], self.lngs[origins])
+        destination_km = DistanceCalculator.calculate_distance_km_planar_batch(
+            lat2, lng2, self.lats[destinations], self.lngs[destinations])
+        known &= (origin_km <= self.max_access_km) & (destination_km <= self.max_access_km)
+        access_km = origin_km + destination_km
+
+        distance_km = np.full(len(origins), np.nan)
+        minutes = np.full(len(origins), np.nan)
+        distance_km[known] = self.distance_km[origins[known], destinations[known]] + access_km[known]
+        minutes[known] = (self.minutes[origins[known], destinations[known]]
+                          + access_km[known] / FALLBACK_SPEED_KPH * 60)
+        return distance_km, minutes
+
+    def lookup_ids(self, origin_id: str, destination_id: str) -> Tuple[float, float]:
+        """Distance and travel time between two zones by id"""
+        i, j = self.zone_index[origin_id], self.zone_index[destination_id]
+        return float(self.distance_km[i, j]), float(self.minutes[i, j])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Zone-to-zone distance/time table")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Build a zone table file")
+    build_parser.add_argument("--zones", default=DEFAULT_ZONES_FILE)
+    build_parser.add_argument("--graph", default=DEFAULT_GRAPH_FILE,
+                              help="Road graph CSV; pass an empty string for straight-line distances")
+    build_parser.add_argument("--output", default=DEFAULT_ZONE_TABLE_FILE)
+
+    show_parser = subparsers.add_parser("show", help="Print a zone table")
+    show_parser.add_argument("--table", default=DEFAULT_ZONE_TABLE_FILE)
+
+    args = parser.parse_args()
+    if args.command == "build":
+        start = time.perf_counter()
+        router = RoadRouter.from_file(args.graph) if args.graph else None
+        path = build_zone_table(load_zones(args.zones), args.output, router)
+        print(f"Wrote {path} in {time.perf_counter() - start:.2f}s")
+    else:
+        table = ZoneTable.load(args.table)
+        print(f"{table.zone_count} zones ({table.source})")
+        for i, origin in enumerate(table.zone_ids):
+            for j, destination in enumerate(table.zone_ids):
+                if i != j:
+                    print(f"{origin:>12} -> {destination:<12} "
+                          f"{table.distance_km[i, j]:6.2f} km {table.minutes[i, j]:6.1f} min")
@@ -0,0 +1,131 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Modules import geohash
+
+PRECISIONS = range(1, geohash.MAX_PRECISION + 1)
+
+EDGE_LATS = [-90.0, -89.999999, -45.0, 0.0, -0.0, 1e-12, -1e-12, 45.0, 89.999999, 90.0]
+EDGE_LNGS = [-180.0, -179.999999, -90.0, 0.0, -0.0, 1e-12, -1e-12, 90.0, 179.999999, 180.0]
+
+
+def _edge_points():
+    lats, lngs = np.meshgrid(EDGE_LATS, EDGE_LNGS, indexing="ij")
+    return lats.ravel(), lngs.ravel()
+
+
+def _random_points(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-90, 90, n), rng.uniform(-180, 180, n)
+
+
+def _cell_boundaries(precision):
+    """Points exactly on cell edges, where rounding differences would show first"""
+    height, width = geohash.cell_size(precision)
+    rows = np.arange(0, 180 / height + 1, max(1, int(180 / height) // 50))
+    cols = np.arange(0, 360 / width + 1, max(1, int(360 / width) // 50))
+    lats, lngs = np.meshgrid(rows * height - 90, cols * width - 180, indexing="ij")
+    return lats.ravel(), lngs.ravel()
+
+
+@pytest.mark.parametrize("precision", PRECISIONS)
+def test_roundtrip_within_cell(precision):
+    height, width = geohash.cell_size(precision)
+    lats, lngs = _random_points()
+    lats = np.concatenate([lats, _edge_points()[0]])
+    lngs = np.concatenate([lngs, _edge_points()[1]])
+
+    for lat, lng in zip(lats.tolist(), lngs.tolist()):
+        code = geohash.encode(lat, lng, precision)
+        assert len(code) == precision
+        lat_min, lat_max, lng_min, lng_max = geohash.decode_bbox(code)
+        assert lat_min <= lat <= lat_max
+        assert lng_min <= lng <= lng_max
+        assert lat_max - lat_min == pytest.approx(height)
+        assert lng_max - lng_min == pytest.approx(width)
+
+        center_lat, center_lng = geohash.decode(code)
+        assert abs(center_lat - lat) <= height / 2
+        assert abs(center_lng - lng) <= width / 2
+
+
+@pytest.mark.parametrize("precision", PRECISIONS)
+def test_batch_roundtrip_within_cell(precision):
+    height, width = geohash.cell_size(precision)
+    for lats, lngs in (_random_points(), _edge_points()):
+        decoded_lats, decoded_lngs = geohash.decode_batch(geohash.encode_batch(lats, lngs, precision))
+        assert np.all(np.abs(decoded_lats - lats) <= height / 2)
+        assert np.all(np.abs(decoded_lngs - lngs) <= width / 2)
+
+
+@pytest.mark.parametrize("precision", PRECISIONS)
+def test_scalar_and_batch_encode_agree(precision):
+    for lats, lngs in (_random_points(seed=precision), _edge_points(), _cell_boundaries(precision)):
+        batch = geohash.encode_batch(lats, lngs, precision)
+        scalar = [geohash.encode(lat, lng, precision) for lat, lng in zip(lats.tolist(), lngs.tolist())]
+        assert batch.tolist() == scalar
+
+
+@pytest.mark.parametrize("precision", PRECISIONS)
+def test_scalar_and_batch_decode_agree(precision):
+    lats, lngs = _random_points(seed=precision)
+    lats = np.concatenate([lats, _edge_points()[0]])
+    lngs = np.concatenate([lngs, _edge_points()[1]])
+    hashes = geohash.encode_batch(lats, lngs, precision)
+
+    decoded_lats, decoded_lngs = geohash.decode_batch(hashes)
+    for code, lat, lng in zip(hashes.tolist(), decoded_lats.tolist(), decoded_lngs.tolist()):
+        assert geohash.decode(code) == pytest.approx((lat, lng), abs=1e-12)
+
+
+def test_integer_codes_sort_like_strings():
+    lats, lngs = _random_points(500)
+    codes = geohash.encode_int_batch(lats, lngs, 9)
+    hashes = geohash.encode_batch(lats, lngs, 9)
+    assert np.array_equal(np.argsort(codes, kind="stable"), np.argsort(hashes, kind="stable"))
+
+
+def test_batch_keeps_input_shape():
+    lats = np.zeros((3, 4))
+    lngs = np.ones((3, 4))
+    hashes = geohash.encode_batch(lats, lngs, 7)
+    assert hashes.shape == (3, 4)
+    decoded_lats, decoded_lngs = geohash.decode_batch(hashes)
+    assert decoded_lats.shape == decoded_lngs.shape == (3, 4)
+
+
+def test_known_value():
+    assert geohash.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    lat, lng = geohash.decode("u4pruydqqvj")
+    assert lat == pytest.approx(57.64911, abs=1e-5)
+    assert lng == pytest.approx(10.40744, abs=1e-5)
+
+
+def test_decode_is_case_insensitive():
+    assert geohash.decode("U4PRUYD") == geohash.decode("u4pruyd")
+    assert geohash.decode_batch(["U4PRUYD"])[0][0] == geohash.decode_batch(["u4pruyd"])[0][0]
+
+
+@pytest.mark.parametrize("precision", [0, geohash.MAX_PRECISION + 1])
+def test_invalid_precision(precision):
+    with pytest.raises(ValueError):
+        geohash.encode(0.0, 0.0, precision)
+    with pytest.raises(ValueError):
+        geohash.encode_batch([0.0], [0.0], precision)
+
+
+def test_invalid_characters():
+    with pytest.raises(ValueError):
+        geohash.decode("u4pa")
+    with pytest.raises(ValueError):
+        geohash.decode_batch(["u4pa"])
+
+
+def test_decode_batch_rejects_mixed_precisions():
+    with pytest.raises(ValueError):
+        geohash.decode_batch(["u4pr", "u4p"])